@@ -394,6 +394,25 @@ class ScRejectIn(BaseModel):
     reason: str | None = None
 
 
+@router.post("/{request_id}/claim", response_model=RequestRead)
+async def claim_request(
+    request_id: int,
+    payload: ScActionIn,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Клиент выбрал СТО: закрепляем заявку за сервисом.
+    409 — заявка уже закреплена за другим сервисом или закрыта.
+    """
+    req = await RequestsService.claim_request(db, request_id, payload.service_center_id)
+    if not req:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Request already taken",
+        )
+    return req
+
+
 @router.post("/{request_id}/set_in_work", response_model=RequestRead)
 async def set_in_work(
     request_id: int,
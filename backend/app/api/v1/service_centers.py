@@ -363,6 +363,21 @@ async def list_service_centers_by_user(
     return sc_list
 
 
+# ----------------------------------------------------------------------
+# СТО конкретного владельца (по telegram_id)
+# ----------------------------------------------------------------------
+@router.get(
+    "/by-owner-tg/{telegram_id}",
+    response_model=List[ServiceCenterRead],
+)
+async def list_service_centers_by_owner_tg(
+    telegram_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    sc_list = await ServiceCentersService.list_by_owner_telegram_id(db, telegram_id)
+    return sc_list
+
+
 # ----------------------------------------------------------------------
 # Список всех СТО (для админки)
 # ----------------------------------------------------------------------
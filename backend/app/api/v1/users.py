@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.db import get_db
 from ...models.user import User
-from ...schemas.user import UserCreate, UserRead, UserUpdate
+from ...schemas.user import UserCreate, UserProfileUpsert, UserRead, UserUpdate
 from ...services.user_service import UsersService
 
 router = APIRouter(
@@ -60,6 +60,19 @@ async def get_user_by_telegram(
     return user
 
 
+@router.put("/by-telegram/{telegram_id}", response_model=UserRead)
+async def upsert_user_by_telegram(
+    telegram_id: int,
+    profile_in: UserProfileUpsert,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Регистрация из бота: создать пользователя или обновить его анкету.
+    """
+    user = await UsersService.upsert_by_telegram(db, telegram_id, profile_in)
+    return user
+
+
 @router.get("/", response_model=List[UserRead])
 async def list_users(
     db: AsyncSession = Depends(get_db),
@@ -11,6 +11,7 @@ from sqlalchemy import (
     String,
     Text,
     JSON,
+    inspect,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -128,3 +129,15 @@ class Request(Base):
         back_populates="request",
         cascade="all, delete-orphan",
     )
+
+    @property
+    def client_telegram_id(self) -> int | None:
+        """
+        telegram_id клиента, если связь user уже подгружена
+        (selectinload в RequestsService.get_request_by_id).
+        Ленивую загрузку не запускаем — в async-сессии это упало бы.
+        """
+        if "user" in inspect(self).unloaded:
+            return None
+        user = self.user
+        return user.telegram_id if user is not None else None
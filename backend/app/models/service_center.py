@@ -7,6 +7,7 @@ from sqlalchemy import (
     Integer,
     String,
     JSON,
+    inspect,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -91,3 +92,15 @@ class ServiceCenter(Base):
         back_populates="service_center",
         cascade="all, delete-orphan",
     )
+
+    @property
+    def owner_telegram_id(self) -> int | None:
+        """
+        telegram_id владельца, если связь owner уже подгружена
+        (selectinload в сервисе). Ленивую загрузку не запускаем —
+        в async-сессии это упало бы.
+        """
+        if "owner" in inspect(self).unloaded:
+            return None
+        owner = self.owner
+        return owner.telegram_id if owner is not None else None
@@ -77,5 +77,9 @@ class RequestRead(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+    # telegram_id клиента (заполняется, если user подгружен) —
+    # боту не нужен отдельный запрос пользователя для уведомления
+    client_telegram_id: Optional[int] = None
+
     class Config:
         from_attributes = True
@@ -124,4 +124,8 @@ class ServiceCenterRead(ServiceCenterBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+    # telegram_id владельца (заполняется, если owner подгружен) —
+    # боту не нужно отдельно запрашивать пользователя для рассылки
+    owner_telegram_id: Optional[int] = None
+
     model_config = ConfigDict(from_attributes=True)
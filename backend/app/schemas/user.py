@@ -33,6 +33,16 @@ class UserUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class UserProfileUpsert(BaseModel):
+    """
+    Анкета из регистрации в боте: создаёт пользователя
+    или обновляет существующего (по telegram_id).
+    """
+    full_name: Optional[str] = None
+    phone: Optional[str] = None
+    city: Optional[str] = None
+
+
 class UserRead(UserBase):
     id: int
     bonus_balance: int
@@ -4,7 +4,7 @@ import logging
 import os
 from typing import List, Optional
 
-from sqlalchemy import delete, select
+from sqlalchemy import and_, delete, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from backend.app.services.user_service import UsersService
@@ -254,6 +254,65 @@ class RequestsService:
         await db.refresh(req)
         return req
 
+    # ------------------------------------------------------------------
+    # Выбор СТО клиентом (атомарно)
+    # ------------------------------------------------------------------
+    @staticmethod
+    async def claim_request(
+        db: AsyncSession,
+        request_id: int,
+        service_center_id: int,
+    ) -> Optional[Request]:
+        """
+        Закрепить заявку за СТО одним условным UPDATE.
+
+        Проходит только если заявка ещё не закреплена за другим сервисом
+        и не ушла дальше по статусам — так два параллельных выбора
+        не перетрут друг друга. None — заявку уже забрали (или её нет).
+
+        Повторный выбор того же СТО (двойной тап, повтор после ошибки
+        на следующем шаге) идемпотентен — заявка уже за ним.
+        """
+        stmt = (
+            update(Request)
+            .where(
+                Request.id == request_id,
+                or_(
+                    and_(
+                        or_(
+                            Request.service_center_id.is_(None),
+                            Request.service_center_id == service_center_id,
+                        ),
+                        Request.status.notin_(
+                            [
+                                RequestStatus.ACCEPTED_BY_SERVICE,
+                                RequestStatus.IN_WORK,
+                                RequestStatus.DONE,
+                                RequestStatus.CANCELLED,
+                            ]
+                        ),
+                    ),
+                    and_(
+                        Request.status == RequestStatus.ACCEPTED_BY_SERVICE,
+                        Request.service_center_id == service_center_id,
+                    ),
+                ),
+            )
+            .values(
+                service_center_id=service_center_id,
+                status=RequestStatus.ACCEPTED_BY_SERVICE,
+            )
+            .returning(Request.id)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmt)
+        claimed_id = res.scalar_one_or_none()
+        await db.commit()
+
+        if claimed_id is None:
+            return None
+        return await RequestsService.get_request_by_id(db, request_id)
+
     # ------------------------------------------------------------------
     # Рассылка по СТО
     # ------------------------------------------------------------------
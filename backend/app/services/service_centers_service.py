@@ -5,7 +5,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.models import ServiceCenter
+from backend.app.models import ServiceCenter, User
 from backend.app.schemas.service_center import (
     ServiceCenterCreate,
     ServiceCenterUpdate,
@@ -82,6 +82,30 @@ class ServiceCentersService:
         result = await db.execute(stmt)
         return list(result.scalars().all())
 
+    @staticmethod
+    async def list_by_owner_telegram_id(
+        db: AsyncSession,
+        telegram_id: int,
+    ) -> List[ServiceCenter]:
+        """
+        Активные СТО владельца по его telegram_id — одним запросом
+        (JOIN users), без отдельного поиска пользователя.
+        Непромодерированные и отключённые СТО не возвращаем: по этому
+        списку бот пускает владельца к заявкам и откликам.
+        """
+        stmt = (
+            select(ServiceCenter)
+            .join(User, User.id == ServiceCenter.user_id)
+            .options(selectinload(ServiceCenter.owner))
+            .where(
+                User.telegram_id == telegram_id,
+                ServiceCenter.is_active.is_(True),
+            )
+            .order_by(ServiceCenter.created_at.desc())
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
     @staticmethod
     async def list_by_user_id(
         db: AsyncSession,
@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..core.config import settings
 from ..models.user import User
 from ..models.bonus import BonusReason, BonusTransaction
-from ..schemas.user import UserCreate, UserUpdate, UserRole
+from ..schemas.user import UserCreate, UserProfileUpsert, UserUpdate, UserRole
 from ..services.bonus_service import BonusService
 
 
@@ -50,6 +50,31 @@ class UsersService:
 
         return user
 
+    @staticmethod
+    async def upsert_by_telegram(
+        db: AsyncSession,
+        telegram_id: int,
+        profile_in: UserProfileUpsert,
+    ) -> User:
+        """
+        Регистрация из бота одним запросом: нет пользователя — создаём
+        (с бонусом за регистрацию), есть — обновляем анкету.
+        Роль и активность здесь не трогаем.
+        """
+        user = await UsersService.get_user_by_telegram(db, telegram_id)
+        if user is None:
+            return await UsersService.create_user(
+                db,
+                UserCreate(telegram_id=telegram_id, **profile_in.model_dump()),
+            )
+
+        for field, value in profile_in.model_dump(exclude_unset=True).items():
+            setattr(user, field, value)
+
+        await db.commit()
+        await db.refresh(user)
+        return user
+
     @staticmethod
     async def get_user_by_telegram(
         db: AsyncSession,
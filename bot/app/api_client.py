@@ -1,12 +1,29 @@
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+import asyncio
 import logging
+import time
 import aiohttp
 
+from . import json_utils
 from .config import config
 
 logger = logging.getLogger(__name__)
 
 
+class APIError(Exception):
+    """
+    Ошибка обращения к backend-у.
+
+    status — HTTP-статус ответа (None, если до backend-а не достучались).
+    Текст ошибки сохраняет прежний формат "API error <status>: <text>".
+    """
+
+    def __init__(self, status: Optional[int], text: str) -> None:
+        self.status = status
+        self.text = text
+        super().__init__(f"API error {status}: {text}")
+
+
 class APIClient:
     """
     Тонкий HTTP-клиент для общения бота с backend-ом CarBot V2.
@@ -19,6 +36,110 @@ class APIClient:
         # Например: http://127.0.0.1:8040
         self.base_url = config.BACKEND_URL.rstrip("/")
 
+        # Одна сессия (и keep-alive пул) на весь процесс: без неё каждый
+        # вызов открывал новое TCP-соединение к backend-у.
+        # Создаётся лениво — ClientSession нужен запущенный event loop.
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # user_id -> (expires_at, список СТО владельца).
+        # Меню СТО и редактирование профиля дёргают by-user на каждый клик,
+        # поэтому держим ответ коротко и сбрасываем при create/update.
+        self._sc_by_user_ttl = 60.0
+        self._sc_by_user_maxsize = 4096
+        self._sc_by_user_cache: Dict[int, Tuple[float, Any]] = {}
+
+        # telegram_id владельца -> (expires_at, его СТО).
+        # Нужна на каждом отклике / смене статуса. Бот сбрасывает запись после
+        # своего update_service_center, но правки профиля в webapp и
+        # включение/выключение СТО в админке не видит — TTL короткий.
+        self._my_sc_ttl = 30.0
+        self._my_sc_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+
+        # sc_id -> (expires_at, название СТО): только для подписей в списке
+        # откликов и ветке «уже выбран другой сервис». Профиль целиком
+        # (владелец, is_active) не кэшируем — его правят webapp и админка.
+        self._sc_name_ttl = 300.0
+        self._sc_name_cache: Dict[int, Tuple[float, str]] = {}
+
+        # telegram_id -> (expires_at, пользователь) — единственный кэш
+        # пользователей в боте (им же пользуется CurrentUserMiddleware).
+        # Бот сбрасывает запись только после своих записей (регистрация,
+        # update_user); правки из webapp/админки (профиль, роль) он не видит,
+        # поэтому TTL короткий — роль и меню отстают не больше чем на минуту.
+        self._user_by_tg_ttl = 60.0
+        self._user_by_tg_maxsize = 10_000
+        # «не зарегистрирован» помним недолго: fallback-и хендлеров не ходят
+        # в backend второй раз за апдейт, а регистрация в webapp видна быстро
+        self._user_missing_ttl = 10.0
+        self._user_by_tg_cache: Dict[int, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        # telegram_id -> запрос в полёте: одновременные апдейты одного
+        # пользователя (двойной клик, альбом) ждут один ответ backend-а
+        self._user_by_tg_inflight: Dict[int, asyncio.Future] = {}
+        # telegram_id -> поколение: forget_user увеличивает его, пока запрос
+        # «в полёте», и тот уже не пишет свой (возможно, старый) ответ в кэш.
+        # Запись появляется только при таком совпадении — словарь маленький.
+        self._user_by_tg_gen: Dict[int, int] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=200,
+                limit_per_host=100,
+                keepalive_timeout=75,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                # backend рядом: если соединение не открылось за пару
+                # секунд, ждать остаток total бессмысленно
+                timeout=aiohttp.ClientTimeout(total=10, connect=2),
+                json_serialize=json_utils.dumps,
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Закрыть HTTP-сессию (вызывается при остановке бота).
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def remember_my_service_center(self, telegram_id: int, sc: Any) -> None:
+        """
+        Запомнить СТО владельца. Только активный: неодобренный модерацией
+        СТО не должен открывать владельцу заявки даже через кэш.
+        """
+        if not isinstance(sc, dict) or not sc.get("id") or not sc.get("is_active"):
+            return
+        if len(self._my_sc_cache) >= self._sc_by_user_maxsize:
+            self._my_sc_cache.pop(next(iter(self._my_sc_cache)))
+        self._my_sc_cache[int(telegram_id)] = (time.monotonic() + self._my_sc_ttl, sc)
+
+    def forget_user(self, telegram_id: int) -> None:
+        """
+        Сбросить кэш пользователя по telegram_id.
+        """
+        telegram_id = int(telegram_id)
+        self._user_by_tg_cache.pop(telegram_id, None)
+        # ответ запроса «в полёте» может быть уже устаревшим: новые вызовы
+        # его не ждут, а сам запрос не запишет результат в кэш
+        if self._user_by_tg_inflight.pop(telegram_id, None) is not None:
+            if len(self._user_by_tg_gen) >= self._user_by_tg_maxsize:
+                self._user_by_tg_gen.pop(next(iter(self._user_by_tg_gen)))
+            self._user_by_tg_gen[telegram_id] = self._user_by_tg_gen.get(telegram_id, 0) + 1
+
+    def forget_service_centers_of(self, user_id: Optional[int]) -> None:
+        """
+        Сбросить кэш списка СТО пользователя.
+        """
+        if user_id is None:
+            return
+        try:
+            self._sc_by_user_cache.pop(int(user_id), None)
+        except (TypeError, ValueError):
+            pass
+
     async def _request(
         self,
         method: str,
@@ -50,11 +171,12 @@ class APIClient:
                     safe_params[key] = value
             params = safe_params or None
 
-        async with aiohttp.ClientSession() as session:
+        try:
+            session = self._get_session()
             async with session.request(method, url, json=data, params=params) as resp:
                 if resp.status >= 400:
                     text = await resp.text()
-                    raise Exception(f"API error {resp.status}: {text}")
+                    raise APIError(resp.status, text)
 
                 if resp.status == 204:
                     return None
@@ -62,10 +184,13 @@ class APIClient:
                 # Пытаемся распарсить JSON
                 content_type = resp.headers.get("Content-Type", "")
                 if "application/json" in content_type:
-                    return await resp.json()
+                    return await resp.json(loads=json_utils.loads)
 
                 # fallback — обычный текст
                 return await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # сетевые ошибки тоже приводим к APIError — их ловит общий обработчик
+            raise APIError(None, repr(e)) from e
 
     # ------------------------------------------------------------------
     # USERS (пользователи)
@@ -78,30 +203,104 @@ class APIClient:
             data,
         )
 
-    async def get_user_by_telegram(self, telegram_id: int) -> Any:
+    async def get_user_by_telegram(self, telegram_id: int, use_cache: bool = True) -> Any:
         """
         Получить пользователя по telegram_id.
         Если backend вернёт 404 — возвращаем None, а не кидаем исключение.
+
+        Ответ кэшируется на _user_by_tg_ttl (404 — на _user_missing_ttl),
+        одновременные запросы одного telegram_id склеиваются в один;
+        use_cache=False — сходить в backend в обход кэша (и обновить его).
         """
+        telegram_id = int(telegram_id)
+        now = time.monotonic()
+        if use_cache:
+            cached = self._user_by_tg_cache.get(telegram_id)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        # use_cache=False пропускает только TTL-кэш: запрос «в полёте»
+        # и так свежий, второй такой же в backend не шлём
+        pending = self._user_by_tg_inflight.get(telegram_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        task = asyncio.ensure_future(self._fetch_user_by_telegram(telegram_id))
+        # ошибку заберёт тот, кто ждёт; если ждать некому — не шумим в лог
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._user_by_tg_inflight[telegram_id] = task
         try:
-            return await self._request(
+            # shield: отмена одного хендлера не должна отменять запрос остальным
+            return await asyncio.shield(task)
+        finally:
+            if self._user_by_tg_inflight.get(telegram_id) is task:
+                del self._user_by_tg_inflight[telegram_id]
+
+    async def _fetch_user_by_telegram(self, telegram_id: int) -> Any:
+        gen = self._user_by_tg_gen.get(telegram_id, 0)
+        try:
+            user = await self._request(
                 "GET",
                 f"/api/v1/users/by-telegram/{telegram_id}",
             )
-        except Exception as e:
-            msg = str(e)
-            if "404" in msg:
-                logger.info("User with telegram_id=%s not found in backend", telegram_id)
+        except APIError as e:
+            if e.status == 404:
+                # бывает на каждом апдейте незарегистрированного — не шумим в INFO
+                logger.debug("User with telegram_id=%s not found in backend", telegram_id)
+                if self._user_by_tg_gen.get(telegram_id, 0) == gen:
+                    self._cache_user(telegram_id, None, self._user_missing_ttl)
                 return None
             # остальные ошибки — настоящие, их не глушим
             raise
 
+        # пока шёл запрос, кэш сбросили (регистрация, смена роли) —
+        # ответ мог устареть, не затираем им свежие данные
+        if self._user_by_tg_gen.get(telegram_id, 0) == gen:
+            self._remember_user(telegram_id, user)
+        return user
+
+    def _remember_user(self, telegram_id: int, user: Any) -> None:
+        if isinstance(user, dict):
+            self._cache_user(telegram_id, user, self._user_by_tg_ttl)
+
+    def _cache_user(
+        self,
+        telegram_id: int,
+        user: Optional[Dict[str, Any]],
+        ttl: float,
+    ) -> None:
+        self._user_by_tg_cache.pop(telegram_id, None)
+        if len(self._user_by_tg_cache) >= self._user_by_tg_maxsize:
+            self._user_by_tg_cache.pop(next(iter(self._user_by_tg_cache)))
+        self._user_by_tg_cache[telegram_id] = (time.monotonic() + ttl, user)
+
+    async def upsert_user_by_telegram(self, telegram_id: int, data: Dict[str, Any]) -> Any:
+        """
+        Создать пользователя или обновить анкету (full_name/phone/city)
+        одним запросом. Ответ сразу кладём в кэш.
+        """
+        telegram_id = int(telegram_id)
+        user = await self._request(
+            "PUT",
+            f"/api/v1/users/by-telegram/{telegram_id}",
+            data,
+        )
+        self._remember_user(telegram_id, user)
+        return user
+
     async def update_user(self, user_id: int, data: Dict[str, Any]) -> Any:
-        return await self._request(
+        updated = await self._request(
             "PATCH",
             f"/api/v1/users/{user_id}",
             data,
         )
+        stale = [
+            tg_id
+            for tg_id, (_, user) in self._user_by_tg_cache.items()
+            if user is not None and user.get("id") == user_id
+        ]
+        for tg_id in stale:
+            del self._user_by_tg_cache[tg_id]
+        return updated
 
     async def get_user(self, user_id: int) -> Any:
         return await self._request(
@@ -219,6 +418,22 @@ class APIClient:
             data,
         )
 
+    async def claim_request(self, request_id: int, service_center_id: int) -> Any:
+        """
+        Закрепить заявку за выбранным СТО (статус accepted_by_service).
+        Если заявку уже забрал другой сервис (409) — возвращаем None.
+        """
+        try:
+            return await self._request(
+                "POST",
+                f"/api/v1/requests/{request_id}/claim",
+                {"service_center_id": service_center_id},
+            )
+        except APIError as e:
+            if e.status == 409:
+                return None
+            raise
+
     async def distribute_request(self, request_id: int, service_center_ids: List[int]) -> Any:
         """
         Зафиксировать, каким СТО была отправлена заявка.
@@ -246,21 +461,40 @@ class APIClient:
     # ------------------------------------------------------------------
 
     async def create_service_center(self, data: Dict[str, Any]) -> Any:
-        return await self._request(
+        created = await self._request(
             "POST",
             "/api/v1/service-centers/",
             data,
         )
+        self.forget_service_centers_of(data.get("user_id"))
+        return created
 
     async def update_service_center(self, sc_id: int, data: Dict[str, Any]) -> Any:
         """
         Частично обновить профиль СТО.
         """
-        return await self._request(
+        updated = await self._request(
             "PATCH",
             f"/api/v1/service-centers/{sc_id}",
             data,
         )
+        if isinstance(updated, dict):
+            self.forget_service_centers_of(updated.get("user_id"))
+        else:
+            # владельца не знаем — проще сбросить всё
+            self._sc_by_user_cache.clear()
+
+        self._sc_name_cache.pop(int(sc_id), None)
+
+        # в кэше «моего СТО» лежит старая версия профиля
+        stale = [
+            tg_id
+            for tg_id, (_, sc) in self._my_sc_cache.items()
+            if sc.get("id") == sc_id
+        ]
+        for tg_id in stale:
+            del self._my_sc_cache[tg_id]
+        return updated
 
     async def get_service_center(self, sc_id: int) -> Any:
         return await self._request(
@@ -268,6 +502,24 @@ class APIClient:
             f"/api/v1/service-centers/{sc_id}",
         )
 
+    async def get_service_center_name(self, sc_id: int) -> Optional[str]:
+        """
+        Название СТО по id (кэшируется на _sc_name_ttl секунд).
+        """
+        sc_id = int(sc_id)
+        now = time.monotonic()
+        cached = self._sc_name_cache.get(sc_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        sc = await self.get_service_center(sc_id)
+        name = sc.get("name") if isinstance(sc, dict) else None
+        if name:
+            if len(self._sc_name_cache) >= self._sc_by_user_maxsize:
+                self._sc_name_cache.pop(next(iter(self._sc_name_cache)))
+            self._sc_name_cache[sc_id] = (now + self._sc_name_ttl, name)
+        return name
+
     async def list_service_centers(
         self,
         params: Optional[Dict[str, Any]] = None,
@@ -285,29 +537,50 @@ class APIClient:
     async def get_my_service_center(self, telegram_id: int) -> Any:
         """
         Удобный метод: по telegram_id менеджера получить привязанный сервис.
+        Один запрос к backend-у (by-owner-tg) вместо user → by-user,
+        а повторно — из кэша (см. remember_my_service_center).
         """
-        user = await self.get_user_by_telegram(telegram_id)
-        if not isinstance(user, dict):
-            return None
-
-        user_id = user.get("id")
-        if not user_id:
-            return None
+        cached = self._my_sc_cache.get(int(telegram_id))
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
 
-        sc_list = await self.list_service_centers_by_user(int(user_id))
+        sc_list = await self.list_service_centers_by_owner_tg(telegram_id)
         if isinstance(sc_list, list) and sc_list:
+            self.remember_my_service_center(telegram_id, sc_list[0])
             return sc_list[0]
 
         return None
 
+    async def list_service_centers_by_owner_tg(self, telegram_id: int) -> Any:
+        """
+        Список СТО владельца по его telegram_id.
+        """
+        return await self._request(
+            "GET",
+            f"/api/v1/service-centers/by-owner-tg/{telegram_id}",
+        )
+
     async def list_service_centers_by_user(self, user_id: int) -> Any:
         """
         Список СТО, привязанных к конкретному пользователю (владельцу).
+
+        Ответ кэшируется на _sc_by_user_ttl секунд (см. __init__).
         """
-        return await self._request(
+        user_id = int(user_id)
+        now = time.monotonic()
+        cached = self._sc_by_user_cache.get(user_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        sc_list = await self._request(
             "GET",
             f"/api/v1/service-centers/by-user/{user_id}",
         )
+        if isinstance(sc_list, list):
+            if len(self._sc_by_user_cache) >= self._sc_by_user_maxsize:
+                self._sc_by_user_cache.pop(next(iter(self._sc_by_user_cache)))
+            self._sc_by_user_cache[user_id] = (now + self._sc_by_user_ttl, sc_list)
+        return sc_list
 
     # ------------------------------------------------------------------
     # OFFERS (отклики СТО)
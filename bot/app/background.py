@@ -0,0 +1,47 @@
+"""
+Фоновые задачи бота: «запустить и не ждать».
+
+Ссылки на задачи держим в _TASKS — без них незавершённый Task может
+собрать GC. Ошибки фоновых задач никто не ждёт, поэтому логируем их здесь.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Optional
+
+from aiogram.types import CallbackQuery
+
+logger = logging.getLogger(__name__)
+
+_TASKS: set[asyncio.Future] = set()
+
+
+def _on_done(task: asyncio.Future) -> None:
+    _TASKS.discard(task)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.warning("Фоновая задача завершилась с ошибкой: %s", exc, exc_info=exc)
+
+
+def spawn(aw: Awaitable[Any]) -> asyncio.Future:
+    """
+    Запустить корутину (или aiogram-метод) в фоне.
+    """
+    task = asyncio.ensure_future(aw)
+    _TASKS.add(task)
+    task.add_done_callback(_on_done)
+    return task
+
+
+def ack(
+    callback: CallbackQuery,
+    text: Optional[str] = None,
+    show_alert: bool = False,
+) -> None:
+    """
+    callback.answer() без ожидания: он только гасит «часики» на кнопке,
+    и ждать его round-trip до Telegram перед выходом из хендлера незачем.
+    """
+    spawn(callback.answer(text=text, show_alert=show_alert))
@@ -1,3 +1,4 @@
+import hashlib
 import os
 from dotenv import load_dotenv
 
@@ -9,6 +10,26 @@ class BotConfig:
     BACKEND_URL: str = os.getenv("BACKEND_URL", "http://127.0.0.1:8040")
     WEBAPP_URL: str = os.getenv("WEBAPP_URL", "").strip()
     REDIS_URL: str = os.getenv("REDIS_URL", "").strip()
+    # Время жизни FSM-состояния/данных в Redis (сек): брошенные сценарии
+    # сами удаляются. 0 — без TTL.
+    FSM_TTL: int = int(os.getenv("FSM_TTL", "3600"))
+
+    # Webhook вместо long-polling (если задан WEBHOOK_URL).
+    # В webhook-режиме ответ хендлера уходит прямо в HTTP-ответ Telegram.
+    WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "").strip().rstrip("/")
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/tg/webhook").strip()
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8087"))
+    # Telegram присылает его в X-Telegram-Bot-Api-Secret-Token, чужие POST-ы
+    # на webhook отбрасываются. Не задан — выводим из BOT_TOKEN: значение
+    # одинаковое во всех воркерах и переживает рестарт, в отличие от
+    # случайного (Telegram допускает только A-Z, a-z, 0-9, _ и -).
+    WEBHOOK_SECRET: str = (
+        os.getenv("WEBHOOK_SECRET", "").strip()
+        or hashlib.sha256(f"webhook:{BOT_TOKEN}".encode()).hexdigest()
+    )
+
+    # Размер пула соединений aiohttp к api.telegram.org
+    TG_CONNECTION_LIMIT: int = int(os.getenv("TG_CONNECTION_LIMIT", "256"))
 
 
 config = BotConfig()
@@ -1,3 +1,4 @@
+import asyncio
 import re
 from typing import Any
 
@@ -6,6 +7,7 @@ from aiogram.filters import CommandStart
 from aiogram.filters.command import CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.utils.chat_action import ChatActionSender
 
 from ..api_client import api_client
 from ..states.chat_states import ChatRelay
@@ -15,6 +17,16 @@ router = Router()
 _CHAT_RE = re.compile(r"^chat_r(?P<rid>\d+)_s(?P<scid>\d+)$")
 
 
+async def _telegram_id_of(known_tid: Any, user_id: Any) -> Any:
+    """
+    telegram_id стороны чата: из готового поля, иначе — через пользователя.
+    """
+    if known_tid:
+        return known_tid
+    user: dict[str, Any] = await api_client.get_user(int(user_id))
+    return user.get("telegram_id")
+
+
 def _build_open_chat_kb(bot_username: str, request_id: int, service_center_id: int) -> InlineKeyboardMarkup:
     url = f"https://t.me/{bot_username}?start=chat_r{request_id}_s{service_center_id}"
     return InlineKeyboardMarkup(
@@ -42,53 +54,51 @@ async def start_deeplink(message: Message, state: FSMContext, bot: Bot, command:
     request_id = int(m.group("rid"))
     sc_id = int(m.group("scid"))
 
-    # 1) Загружаем заявку
-    try:
-        req: dict[str, Any] = await api_client.get_request(request_id)
-    except Exception:
-        await message.answer("Не удалось открыть чат: заявка не найдена или сервер недоступен.")
-        return
-
-    user_id = req.get("user_id")
-    if not user_id:
-        await message.answer("Не удалось открыть чат: в заявке нет владельца (user_id).")
-        return
-
-    # 2) Загружаем клиента заявки
-    try:
-        client_user: dict[str, Any] = await api_client.get_user(int(user_id))
-    except Exception:
-        await message.answer("Не удалось открыть чат: не удалось загрузить клиента заявки.")
-        return
-
-    client_tid = client_user.get("telegram_id")
-
-    # 3) Загружаем СТО и владельца СТО
-    try:
-        sc: dict[str, Any] = await api_client.get_service_center(sc_id)
-    except Exception:
-        await message.answer("Не удалось открыть чат: не удалось загрузить СТО.")
-        return
-
-    sc_owner_id = sc.get("user_id")
-    if not sc_owner_id:
-        await message.answer("Не удалось открыть чат: у СТО нет владельца (user_id).")
-        return
-
-    try:
-        sc_owner_user: dict[str, Any] = await api_client.get_user(int(sc_owner_id))
-    except Exception:
-        await message.answer("Не удалось открыть чат: не удалось загрузить владельца СТО.")
-        return
-
-    sc_owner_tid = sc_owner_user.get("telegram_id")
+    # Пока ходим в backend, показываем «печатает…» вместо тишины
+    async with ChatActionSender.typing(bot=bot, chat_id=message.chat.id):
+        # 1) Заявка и СТО друг от друга не зависят — грузим параллельно
+        req, sc = await asyncio.gather(
+            api_client.get_request(request_id),
+            api_client.get_service_center(sc_id),
+            return_exceptions=True,
+        )
+        if isinstance(req, BaseException) or not isinstance(req, dict):
+            await message.answer("Не удалось открыть чат: заявка не найдена или сервер недоступен.")
+            return
+        if isinstance(sc, BaseException) or not isinstance(sc, dict):
+            await message.answer("Не удалось открыть чат: не удалось загрузить СТО.")
+            return
+
+        user_id = req.get("user_id")
+        if not user_id:
+            await message.answer("Не удалось открыть чат: в заявке нет владельца (user_id).")
+            return
+
+        sc_owner_id = sc.get("user_id")
+        if not sc_owner_id:
+            await message.answer("Не удалось открыть чат: у СТО нет владельца (user_id).")
+            return
+
+        # 2) telegram_id обеих сторон backend обычно отдаёт прямо в заявке / СТО;
+        # пользователей запрашиваем (параллельно) только если поля пустые
+        client_tid, sc_owner_tid = await asyncio.gather(
+            _telegram_id_of(req.get("client_telegram_id"), user_id),
+            _telegram_id_of(sc.get("owner_telegram_id"), sc_owner_id),
+            return_exceptions=True,
+        )
+        if isinstance(client_tid, BaseException):
+            await message.answer("Не удалось открыть чат: не удалось загрузить клиента заявки.")
+            return
+        if isinstance(sc_owner_tid, BaseException):
+            await message.answer("Не удалось открыть чат: не удалось загрузить владельца СТО.")
+            return
 
     me_tid = message.from_user.id if message.from_user else None
     if not me_tid:
         await message.answer("Не удалось открыть чат: не определён telegram_id.")
         return
 
-    # 4) Проверка: открывать чат может только клиент заявки или владелец СТО
+    # 3) Проверка: открывать чат может только клиент заявки или владелец СТО
     if me_tid == client_tid:
         my_role = "client"
         peer_tid = sc_owner_tid
@@ -105,17 +115,21 @@ async def start_deeplink(message: Message, state: FSMContext, bot: Bot, command:
         await message.answer("Не удалось открыть чат: у второй стороны нет telegram_id.")
         return
 
-    # 5) Сохраняем контекст чата
+    # 4) Сохраняем контекст чата
+    # контекст чата пишем целиком — без лишнего чтения старых данных
     await state.set_state(ChatRelay.active)
-    await state.update_data(
-        request_id=request_id,
-        service_center_id=sc_id,
-        client_tid=client_tid,
-        sc_owner_tid=sc_owner_tid,
-        my_role=my_role,
+    await state.set_data(
+        {
+            "request_id": request_id,
+            "service_center_id": sc_id,
+            "client_tid": client_tid,
+            "sc_owner_tid": sc_owner_tid,
+            "my_role": my_role,
+        }
     )
 
-    bot_username = (await bot.get_me()).username or ""
+    # bot.me() кэширует getMe — повторный запрос к Telegram не нужен
+    bot_username = (await bot.me()).username or ""
     kb = _build_open_chat_kb(bot_username, request_id, sc_id) if bot_username else None
 
     await message.answer(
@@ -0,0 +1,66 @@
+import logging
+
+from aiogram.fsm.context import FSMContext
+from aiogram.types import ErrorEvent
+
+from .general import get_main_menu
+
+logger = logging.getLogger(__name__)
+
+API_ERROR_TEXT = (
+    "Произошла ошибка при обращении к серверу 😔\n"
+    "Попробуйте ещё раз чуть позже."
+)
+
+
+async def on_api_error(
+    event: ErrorEvent,
+    state: FSMContext | None = None,
+    current_user: dict | None = None,
+):
+    """
+    Общий обработчик ошибок backend-а (регистрируется на Dispatcher в main.py).
+
+    Хендлерам не нужно оборачивать каждый вызов api_client в try/except
+    только ради сообщения «ошибка» — достаточно дать APIError долететь сюда:
+    логируем, сбрасываем сценарий и показываем главное меню.
+    Меню зависит от роли, поэтому показываем его, только если пользователь
+    уже известен (current_user); в backend за ним не ходим — он и так сбоит.
+    """
+    logger.error(
+        "API error while handling update %s: %s",
+        event.update.update_id,
+        event.exception,
+        exc_info=event.exception,
+    )
+
+    if state is not None:
+        try:
+            await state.clear()
+        except Exception:
+            logger.exception("Не удалось сбросить FSM после ошибки API")
+
+    reply_markup = (
+        get_main_menu(current_user.get("role"))
+        if isinstance(current_user, dict)
+        else None
+    )
+
+    update = event.update
+    try:
+        if update.callback_query is not None:
+            await update.callback_query.answer()
+            if update.callback_query.message is not None:
+                await update.callback_query.message.answer(
+                    API_ERROR_TEXT,
+                    reply_markup=reply_markup,
+                )
+        elif update.message is not None:
+            await update.message.answer(
+                API_ERROR_TEXT,
+                reply_markup=reply_markup,
+            )
+    except Exception:
+        logger.exception("Не удалось сообщить пользователю об ошибке API")
+
+    return True
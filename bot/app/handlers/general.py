@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 
 from aiogram import Router, F
 from aiogram.types import (
@@ -13,13 +14,52 @@ from aiogram.filters import CommandStart
 from aiogram.filters.command import CommandObject
 
 from ..api_client import api_client
+from ..safe_edit import edit_or_answer
 
 router = Router()
 
 WEBAPP_URL = os.getenv("WEBAPP_URL", "").strip() or None
 
+# Ответ пользователю, которого нет в backend (общий для всех разделов)
+NOT_REGISTERED_TEXT = (
+    "Похоже, вы ещё не зарегистрированы.\n"
+    "Нажмите /start, чтобы пройти короткую регистрацию."
+)
+
+# «⬅️ В меню» — одна кнопка на клавиатуры всех разделов
+BTN_MAIN_MENU = InlineKeyboardButton(text="⬅️ В меню", callback_data="main:menu")
+
+# Кнопка WebApp для /start (None, если WEBAPP_URL не настроен)
+KB_OPEN_WEBAPP = (
+    InlineKeyboardMarkup(
+        inline_keyboard=(
+            (
+                InlineKeyboardButton(
+                    text="🚀 Открыть WebApp",
+                    web_app=WebAppInfo(url=WEBAPP_URL),
+                ),
+            ),
+        )
+    )
+    if WEBAPP_URL
+    else None
+)
+
+
+# Роли, которым в главном меню показываем «🛠 Меню СТО»
+_STO_MENU_ROLES = frozenset({"service_owner", "admin"})
+
 
 def get_main_menu(role: str | None = None) -> InlineKeyboardMarkup:
+    """
+    Главное меню. Вариантов всего два (обычный пользователь / СТО),
+    поэтому клавиатуры строятся один раз и дальше берутся из кэша.
+    """
+    return _build_main_menu(role in _STO_MENU_ROLES)
+
+
+@lru_cache(maxsize=None)
+def _build_main_menu(is_sto: bool) -> InlineKeyboardMarkup:
     buttons: list[list[InlineKeyboardButton]] = [
         [
             InlineKeyboardButton(text="👤 Профиль", callback_data="main:profile"),
@@ -30,7 +70,7 @@ def get_main_menu(role: str | None = None) -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="🎁 Мои бонусы", callback_data="main:bonus")],
     ]
 
-    if role in ("service_owner", "admin"):
+    if is_sto:
         buttons.append([InlineKeyboardButton(text="🛠 Меню СТО", callback_data="main:sto_menu")])
     else:
         buttons.append([InlineKeyboardButton(text="🔧 Зарегистрировать СТО", callback_data="main:sto_register")])
@@ -65,31 +105,30 @@ async def cmd_start(message: Message, state: FSMContext, command: CommandObject)
         "Привет! 👋\n"
         "MyGarage работает через WebApp (Mini App).\n\n"
         "Нажмите кнопку ниже:",
-        reply_markup=InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="🚀 Открыть WebApp",
-                        web_app=WebAppInfo(url=WEBAPP_URL),
-                    )
-                ]
-            ]
-        ),
+        reply_markup=KB_OPEN_WEBAPP,
     )
 
 
-@router.callback_query(F.data == "main:menu")
-async def back_to_main_menu(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(F.data == "main:menu", flags={"current_user": True})
+async def back_to_main_menu(
+    callback: CallbackQuery,
+    state: FSMContext,
+    current_user: dict | None = None,
+):
     await state.clear()
 
-    user = await api_client.get_user_by_telegram(callback.from_user.id)
+    # current_user подкладывает CurrentUserMiddleware
+    user = current_user or await api_client.get_user_by_telegram(callback.from_user.id)
     role: str | None = None
     if isinstance(user, dict):
         role = user.get("role")
 
-    try:
-        await callback.message.edit_text("Выберите действие из меню ниже 👇", reply_markup=get_main_menu(role))
-    except Exception:
-        await callback.message.answer("Выберите действие из меню ниже 👇", reply_markup=get_main_menu(role))
+    # повторный тап по «В меню» не шлёт ни правку, ни новое сообщение
+    await edit_or_answer(
+        callback.message,
+        "Выберите действие из меню ниже 👇",
+        reply_markup=get_main_menu(role),
+    )
 
-    await callback.answer()
+    # возвращаем метод, а не await: в webhook-режиме он уйдёт в ответе на апдейт
+    return callback.answer()
@@ -2,10 +2,11 @@ from aiogram import Router, F
 from aiogram.types import (
     CallbackQuery,
     InlineKeyboardMarkup,
-    InlineKeyboardButton,
 )
 
 from ..api_client import api_client
+from ..safe_edit import edit_or_answer
+from .general import BTN_MAIN_MENU, NOT_REGISTERED_TEXT
 
 router = Router()
 
@@ -15,19 +16,17 @@ def kb_bonus_menu() -> InlineKeyboardMarkup:
     Одна кнопка «В меню» под разделом бонусов.
     """
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="⬅️ В меню",
-                    callback_data="main:menu",
-                )
-            ]
-        ]
+        inline_keyboard=(
+            (BTN_MAIN_MENU,),
+        )
     )
 
 
-@router.callback_query(F.data == "main:bonus")
-async def bonus_main(callback: CallbackQuery):
+KB_BONUS_MENU = kb_bonus_menu()
+
+
+@router.callback_query(F.data == "main:bonus", flags={"current_user": True})
+async def bonus_main(callback: CallbackQuery, current_user: dict | None = None):
     """
     Раздел «🎁 Мои бонусы»:
 
@@ -37,11 +36,10 @@ async def bonus_main(callback: CallbackQuery):
     """
     tg_id = callback.from_user.id
 
-    user = await api_client.get_user_by_telegram(tg_id)
+    user = current_user or await api_client.get_user_by_telegram(tg_id)
     if not user:
         await callback.message.answer(
-            "Похоже, вы ещё не зарегистрированы.\n"
-            "Нажмите /start, чтобы пройти короткую регистрацию.",
+            NOT_REGISTERED_TEXT,
         )
         await callback.answer()
         return
@@ -103,15 +101,6 @@ async def bonus_main(callback: CallbackQuery):
     text = "\n".join(lines)
 
     # Стараемся редактировать последнее сообщение
-    try:
-        await callback.message.edit_text(
-            text,
-            reply_markup=kb_bonus_menu(),
-        )
-    except Exception:
-        await callback.message.answer(
-            text,
-            reply_markup=kb_bonus_menu(),
-        )
+    await edit_or_answer(callback.message, text, reply_markup=KB_BONUS_MENU)
 
     await callback.answer()
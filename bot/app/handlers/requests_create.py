@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, fields
 from typing import Any, Dict, List, Optional, Tuple
+import asyncio
 import logging
+import random
+import re
+import time
 
 from aiogram import Router, F, Bot
 from aiogram.types import (
@@ -9,15 +14,25 @@ from aiogram.types import (
     CallbackQuery,
     InlineKeyboardMarkup,
     InlineKeyboardButton,
+    InputMediaPhoto,
 )
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.filters import StateFilter
 
 from ..api_client import api_client
-from .general import get_main_menu
+from ..background import spawn
+from ..safe_edit import safe_edit
+from ..text_commands import is_cancel, is_one_of
+from ..throttling import throttled_call, throttled_send
+from .general import NOT_REGISTERED_TEXT, get_main_menu
 
 router = Router()
+logger = logging.getLogger(__name__)
+
+# Сколько СТО обрабатываем одновременно в одной рассылке
+# (темп самих отправок держит throttling)
+_BROADCAST_WORKERS = 20
 
 
 # ---------------------------------------------------------------------------
@@ -109,21 +124,72 @@ CATEGORY_TO_SPECIALIZATIONS: dict[str, list[str]] = {
     "agg": ["agg_turbo", "agg_starter", "agg_generator", "agg_steering"],
 }
 
+# Текстом «пропустить» на шаге фото — то же, что кнопка «Пропустить фото»
+_PHOTO_SKIP_WORDS = frozenset({"пропустить", "пропустить фото", "без фото", "skip", "-"})
+
+# callback_data с числовым payload — разбираем одним скомпилированным regex
+_RADIUS_RE = re.compile(r"^req_radius:(\d+)$")
+_CAR_RE = re.compile(r"^req_car:(\d+|none)$")
+_SC_RE = re.compile(r"^req_sc:(\d+)$")
+
+# Уведомление СТО о новой заявке. От сервиса к сервису меняется только
+# название — всё остальное подставляем один раз на рассылку.
+_NEW_REQUEST_SC_TEMPLATE = (
+    "{title}\n"
+    "\n"
+    "<b>Автосервис:</b> {sc_name}\n"
+    "{car_line}"
+    "<b>Адрес/место:</b> {addr}\n"
+    "\n"
+    "<b>Описание проблемы:</b>\n"
+    "{desc}\n"
+    "\n"
+    "Чтобы отправить клиенту условия (цена, срок, комментарий), "
+    "нажмите кнопку ниже и напишите одно сообщение."
+)
+
+# Тип помощи (req_evacu:<код>) -> (need_tow_truck, need_mobile_master)
+EVACU_TYPE_FLAGS: dict[str, tuple[bool, bool]] = {
+    "tow": (True, False),
+    "mobile": (False, True),
+    "both": (True, True),
+}
+
+# Слот времени (req_time:<код>) -> подпись
+TIME_SLOT_LABELS: dict[str, str] = {
+    "morning": "до 12:00",
+    "day": "12:00–18:00",
+    "evening": "после 18:00",
+}
+
+# callback_data кнопки -> код слота: фильтр хендлера пропускает только их
+_TIME_SLOT_BY_CALLBACK: dict[str, str] = {
+    f"req_time:{code}": code for code in TIME_SLOT_LABELS
+}
+
+# То же для типа помощи и категории: callback_data -> значение
+_EVACU_FLAGS_BY_CALLBACK: dict[str, tuple[bool, bool]] = {
+    f"req_evacu:{code}": flags for code, flags in EVACU_TYPE_FLAGS.items()
+}
+_CATEGORY_BY_CALLBACK: dict[str, tuple[str, str]] = {
+    f"req_cat:{key}": (key, title) for title, key in SERVICE_CATEGORIES
+}
+
 # ---------------------------------------------------------------------------
 # Вспомогательные клавиатуры
 # ---------------------------------------------------------------------------
 
+# Отмена сценария: одна кнопка на все клавиатуры, с тем же callback_data,
+# что ловит req_create_cancel
+CB_REQ_CANCEL = "req_create:cancel"
+_CANCEL_BUTTON = InlineKeyboardButton(text="❌ Отменить", callback_data=CB_REQ_CANCEL)
+
 
 def kb_cancel_only() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data="req_create:cancel",
-                )
-            ]
-        ]
+        inline_keyboard=(
+            (_CANCEL_BUTTON,),
+        )
     )
 
 
@@ -132,26 +198,21 @@ def kb_car_move() -> InlineKeyboardMarkup:
     Первый шаг — состояние авто.
     """
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="🚗 Авто едет само",
                     callback_data="req_move:self",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="🚨 Нужна эвакуация/выездной мастер",
                     callback_data="req_move:help",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data="req_create:cancel",
-                )
-            ],
-        ]
+                ),
+            ),
+            (_CANCEL_BUTTON,),
+        )
     )
 
 
@@ -160,64 +221,54 @@ def kb_location_method() -> InlineKeyboardMarkup:
     Способ указания локации — ТОЛЬКО если авто не едет.
     """
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="📍 Отправить геолокацию",
                     callback_data="req_loc:geo",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="🗺 Ввести адрес текстом",
                     callback_data="req_loc:text",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data="req_create:cancel",
-                )
-            ],
-        ]
+                ),
+            ),
+            (_CANCEL_BUTTON,),
+        )
     )
 
 
 def kb_evacu_type() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="🚚 Эвакуатор",
                     callback_data="req_evacu:tow",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="🛠 Выездной мастер",
                     callback_data="req_evacu:mobile",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="🚚+🛠 Оба варианта",
                     callback_data="req_evacu:both",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data="req_create:cancel",
-                )
-            ],
-        ]
+                ),
+            ),
+            (_CANCEL_BUTTON,),
+        )
     )
 
 
 def kb_radius() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="3 км",
                     callback_data="req_radius:3",
@@ -230,26 +281,21 @@ def kb_radius() -> InlineKeyboardMarkup:
                     text="10 км",
                     callback_data="req_radius:10",
                 ),
-            ],
-            [
+            ),
+            (
                 InlineKeyboardButton(
                     text="Неважно",
                     callback_data="req_radius:any",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="Другое расстояние",
                     callback_data="req_radius:custom",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data="req_create:cancel",
-                )
-            ],
-        ]
+                ),
+            ),
+            (_CANCEL_BUTTON,),
+        )
     )
 
 
@@ -264,179 +310,160 @@ def kb_categories() -> InlineKeyboardMarkup:
                 )
             ]
         )
-    rows.append(
-        [
-            InlineKeyboardButton(
-                text="❌ Отменить",
-                callback_data="req_create:cancel",
-            )
-        ]
-    )
+    rows.append([_CANCEL_BUTTON])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 def kb_confirm_description() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="✅ Верно",
                     callback_data="req_descr:ok",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="✏️ Редактировать",
                     callback_data="req_descr:edit",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data="req_create:cancel",
-                )
-            ],
-        ]
+                ),
+            ),
+            (_CANCEL_BUTTON,),
+        )
     )
 
 
 def kb_photos() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="⏭ Пропустить фото",
                     callback_data="req_photo:skip",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data="req_create:cancel",
-                )
-            ],
-        ]
+                ),
+            ),
+            (_CANCEL_BUTTON,),
+        )
     )
 
 
 def kb_hide_phone() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="Да, показывать номер",
                     callback_data="req_phone:show",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="Нет, скрывать номер",
                     callback_data="req_phone:hide",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data="req_create:cancel",
-                )
-            ],
-        ]
+                ),
+            ),
+            (_CANCEL_BUTTON,),
+        )
     )
 
 
 def kb_work_mode() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="📋 Выбрать СТО из списка",
                     callback_data="req_work:list",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="📡 Отправить всем подходящим",
                     callback_data="req_work:all",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="⬅️ В главное меню",
                     callback_data="main:menu",
-                )
-            ],
-        ]
+                ),
+            ),
+        )
     )
 
 
 def kb_preferred_time() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="До 12:00",
                     callback_data="req_time:morning",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="12:00–18:00",
                     callback_data="req_time:day",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="После 18:00",
                     callback_data="req_time:evening",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data="req_create:cancel",
-                )
-            ],
-        ]
+                ),
+            ),
+            (_CANCEL_BUTTON,),
+        )
     )
 
 
-def build_cars_keyboard(cars: List[Dict[str, Any]]) -> InlineKeyboardMarkup:
-    rows: List[List[InlineKeyboardButton]] = []
+# Статичные клавиатуры не зависят от пользователя — собираем один раз
+# при импорте и переиспользуем один и тот же объект в каждом ответе.
+KB_CANCEL_ONLY = kb_cancel_only()
+KB_CAR_MOVE = kb_car_move()
+KB_LOCATION_METHOD = kb_location_method()
+KB_EVACU_TYPE = kb_evacu_type()
+KB_RADIUS = kb_radius()
+KB_CATEGORIES = kb_categories()
+KB_CONFIRM_DESCRIPTION = kb_confirm_description()
+KB_PHOTOS = kb_photos()
+KB_HIDE_PHONE = kb_hide_phone()
+KB_WORK_MODE = kb_work_mode()
+KB_PREFERRED_TIME = kb_preferred_time()
+
+
+# Хвост клавиатуры выбора машины — одинаковый для всех
+_CARS_TAIL_ROWS: List[List[InlineKeyboardButton]] = [
+    [
+        InlineKeyboardButton(
+            text="🚗 Без привязки к машине",
+            callback_data="req_car:none",
+        )
+    ],
+    [_CANCEL_BUTTON],
+]
 
-    if cars:
-        for car in cars:
-            car_id = car.get("id")
-            brand = car.get("brand") or ""
-            model = car.get("model") or ""
-            title = f"{brand} {model}".strip() or "Без названия"
-
-            rows.append(
-                [
-                    InlineKeyboardButton(
-                        text=title,
-                        callback_data=f"req_car:{car_id}",
-                    )
-                ]
-            )
 
-    rows.append(
-        [
-            InlineKeyboardButton(
-                text="🚗 Без привязки к машине",
-                callback_data="req_car:none",
-            )
-        ]
-    )
+def _car_title(car: Dict[str, Any]) -> str:
+    return f"{car.get('brand') or ''} {car.get('model') or ''}".strip() or "Без названия"
+
 
-    rows.append(
+def build_cars_keyboard(cars: List[Dict[str, Any]]) -> InlineKeyboardMarkup:
+    """
+    cars — ответ backend-а (CarRead): id у машины есть всегда.
+    """
+    rows: List[List[InlineKeyboardButton]] = [
         [
             InlineKeyboardButton(
-                text="❌ Отменить",
-                callback_data="req_create:cancel",
+                text=_car_title(car),
+                callback_data=f"req_car:{car['id']}",
             )
         ]
-    )
-
+        for car in cars
+    ]
+    rows.extend(_CARS_TAIL_ROWS)
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
@@ -457,6 +484,18 @@ async def _back_to_main_menu(message: Message, telegram_id: int) -> None:
     )
 
 
+async def _edit_and_back_to_menu(message: Message, text: str, telegram_id: int) -> None:
+    """
+    Итог сценария в старом сообщении + главное меню новым.
+    Правка старого и отправка нового сообщения друг от друга не зависят
+    (меню в любом случае окажется ниже) — шлём параллельно.
+    """
+    await asyncio.gather(
+        safe_edit(message, text),
+        _back_to_main_menu(message, telegram_id=telegram_id),
+    )
+
+
 async def _get_or_create_user(message_or_cb) -> Optional[Dict[str, Any]]:
     """
     Универсальный хелпер: получить пользователя по telegram_id.
@@ -472,13 +511,43 @@ async def _get_or_create_user(message_or_cb) -> Optional[Dict[str, Any]]:
     user = await api_client.get_user_by_telegram(tg_id)
     if not user:
         await message.answer(
-            "Похоже, вы ещё не зарегистрированы.\n"
-            "Нажмите /start, чтобы пройти короткую регистрацию.",
+            NOT_REGISTERED_TEXT,
         )
         return None
     return user
 
 
+@dataclass(slots=True)
+class RequestDraft:
+    """
+    Черновик заявки из FSM. Имена полей = ключи, которые пишут шаги сценария
+    (state.update_data), поэтому опечатка в ключе сразу видна здесь.
+    """
+
+    car_id: Optional[int] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    address_text: Optional[str] = None
+    is_car_movable: bool = True
+    need_tow_truck: bool = False
+    need_mobile_master: bool = False
+    radius_km: Optional[int] = None
+    service_category: Optional[str] = None
+    description: Optional[str] = None
+    photos: Optional[List[str]] = None
+    hide_phone: bool = False
+    preferred_day: Optional[str] = None
+    preferred_time_slot: Optional[str] = None
+
+    @classmethod
+    def from_state(cls, data: Dict[str, Any]) -> "RequestDraft":
+        return cls(**{name: data[name] for name in _DRAFT_FIELDS if name in data})
+
+
+# Имена полей черновика — считаем один раз, а не fields() на каждую заявку
+_DRAFT_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(RequestDraft))
+
+
 async def _create_request_from_state(
     state: FSMContext,
     telegram_id: int,
@@ -498,33 +567,17 @@ async def _create_request_from_state(
 
     user_id = user["id"]
 
-    data = await state.get_data()
-
-    car_id = data.get("car_id")
-    latitude = data.get("location_lat")
-    longitude = data.get("location_lon")
-    address_text = data.get("address_text")
-    is_car_movable = data.get("is_car_movable", True)
-    need_tow_truck = data.get("need_tow_truck", False)
-    need_mobile_master = data.get("need_mobile_master", False)
-    radius_km = data.get("search_radius_km")
-    service_category = data.get("service_category")
-    hide_phone = data.get("hide_phone", False)
+    draft = RequestDraft.from_state(await state.get_data())
 
     # базовое описание
-    description = (data.get("description") or "").strip()
+    description = (draft.description or "").strip()
 
     # дополнительные поля: день/время — дописываем в текст
-    preferred_day = (data.get("preferred_day") or "").strip() or None
-    preferred_time_slot = data.get("preferred_time_slot")
+    preferred_day = (draft.preferred_day or "").strip() or None
+    preferred_time_slot = draft.preferred_time_slot
 
-    time_mapping = {
-        "morning": "до 12:00",
-        "day": "12:00–18:00",
-        "evening": "после 18:00",
-    }
     preferred_time_text = (
-        time_mapping.get(preferred_time_slot, preferred_time_slot)
+        TIME_SLOT_LABELS.get(preferred_time_slot, preferred_time_slot)
         if preferred_time_slot
         else None
     )
@@ -541,28 +594,23 @@ async def _create_request_from_state(
         else:
             description = "\n".join(extra_lines)
 
-    # фото (сохраняем один file_id как строку либо null)
-    photo_file_id = data.get("photo_file_id")
-    photos = None
-    if photo_file_id:
-        photos = [photo_file_id]
-
     payload = {
         "user_id": user_id,
-        "car_id": car_id,
-        "latitude": latitude,
-        "longitude": longitude,
-        "address_text": address_text,
-        "is_car_movable": is_car_movable,
-        "need_tow_truck": need_tow_truck,
-        "need_mobile_master": need_mobile_master,
-        "radius_km": radius_km,
-        "service_category": service_category,
+        "car_id": draft.car_id,
+        "latitude": draft.latitude,
+        "longitude": draft.longitude,
+        "address_text": draft.address_text,
+        "is_car_movable": draft.is_car_movable,
+        "need_tow_truck": draft.need_tow_truck,
+        "need_mobile_master": draft.need_mobile_master,
+        "radius_km": draft.radius_km,
+        "service_category": draft.service_category,
         "description": description,
-        "photos": photos,
-        "hide_phone": hide_phone,
-        "preferred_day": data.get("preferred_day"),
-        "preferred_time_range": data.get("preferred_time_range"),
+        # фото: список file_id (сейчас максимум один) либо null
+        "photos": draft.photos or None,
+        "hide_phone": draft.hide_phone,
+        "preferred_day": draft.preferred_day,
+        "preferred_time_range": None,
     }
 
     try:
@@ -595,14 +643,34 @@ async def new_request_start(callback: CallbackQuery, state: FSMContext):
 
     await state.set_state(RequestCreateFSM.choosing_car_move)
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "📝 <b>Новая заявка</b>\n\n"
         "Для начала уточним, в каком состоянии автомобиль:",
-        reply_markup=kb_car_move(),
+        reply_markup=KB_CAR_MOVE,
     )
     await callback.answer()
 
 
+# ВАЖНО: регистрируется раньше текстовых шагов, чтобы «отмена» не попала
+# в адрес/описание/день как обычный ввод.
+@router.message(
+    StateFilter(
+        RequestCreateFSM.waiting_location_geo,
+        RequestCreateFSM.waiting_location_text,
+        RequestCreateFSM.entering_custom_radius,
+        RequestCreateFSM.waiting_description,
+        RequestCreateFSM.waiting_preferred_day,
+        RequestCreateFSM.waiting_photos,
+    ),
+    F.text.func(is_cancel),
+)
+async def req_create_cancel_text(message: Message, state: FSMContext):
+    await state.clear()
+    await message.answer("Создание заявки отменено.")
+    await _back_to_main_menu(message, telegram_id=message.from_user.id)
+
+
 # ---------------------------------------------------------------------------
 # Шаг 1 — состояние автомобиля
 # ---------------------------------------------------------------------------
@@ -624,10 +692,11 @@ async def req_move_self(callback: CallbackQuery, state: FSMContext):
     )
     await state.set_state(RequestCreateFSM.choosing_radius)
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "Автомобиль <b>может передвигаться самостоятельно</b>.\n\n"
         "Выберите радиус, в котором вам удобно рассматривать сервисы:",
-        reply_markup=kb_radius(),
+        reply_markup=KB_RADIUS,
     )
     await callback.answer()
 
@@ -646,12 +715,13 @@ async def req_move_help(callback: CallbackQuery, state: FSMContext):
     )
     await state.set_state(RequestCreateFSM.choosing_location_method)
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "Понял, автомобиль не может ехать сам.\n\n"
         "Уточните, где он сейчас находится:\n"
         "• отправьте геолокацию точки; или\n"
         "• введите адрес/координаты текстом.",
-        reply_markup=kb_location_method(),
+        reply_markup=KB_LOCATION_METHOD,
     )
     await callback.answer()
 
@@ -667,11 +737,12 @@ async def req_move_help(callback: CallbackQuery, state: FSMContext):
 )
 async def req_location_geo_selected(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RequestCreateFSM.waiting_location_geo)
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "Отправьте, пожалуйста, геолокацию точки, где стоит автомобиль.\n\n"
         "Используйте кнопку «📎» → «Геопозиция».\n\n"
         "Если передумали — нажмите «Отменить».",
-        reply_markup=kb_cancel_only(),
+        reply_markup=KB_CANCEL_ONLY,
     )
     await callback.answer()
 
@@ -682,13 +753,14 @@ async def req_location_geo_selected(callback: CallbackQuery, state: FSMContext):
 )
 async def req_location_text_selected(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RequestCreateFSM.waiting_location_text)
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "Введите адрес или координаты текстом.\n\n"
         "Например:\n"
         "«Москва, Ленинградский проспект, 10»\n"
         "или «СПб, КАД, 25 км, внутренняя сторона».\n\n"
         "Это поможет подобрать ближайших исполнителей.",
-        reply_markup=kb_cancel_only(),
+        reply_markup=KB_CANCEL_ONLY,
     )
     await callback.answer()
 
@@ -709,7 +781,7 @@ async def req_location_geo_received(message: Message, state: FSMContext):
         "📍 Локация получена.\n\n"
         "Теперь уточните, что нужно:\n"
         "эвакуатор, выездной мастер или оба варианта?",
-        reply_markup=kb_evacu_type(),
+        reply_markup=KB_EVACU_TYPE,
     )
 
 
@@ -720,7 +792,7 @@ async def req_location_geo_invalid(message: Message):
     await message.answer(
         "Пожалуйста, отправьте именно геолокацию через кнопку «📎».\n"
         "Если передумали — нажмите «Отменить» внизу.",
-        reply_markup=kb_cancel_only(),
+        reply_markup=KB_CANCEL_ONLY,
     )
 
 
@@ -745,7 +817,7 @@ async def req_location_text_received(message: Message, state: FSMContext):
         f"📍 Вы указали адрес/координаты:\n<b>{address}</b>\n\n"
         "Теперь уточните, что нужно:\n"
         "эвакуатор, выездной мастер или оба варианта?",
-        reply_markup=kb_evacu_type(),
+        reply_markup=KB_EVACU_TYPE,
     )
 
 
@@ -756,13 +828,10 @@ async def req_location_text_received(message: Message, state: FSMContext):
 
 @router.callback_query(
     StateFilter(RequestCreateFSM.choosing_evacu_type),
-    F.data.startswith("req_evacu:"),
+    F.data.in_(_EVACU_FLAGS_BY_CALLBACK),
 )
 async def req_evacu_type_selected(callback: CallbackQuery, state: FSMContext):
-    data = callback.data.split(":", maxsplit=1)[1]
-
-    need_tow = data in ("tow", "both")
-    need_mobile = data in ("mobile", "both")
+    need_tow, need_mobile = _EVACU_FLAGS_BY_CALLBACK[callback.data]
 
     await state.update_data(
         need_tow_truck=need_tow,
@@ -770,10 +839,11 @@ async def req_evacu_type_selected(callback: CallbackQuery, state: FSMContext):
     )
 
     await state.set_state(RequestCreateFSM.choosing_radius)
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "Принято.\n\n"
         "Теперь выберите радиус поиска подходящих сервисов:",
-        reply_markup=kb_radius(),
+        reply_markup=KB_RADIUS,
     )
     await callback.answer()
 
@@ -785,46 +855,63 @@ async def req_evacu_type_selected(callback: CallbackQuery, state: FSMContext):
 
 @router.callback_query(
     StateFilter(RequestCreateFSM.choosing_radius),
-    F.data.startswith("req_radius:"),
+    F.data == "req_radius:any",
 )
-async def req_radius_selected(callback: CallbackQuery, state: FSMContext):
-    value = callback.data.split(":", maxsplit=1)[1]
-
-    # «Неважно» — ищем по всей зоне, радиус не ограничиваем явно
-    if value == "any":
-        await state.update_data(radius_km=None)
-
-        await state.set_state(RequestCreateFSM.choosing_category)
-        await callback.message.edit_text(
-            "Радиус: <b>неважно</b> — будем искать подходящие СТО без ограничения по расстоянию.\n\n"
-            "Теперь выберите категорию услуги:",
-            reply_markup=kb_categories(),
-        )
-        await callback.answer()
-        return
+async def req_radius_any_selected(callback: CallbackQuery, state: FSMContext):
+    """
+    «Неважно» — ищем по всей зоне, радиус не ограничиваем явно.
+    """
+    await state.update_data(radius_km=None)
 
-    if value == "custom":
-        await state.set_state(RequestCreateFSM.entering_custom_radius)
-        await callback.message.edit_text(
-            "Введите радиус в километрах числом, например:\n<b>15</b>",
-            reply_markup=kb_cancel_only(),
-        )
-        await callback.answer()
-        return
+    await state.set_state(RequestCreateFSM.choosing_category)
+    await safe_edit(
+        callback.message,
+        "Радиус: <b>неважно</b> — будем искать подходящие СТО без ограничения по расстоянию.\n\n"
+        "Теперь выберите категорию услуги:",
+        reply_markup=KB_CATEGORIES,
+    )
+    await callback.answer()
 
-    try:
-        radius = int(value)
-    except ValueError:
-        await callback.answer("Некорректный радиус.")
-        return
+
+@router.callback_query(
+    StateFilter(RequestCreateFSM.choosing_radius),
+    F.data == "req_radius:custom",
+)
+async def req_radius_custom_selected(callback: CallbackQuery, state: FSMContext):
+    """
+    «Другое расстояние» — просим ввести радиус числом.
+    """
+    await state.set_state(RequestCreateFSM.entering_custom_radius)
+    await safe_edit(
+        callback.message,
+        "Введите радиус в километрах числом, например:\n<b>15</b>",
+        reply_markup=KB_CANCEL_ONLY,
+    )
+    await callback.answer()
+
+
+@router.callback_query(
+    StateFilter(RequestCreateFSM.choosing_radius),
+    F.data.regexp(_RADIUS_RE).as_("radius_match"),
+)
+async def req_radius_selected(
+    callback: CallbackQuery,
+    state: FSMContext,
+    radius_match: re.Match[str],
+):
+    """
+    Фиксированный радиус из кнопок (3 / 5 / 10 км).
+    """
+    radius = int(radius_match.group(1))
 
     await state.update_data(radius_km=radius)
 
     await state.set_state(RequestCreateFSM.choosing_category)
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         f"Радиус: <b>{radius} км</b>.\n\n"
         "Теперь выберите категорию услуги:",
-        reply_markup=kb_categories(),
+        reply_markup=KB_CATEGORIES,
     )
     await callback.answer()
 
@@ -856,7 +943,7 @@ async def req_radius_custom_entered(message: Message, state: FSMContext):
     await message.answer(
         f"Радиус: <b>{radius} км</b>.\n\n"
         "Теперь выберите категорию услуги:",
-        reply_markup=kb_categories(),
+        reply_markup=KB_CATEGORIES,
     )
 
 
@@ -867,30 +954,23 @@ async def req_radius_custom_entered(message: Message, state: FSMContext):
 
 @router.callback_query(
     StateFilter(RequestCreateFSM.choosing_category),
-    F.data.startswith("req_cat:"),
+    F.data.in_(_CATEGORY_BY_CALLBACK),
 )
 async def req_category_selected(callback: CallbackQuery, state: FSMContext):
-    key = callback.data.split(":", maxsplit=1)[1]
-
-    title = next(
-        (t for t, k in SERVICE_CATEGORIES if k == key),
-        None,
-    )
-    if not title:
-        await callback.answer("Не удалось распознать категорию.")
-        return
+    key, title = _CATEGORY_BY_CALLBACK[callback.data]
 
     await state.update_data(service_category=key)
 
     await state.set_state(RequestCreateFSM.waiting_description)
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         f"Категория: <b>{title}</b>.\n\n"
         "Теперь опишите проблему текстом.\n\n"
         "Примеры:\n"
         "• «Стучит спереди справа, на кочках усиливается»\n"
         "• «Не заводится, стартер крутит»\n"
         "• «Нужно поменять масло и фильтры»",
-        reply_markup=kb_cancel_only(),
+        reply_markup=KB_CANCEL_ONLY,
     )
     await callback.answer()
 
@@ -919,7 +999,7 @@ async def req_description_received(message: Message, state: FSMContext):
         "Проверьте описание проблемы:\n\n"
         f"<i>{text}</i>\n\n"
         "Всё верно?",
-        reply_markup=kb_confirm_description(),
+        reply_markup=KB_CONFIRM_DESCRIPTION,
     )
 
 
@@ -929,9 +1009,10 @@ async def req_description_received(message: Message, state: FSMContext):
 )
 async def req_description_edit(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RequestCreateFSM.waiting_description)
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "Хорошо, опишите проблему ещё раз текстом:",
-        reply_markup=kb_cancel_only(),
+        reply_markup=KB_CANCEL_ONLY,
     )
     await callback.answer()
 
@@ -942,7 +1023,8 @@ async def req_description_edit(callback: CallbackQuery, state: FSMContext):
 )
 async def req_description_ok(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RequestCreateFSM.waiting_preferred_day)
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "Отлично 👍\n\n"
         "Теперь подскажите, <b>в какой день</b> вам удобно приехать в сервис "
         "или принять выездного мастера?\n\n"
@@ -952,7 +1034,7 @@ async def req_description_ok(callback: CallbackQuery, state: FSMContext):
         "• в понедельник\n"
         "• 10 декабря\n\n"
         "Напишите ответ <b>текстом</b>.",
-        reply_markup=kb_cancel_only(),
+        reply_markup=KB_CANCEL_ONLY,
     )
     await callback.answer()
 
@@ -974,32 +1056,24 @@ async def req_preferred_day_received(message: Message, state: FSMContext):
     await message.answer(
         "Ок, записал день.\n\n"
         "А теперь выберите, <b>в какое время</b> вам удобнее:",
-        reply_markup=kb_preferred_time(),
+        reply_markup=KB_PREFERRED_TIME,
     )
 
 @router.callback_query(
     StateFilter(RequestCreateFSM.waiting_preferred_time),
-    F.data.startswith("req_time:"),
+    F.data.in_(_TIME_SLOT_BY_CALLBACK),
 )
 async def req_preferred_time_selected(callback: CallbackQuery, state: FSMContext):
-    value = callback.data.split(":", maxsplit=1)[1]
+    value = _TIME_SLOT_BY_CALLBACK[callback.data]
+    time_text = TIME_SLOT_LABELS[value]
 
-    time_mapping = {
-        "morning": "до 12:00",
-        "day": "12:00–18:00",
-        "evening": "после 18:00",
-    }
-    time_text = time_mapping.get(value)
-    if not time_text:
-        await callback.answer("Не удалось распознать вариант времени.")
-        return
-
-    await state.update_data(preferred_time_slot=value)
-    data = await state.get_data()
+    # update_data возвращает обновлённые данные — отдельный get_data не нужен
+    data = await state.update_data(preferred_time_slot=value)
     day_text = data.get("preferred_day") or "—"
 
     await state.set_state(RequestCreateFSM.waiting_photos)
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         f"Записал ваши пожелания по времени:\n\n"
         f"День: <b>{day_text}</b>\n"
         f"Время: <b>{time_text}</b>\n\n"
@@ -1007,7 +1081,7 @@ async def req_preferred_time_selected(callback: CallbackQuery, state: FSMContext
         "(например, повреждение или ошибка на приборке).\n\n"
         "Просто отправьте фото сообщением.\n"
         "Или нажмите «Пропустить фото».",
-        reply_markup=kb_photos(),
+        reply_markup=KB_PHOTOS,
     )
     await callback.answer()
 
@@ -1021,14 +1095,22 @@ async def req_preferred_time_selected(callback: CallbackQuery, state: FSMContext
     F.photo,
 )
 async def req_photo_received(message: Message, state: FSMContext):
-    photo = message.photo[-1]
-    await state.update_data(photos=[photo.file_id])
+    # В FSM храним ТОЛЬКО file_id (строка в десятки байт), а не сами байты:
+    # файл остаётся на серверах Telegram, СТО получают его через send_photo(file_id).
+    # Берём самый большой размер — именно его потом показываем сервисам.
+    photo_sizes = message.photo
+    file_id = photo_sizes[-1].file_id if photo_sizes else None
+    if not isinstance(file_id, str) or len(file_id) > 200:
+        await message.answer("Не удалось сохранить фото. Попробуйте отправить его ещё раз.")
+        return
+
+    await state.update_data(photos=[file_id])
 
     await state.set_state(RequestCreateFSM.confirming_hide_phone)
     await message.answer(
         "Фото сохранено 📷.\n\n"
         "Теперь решим вопрос с номером телефона:",
-        reply_markup=kb_hide_phone(),
+        reply_markup=KB_HIDE_PHONE,
     )
 
 
@@ -1039,14 +1121,37 @@ async def req_photo_received(message: Message, state: FSMContext):
 async def req_photo_skip(callback: CallbackQuery, state: FSMContext):
     await state.update_data(photos=None)
     await state.set_state(RequestCreateFSM.confirming_hide_phone)
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "Ок, без фото.\n\n"
         "Теперь решим вопрос с номером телефона:",
-        reply_markup=kb_hide_phone(),
+        reply_markup=KB_HIDE_PHONE,
     )
     await callback.answer()
 
 
+@router.message(RequestCreateFSM.waiting_photos)
+async def req_photo_other(message: Message, state: FSMContext):
+    """
+    Вместо фото пришло что-то другое: «пропустить» — пропускаем шаг,
+    остальное — подсказываем, что ждём фото.
+    """
+    if is_one_of(message.text, _PHOTO_SKIP_WORDS):
+        await state.update_data(photos=None)
+        await state.set_state(RequestCreateFSM.confirming_hide_phone)
+        await message.answer(
+            "Ок, без фото.\n\n"
+            "Теперь решим вопрос с номером телефона:",
+            reply_markup=KB_HIDE_PHONE,
+        )
+        return
+
+    await message.answer(
+        "Отправьте фото сообщением или нажмите «Пропустить фото».",
+        reply_markup=KB_PHOTOS,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Шаг 8 — скрытие телефона
 # ---------------------------------------------------------------------------
@@ -1084,13 +1189,15 @@ async def req_hide_phone_selected(callback: CallbackQuery, state: FSMContext):
     await state.set_state(RequestCreateFSM.choosing_car)
 
     if not cars:
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "У вас пока нет добавленных машин.\n\n"
             "Можете продолжить без привязки к авто — выберите пункт ниже:",
             reply_markup=build_cars_keyboard([]),
         )
     else:
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "Теперь выберите, к какой машине относится заявка "
             "или продолжите без привязки:",
             reply_markup=build_cars_keyboard(cars),
@@ -1105,27 +1212,25 @@ async def req_hide_phone_selected(callback: CallbackQuery, state: FSMContext):
 
 @router.callback_query(
     StateFilter(RequestCreateFSM.choosing_car),
-    F.data.startswith("req_car:"),
+    F.data.regexp(_CAR_RE).as_("car_match"),
 )
-async def req_car_selected(callback: CallbackQuery, state: FSMContext):
-    suffix = callback.data.split(":", maxsplit=1)[1]
-    if suffix == "none":
-        car_id = None
-    else:
-        try:
-            car_id = int(suffix)
-        except ValueError:
-            await callback.answer("Некорректный выбор машины.")
-            return
+async def req_car_selected(
+    callback: CallbackQuery,
+    state: FSMContext,
+    car_match: re.Match[str],
+):
+    suffix = car_match.group(1)
+    car_id = None if suffix == "none" else int(suffix)
 
     await state.update_data(car_id=car_id)
 
     # На этом этапе у нас есть все данные для создания заявки
     request = await _create_request_from_state(state, callback.from_user.id)
     if not request:
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "Не удалось сохранить заявку. Попробуйте позже.",
-            reply_markup=kb_cancel_only(),
+            reply_markup=KB_CANCEL_ONLY,
         )
         await state.clear()
         await callback.answer()
@@ -1136,10 +1241,11 @@ async def req_car_selected(callback: CallbackQuery, state: FSMContext):
     await state.update_data(created_request_id=request_id)
     await state.set_state(RequestCreateFSM.choosing_work_mode)
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         f"✅ Заявка <b>№{request_id}</b> создана.\n\n"
         "Как вы хотите работать с СТО по этой заявке?",
-        reply_markup=kb_work_mode(),
+        reply_markup=KB_WORK_MODE,
     )
     await callback.answer()
 
@@ -1149,6 +1255,37 @@ async def req_car_selected(callback: CallbackQuery, state: FSMContext):
 # ---------------------------------------------------------------------------
 
 
+# Короткий кэш подбора СТО: при всплеске заявок с одинаковыми фильтрами
+# не ходим в backend за тем же списком. Ключ — params как есть (гео-выдача
+# зависит от точной точки). Список храним кортежем и отдаём копию, чтобы
+# вызывающий код не испортил кэш.
+_SC_CACHE_TTL = 45.0
+_SC_CACHE_MAXSIZE = 1024
+_sc_cache: Dict[Tuple[Tuple[str, Any], ...], Tuple[float, Tuple[Dict[str, Any], ...]]] = {}
+
+
+async def _list_service_centers_cached(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    key = tuple(sorted(params.items()))
+    now = time.monotonic()
+
+    cached = _sc_cache.get(key)
+    if cached is not None and cached[0] > now:
+        return list(cached[1])
+
+    sc_list = await api_client.list_service_centers(params=params) or []
+
+    # пустой ответ не кэшируем: новый или только что одобренный СТО
+    # должен попасть в следующую же рассылку
+    if not sc_list:
+        return sc_list
+
+    if len(_sc_cache) >= _SC_CACHE_MAXSIZE:
+        _sc_cache.pop(next(iter(_sc_cache)))
+    # небольшой разброс TTL, чтобы записи не истекали все разом
+    _sc_cache[key] = (now + _SC_CACHE_TTL + random.uniform(0, 5), tuple(sc_list))
+    return list(sc_list)
+
+
 async def _find_suitable_service_centers_for_request(
     request: Dict[str, Any],
     use_geo: bool = True,
@@ -1208,15 +1345,15 @@ async def _find_suitable_service_centers_for_request(
         params["radius_km"] = radius_km
 
     try:
-        sc_list = await api_client.list_service_centers(params=params)
-        logging.info(
+        sc_list = await _list_service_centers_cached(params)
+        logger.info(
             "Found %s service centers for request %s (use_geo=%s)",
             len(sc_list),
             request.get("id"),
             use_geo,
         )
     except Exception as e:
-        logging.exception(
+        logger.exception(
             "Error while fetching service centers for request %s: %s",
             request.get("id"),
             e,
@@ -1226,6 +1363,37 @@ async def _find_suitable_service_centers_for_request(
     return sc_list or []
 
 
+async def _match_service_centers(
+    request: Dict[str, Any],
+    use_geo: bool = True,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Подбор СТО для заявки с фолбэком:
+    если никого не нашли, а в заявке есть гео — ищем ещё раз без гео.
+
+    Возвращает (список СТО, был ли использован фолбэк без гео).
+    """
+    service_centers = await _find_suitable_service_centers_for_request(
+        request,
+        use_geo=use_geo,
+    )
+    if service_centers:
+        return service_centers, False
+
+    if request.get("latitude") is None or request.get("longitude") is None:
+        return [], False
+
+    request_no_geo = dict(request)
+    request_no_geo.pop("latitude", None)
+    request_no_geo.pop("longitude", None)
+    request_no_geo.pop("radius_km", None)
+
+    service_centers = await _find_suitable_service_centers_for_request(
+        request_no_geo
+    )
+    return service_centers, bool(service_centers)
+
+
 @router.callback_query(
     StateFilter(RequestCreateFSM.choosing_work_mode),
     F.data.in_(("req_work:list", "req_work:all")),
@@ -1247,10 +1415,11 @@ async def req_work_mode_selected(callback: CallbackQuery, state: FSMContext):
 
     if not request_id:
         await state.clear()
-        await callback.message.edit_text(
-            "Не удалось найти созданную заявку. Попробуйте создать её заново."
+        await _edit_and_back_to_menu(
+            callback.message,
+            "Не удалось найти созданную заявку. Попробуйте создать её заново.",
+            telegram_id=callback.from_user.id,
         )
-        await _back_to_main_menu(callback.message, telegram_id=callback.from_user.id)
         await callback.answer()
         return
 
@@ -1262,53 +1431,37 @@ async def req_work_mode_selected(callback: CallbackQuery, state: FSMContext):
 
     if not request:
         await state.clear()
-        await callback.message.edit_text(
-            "Не удалось загрузить данные заявки. Попробуйте позже."
+        await _edit_and_back_to_menu(
+            callback.message,
+            "Не удалось загрузить данные заявки. Попробуйте позже.",
+            telegram_id=callback.from_user.id,
         )
-        await _back_to_main_menu(callback.message, telegram_id=callback.from_user.id)
         await callback.answer()
         return
 
     mode = "list" if callback.data.endswith("list") else "all"
 
     # --- 1) Подбираем СТО: сначала в радиусе, потом фолбэк без гео ---
-    used_fallback = False
-
     # Для режима "список" используем гео,
     # для режима "отправить всем" игнорируем координаты (шлём всем по профилю)
     use_geo = callback.data == "req_work:list"
 
-    service_centers = await _find_suitable_service_centers_for_request(
+    service_centers, used_fallback = await _match_service_centers(
         request,
         use_geo=use_geo,
     )
-
-    # если никого не нашли, а в заявке есть гео — пробуем ещё раз без гео
-    latitude = request.get("latitude")
-    longitude = request.get("longitude")
     radius_km = request.get("radius_km")
 
-    if not service_centers and latitude is not None and longitude is not None:
-        request_no_geo = dict(request)
-        request_no_geo.pop("latitude", None)
-        request_no_geo.pop("longitude", None)
-        request_no_geo.pop("radius_km", None)
-
-        service_centers = await _find_suitable_service_centers_for_request(
-            request_no_geo
-        )
-        if service_centers:
-            used_fallback = True
-
     # если и после фолбэка пусто — честно говорим, что никого нет
     if not service_centers:
         await state.clear()
-        await callback.message.edit_text(
+        await _edit_and_back_to_menu(
+            callback.message,
             f"✅ Заявка <b>№{request_id}</b> создана.\n\n"
             "Но подходящих автосервисов по вашему профилю пока не нашлось.\n"
-            "Попробуйте другой район или позже загляните в раздел «📄 Мои заявки»."
+            "Попробуйте другой район или позже загляните в раздел «📄 Мои заявки».",
+            telegram_id=callback.from_user.id,
         )
-        await _back_to_main_menu(callback.message, telegram_id=callback.from_user.id)
         await callback.answer()
         return
 
@@ -1344,7 +1497,8 @@ async def req_work_mode_selected(callback: CallbackQuery, state: FSMContext):
 
         # остаёмся в состоянии choosing_work_mode,
         # т.к. обработчик выбора СТО ждёт его же (req_service_center_selected)
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             text,
             reply_markup=_build_service_centers_keyboard(service_centers),
         )
@@ -1352,118 +1506,63 @@ async def req_work_mode_selected(callback: CallbackQuery, state: FSMContext):
         return
 
     # --- 3) Ветка «📡 Отправить всем подходящим» ---
-    sent_count = 0
-    try:
-        sent_count = await _notify_services_about_request(
-            bot=callback.message.bot,
-            request=request,
-            service_centers=service_centers,
-        )
-    except Exception:
-        # не валим сценарий, просто считаем, что никому не отправили
-        sent_count = 0
-
+    # Сначала отвечаем пользователю, рассылку по СТО делаем в фоне —
+    # клиенту не нужно ждать, пока бот напишет каждому сервису.
     if used_fallback and radius_km:
         radius_info = (
             f"В радиусе <b>{radius_km} км</b> подходящих автосервисов не нашли.\n"
-            "Заявка отправлена в сервисы подходящего профиля без ограничения по расстоянию.\n\n"
+            "Заявка отправляется в сервисы подходящего профиля без ограничения по расстоянию.\n\n"
         )
     else:
         radius_info = ""
 
-    if sent_count > 0:
-        text = (
-            f"✅ Заявка <b>№{request_id}</b> создана и отправлена "
-            f"в <b>{sent_count}</b> подходящих автосервисов.\n\n"
-            f"{radius_info}"
-            "Как только сервисы ответят, их предложения появятся в разделе «📄 Мои заявки»."
-        )
-    else:
-        text = (
-            f"✅ Заявка <b>№{request_id}</b> создана.\n\n"
-            f"{radius_info}"
-            "Однако не удалось отправить уведомления автосервисам.\n"
-            "Попробуйте позже или свяжитесь с поддержкой."
-        )
+    text = (
+        f"✅ Заявка <b>№{request_id}</b> создана и отправляется "
+        f"в <b>{len(service_centers)}</b> подходящих автосервисов.\n\n"
+        f"{radius_info}"
+        "Как только сервисы ответят, их предложения появятся в разделе «📄 Мои заявки»."
+    )
 
     await state.clear()
-    await callback.message.edit_text(text)
-    await _back_to_main_menu(callback.message, telegram_id=callback.from_user.id)
+    await _edit_and_back_to_menu(callback.message, text, telegram_id=callback.from_user.id)
     await callback.answer()
 
-    # ───────────────────────────────────────────────────────────
-    # Ветка «📋 Выбрать СТО из списка» (пока без клика по конкретному СТО)
-    # ───────────────────────────────────────────────────────────
-    if callback.data.endswith("list"):
-        # Сначала пытаемся по гео
-        near_sc = await _find_suitable_service_centers_for_request(
+    spawn(
+        _broadcast_request(
+            bot=callback.message.bot,
             request=request,
-            api_client=api_client,
-            use_geo=True,
+            service_centers=service_centers,
         )
+    )
 
-        # Если по гео пусто — пробуем без гео, только по профилю
-        if not near_sc:
-            any_sc = await _find_suitable_service_centers_for_request(
-                request=request,
-                api_client=api_client,
-                use_geo=False,
-            )
-        else:
-            any_sc = near_sc
-
-        if not any_sc:
-            await state.clear()
-            await callback.message.edit_text(
-                f"✅ Заявка <b>№{request_id}</b> создана.\n\n"
-                "Но подходящих автосервисов по вашему профилю пока не нашлось.\n"
-                "Попробуйте другой район или позже загляните в раздел «📄 Мои заявки»."
-            )
-            await _back_to_main_menu(callback.message, telegram_id=callback.from_user.id)
-            await callback.answer()
-            return
-
-        # Пока просто показываем пользователю список названий/адресов без выбора
-        lines = []
-        for sc in any_sc:
-            name = sc.get("name") or "Без названия"
-            city = sc.get("city") or ""
-            address = sc.get("address") or ""
-            line = f"• {name}"
-            if city or address:
-                line += f" — {city}, {address}".strip(" ,")
-            lines.append(line)
 
-        text = (
-            f"✅ Заявка <b>№{request_id}</b> создана.\n\n"
-            "Подходящие автосервисы по вашему профилю:\n\n"
-            + "\n".join(lines)
-            + "\n\n"
-            "На следующем этапе доработаем выбор конкретного сервиса из списка.\n"
-            "Пока вы можете отслеживать статус заявки в разделе «📄 Мои заявки»."
+async def _broadcast_request(
+    bot: Bot,
+    request: Dict[str, Any],
+    service_centers: List[Dict[str, Any]],
+) -> None:
+    """
+    Фоновая рассылка заявки по СТО. Задачу никто не ждёт,
+    поэтому все ошибки логируем здесь.
+    """
+    try:
+        sent_count = await _notify_services_about_request(
+            bot=bot,
+            request=request,
+            service_centers=service_centers,
         )
-
-        await state.clear()
-        await callback.message.edit_text(text)
-        await _back_to_main_menu(callback.message, telegram_id=callback.from_user.id)
-        await callback.answer()
-        return
-
-    # ───────────────────────────────────────────────────────────
-    # Ветка «📡 Отправить всем подходящим»
-    # ───────────────────────────────────────────────────────────
-    if callback.data.endswith("all"):
-        # Фактически рассылка сейчас уже делается на этапе создания заявки
-        # через _notify_services_about_request (чтобы не ломать старую логику).
-        # Здесь просто аккуратно завершаем сценарий.
-        await state.clear()
-        await callback.message.edit_text(
-            f"✅ Заявка <b>№{request_id}</b> создана и отправлена подходящим автосервисам.\n\n"
-            "Вы можете отслеживать отклики в разделе «📄 Мои заявки»."
+        logger.info(
+            "Заявка %s отправлена в %s из %s СТО",
+            request.get("id"),
+            sent_count,
+            len(service_centers),
+        )
+    except Exception as e:
+        logger.exception(
+            "Ошибка фоновой рассылки заявки %s: %s",
+            request.get("id"),
+            e,
         )
-        await _back_to_main_menu(callback.message, telegram_id=callback.from_user.id)
-        await callback.answer()
-        return
 
 
 async def _notify_services_about_request(
@@ -1500,7 +1599,7 @@ async def _notify_services_about_request(
             if isinstance(user, dict):
                 client_tg_id = user.get("telegram_id")
         except Exception as e:
-            logging.exception(
+            logger.exception(
                 "Не удалось получить данные клиента для заявки %s: %s",
                 request_id,
                 e,
@@ -1511,106 +1610,133 @@ async def _notify_services_about_request(
         if request_id is not None
         else "📥 Новая заявка"
     )
+    text_fields = {
+        "title": base_title,
+        "car_line": f"<b>Автомобиль:</b> {car_info}\n" if car_info else "",
+        "addr": addr,
+        "desc": desc,
+    }
+
+    # --- Кнопки под заявкой для СТО: одинаковые для всех сервисов ---
+    first_row: List[InlineKeyboardButton] = [
+        InlineKeyboardButton(
+            text="✉️ Ответить на заявку",
+            callback_data=f"sto:req_view:{request_id}",
+        )
+    ]
+
+    # Если знаем Telegram клиента — добавляем кнопку "Написать клиенту"
+    if client_tg_id:
+        first_row.append(
+            InlineKeyboardButton(
+                text="💬 Написать клиенту",
+                url=f"tg://user?id={client_tg_id}",
+            )
+        )
+
+    kb = InlineKeyboardMarkup(
+        inline_keyboard=[
+            first_row,
+            [
+                InlineKeyboardButton(
+                    text="📥 Все заявки клиентов",
+                    callback_data="sto:req_list",
+                )
+            ],
+        ]
+    )
+    photos: List[str] = request.get("photos") or []
+    # Больше одного фото — альбомами по 10 (лимит Telegram): один запрос
+    # на альбом вместо send_photo на каждое фото
+    photo_albums: List[List[InputMediaPhoto]] = (
+        [
+            [InputMediaPhoto(media=file_id) for file_id in photos[i:i + 10]]
+            for i in range(0, len(photos), 10)
+        ]
+        if len(photos) > 1
+        else []
+    )
 
-    for sc in service_centers:
-        try:
-            sc_id = sc.get("id")
-            if not sc_id:
-                continue
+    async def _notify_sc(sc: Dict[str, Any]) -> Optional[int]:
+        """
+        Отправляет заявку одному СТО. Возвращает id СТО, если отправили.
+        """
+        sc_id = sc.get("id")
+        if not sc_id:
+            return None
 
+        # backend отдаёт telegram_id владельца прямо в списке СТО;
+        # отдельный запрос пользователя — только для старых ответов без поля
+        tg_id = sc.get("owner_telegram_id")
+        if not tg_id:
             owner_user_id = sc.get("user_id")
             if not owner_user_id:
-                continue
+                return None
 
-            # находим владельца СТО и его telegram_id
             try:
                 owner = await api_client.get_user(int(owner_user_id))
             except Exception as e:
-                logging.exception("Не удалось получить данные владельца СТО: %s", e)
-                continue
+                logger.exception("Не удалось получить данные владельца СТО: %s", e)
+                return None
 
             if not isinstance(owner, dict):
-                continue
+                return None
 
             tg_id = owner.get("telegram_id")
             if not tg_id:
-                continue
+                return None
 
-            sc_name = (sc.get("name") or "").strip() or f"Автосервис #{sc_id}"
+        sc_name = (sc.get("name") or "").strip() or f"Автосервис #{sc_id}"
 
-            text_lines = [
-                base_title,
-                "",
-                f"<b>Автосервис:</b> {sc_name}",
-            ]
-            if car_info:
-                text_lines.append(f"<b>Автомобиль:</b> {car_info}")
-            text_lines.append(f"<b>Адрес/место:</b> {addr}")
-            text_lines.append("")
-            text_lines.append("<b>Описание проблемы:</b>")
-            text_lines.append(desc)
-            text_lines.append("")
-            text_lines.append(
-                "Чтобы отправить клиенту условия (цена, срок, комментарий), "
-                "нажмите кнопку ниже и напишите одно сообщение."
-            )
+        base_text = _NEW_REQUEST_SC_TEMPLATE.format(sc_name=sc_name, **text_fields)
 
-            base_text = "\n".join(text_lines)
+        # 1) сообщение с текстом и кнопками
+        await throttled_send(bot, tg_id, base_text, reply_markup=kb)
 
-            # --- Кнопки под заявкой для СТО ---
-            first_row: List[InlineKeyboardButton] = [
-                InlineKeyboardButton(
-                    text="✉️ Ответить на заявку",
-                    callback_data=f"sto:req_view:{request_id}",
+        # 2) если у заявки есть сохранённые фото – отправим и их
+        try:
+            if len(photos) == 1:
+                await throttled_call(
+                    tg_id,
+                    lambda: bot.send_photo(chat_id=tg_id, photo=photos[0]),
                 )
-            ]
-
-            # Если знаем Telegram клиента — добавляем кнопку "Написать клиенту"
-            if client_tg_id:
-                first_row.append(
-                    InlineKeyboardButton(
-                        text="💬 Написать клиенту",
-                        url=f"tg://user?id={client_tg_id}",
-                    )
+            for album in photo_albums:
+                await throttled_call(
+                    tg_id,
+                    lambda album=album: bot.send_media_group(chat_id=tg_id, media=album),
                 )
+        except Exception:
+            # фото не критичны, не роняем сценарий
+            pass
 
-            kb = InlineKeyboardMarkup(
-                inline_keyboard=[
-                    first_row,
-                    [
-                        InlineKeyboardButton(
-                            text="📥 Все заявки клиентов",
-                            callback_data="sto:req_list",
-                        )
-                    ],
-                ]
-            )
-
-            # 1) сообщение с текстом и кнопками
-            await bot.send_message(chat_id=tg_id, text=base_text, reply_markup=kb)
+        return int(sc_id)
 
-            # 2) если у заявки есть сохранённые фото – отправим и их
-            photos: List[str] = request.get("photos") or []
-            for file_id in photos:
-                try:
-                    await bot.send_photo(chat_id=tg_id, photo=file_id)
-                except Exception:
-                    # фото не критичны, не роняем сценарий
-                    pass
+    # Рассылаем параллельно фиксированным пулом воркеров: каждый берёт
+    # следующий СТО из общего итератора. Сколько бы СТО ни нашлось,
+    # одновременно живут только _BROADCAST_WORKERS корутин.
+    sc_iter = iter(service_centers)
 
-            sent_count += 1
-            sent_sc_ids.append(int(sc_id))
+    async def _worker() -> None:
+        nonlocal sent_count
+        for sc in sc_iter:
+            try:
+                sent_id = await _notify_sc(sc)
+            except Exception as e:
+                logger.exception("Ошибка при отправке заявки в СТО: %s", e)
+                continue
+            if sent_id is not None:
+                sent_count += 1
+                sent_sc_ids.append(sent_id)
 
-        except Exception as e:
-            logging.exception("Ошибка при отправке заявки в СТО: %s", e)
-            continue
+    workers = min(_BROADCAST_WORKERS, len(service_centers))
+    await asyncio.gather(*[_worker() for _ in range(workers)])
 
     # После успешной рассылки фиксируем распределение заявки по СТО в backend
     if request_id and sent_sc_ids:
         try:
             await api_client.distribute_request(int(request_id), sent_sc_ids)
         except Exception as e:
-            logging.exception(
+            logger.exception(
                 "Не удалось зафиксировать распределение заявки %s по СТО %s: %s",
                 request_id,
                 sent_sc_ids,
@@ -1622,9 +1748,13 @@ async def _notify_services_about_request(
 
 @router.callback_query(
     StateFilter(RequestCreateFSM.choosing_work_mode),
-    F.data.startswith("req_sc:"),
+    F.data.regexp(_SC_RE).as_("sc_match"),
 )
-async def req_service_center_selected(callback: CallbackQuery, state: FSMContext):
+async def req_service_center_selected(
+    callback: CallbackQuery,
+    state: FSMContext,
+    sc_match: re.Match[str],
+):
     """
     Пользователь выбрал конкретный автосервис из списка.
     Фиксируем его в заявке и отправляем заявку этому сервису.
@@ -1642,12 +1772,7 @@ async def req_service_center_selected(callback: CallbackQuery, state: FSMContext
         await callback.answer()
         return
 
-    try:
-        _, sc_id_str = callback.data.split(":", maxsplit=1)
-        service_center_id = int(sc_id_str)
-    except (ValueError, IndexError):
-        await callback.answer()
-        return
+    service_center_id = int(sc_match.group(1))
 
     # Обновляем заявку: привязываем выбранный сервис и переводим в статус "sent"
     try:
@@ -1667,34 +1792,32 @@ async def req_service_center_selected(callback: CallbackQuery, state: FSMContext
         await callback.answer()
         return
 
-    # Фиксируем распределение заявки: она отправлена КОНКРЕТНО этому СТО
-    try:
-        await api_client.distribute_request(
-            request_id,
-            [service_center_id],
-        )
-    except Exception as e:
-        logging.exception(
+    # Три независимых запроса к backend — выполняем параллельно:
+    # - фиксируем распределение заявки (она отправлена КОНКРЕТНО этому СТО);
+    # - загружаем актуальную заявку и выбранное СТО для уведомления.
+    distribute_res, request, service_center = await asyncio.gather(
+        api_client.distribute_request(request_id, [service_center_id]),
+        api_client.get_request(request_id),
+        api_client.get_service_center(service_center_id),
+        return_exceptions=True,
+    )
+
+    if isinstance(distribute_res, BaseException):
+        logger.error(
             "Не удалось зафиксировать распределение заявки %s для СТО %s: %s",
             request_id,
             service_center_id,
-            e,
+            distribute_res,
+            exc_info=distribute_res,
         )
 
-    # Пытаемся уведомить выбранное СТО так же, как в режиме «отправить всем»
-    try:
-        request = await api_client.get_request(request_id)
-    except Exception:
+    if not isinstance(request, dict):
         request = None
-
-    service_center = None
-    try:
-        service_center_data = await api_client.get_service_center(service_center_id)
-        if isinstance(service_center_data, dict):
-            service_center = service_center_data
-    except Exception:
+    if not isinstance(service_center, dict):
         service_center = None
 
+    # Пытаемся уведомить выбранное СТО так же, как в режиме «отправить всем»
+
     if request and service_center:
         try:
             await _notify_services_about_request(
@@ -1706,13 +1829,13 @@ async def req_service_center_selected(callback: CallbackQuery, state: FSMContext
             # Не роняем сценарий, если уведомление не дошло
             pass
 
-    await callback.message.edit_text(
+    await state.clear()
+    await _edit_and_back_to_menu(
+        callback.message,
         f"✅ Заявка <b>№{request_id}</b> отправлена в выбранный автосервис.\n\n"
         "Как только сервис ответит, его предложение появится в разделе «📄 Мои заявки».",
+        telegram_id=callback.from_user.id,
     )
-
-    await state.clear()
-    await _back_to_main_menu(callback.message, telegram_id=callback.from_user.id)
     await callback.answer()
 
 
@@ -1720,40 +1843,30 @@ def _build_service_centers_keyboard(service_centers: list[dict]) -> InlineKeyboa
     """
     Клавиатура выбора СТО для режима «Выбрать из списка».
     callback_data: req_sc:<service_center_id>
+    service_centers — ответ backend-а (ServiceCenterRead): id есть всегда.
     """
-    buttons: list[list[InlineKeyboardButton]] = []
-
-    for sc in service_centers[:10]:  # не спамим, максимум 10 штук
-        sc_id = sc.get("id")
-        name = sc.get("name") or "Без названия"
-        city = sc.get("city") or ""
-        address = sc.get("address_text") or ""
-
-        title_parts = [name]
-        if city:
-            title_parts.append(city)
-        if address:
-            title_parts.append(address)
-
-        title = " — ".join(title_parts)
-
-        if sc_id is None:
-            continue
-
-        buttons.append([
+    buttons: list[list[InlineKeyboardButton]] = [
+        [
             InlineKeyboardButton(
-                text=title[:64],  # ограничим длину подписи
-                callback_data=f"req_sc:{sc_id}",
+                # «Название — город — адрес», пустые части пропускаем
+                text=" — ".join(
+                    filter(
+                        None,
+                        (
+                            sc.get("name") or "Без названия",
+                            sc.get("city"),
+                            sc.get("address_text"),
+                        ),
+                    )
+                )[:64],  # ограничим длину подписи
+                callback_data=f"req_sc:{sc['id']}",
             )
-        ])
+        ]
+        for sc in service_centers[:10]  # не спамим, максимум 10 штук
+    ]
 
     # строка "Назад / Отмена"
-    buttons.append([
-        InlineKeyboardButton(
-            text="❌ Отменить",
-            callback_data="req_create:cancel",
-        )
-    ])
+    buttons.append([_CANCEL_BUTTON])
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -1781,10 +1894,39 @@ def _build_service_centers_keyboard(service_centers: list[dict]) -> InlineKeyboa
         RequestCreateFSM.choosing_car,
         RequestCreateFSM.choosing_work_mode,
     ),
-    F.data == "req_create:cancel",
+    F.data == CB_REQ_CANCEL,
 )
 async def req_create_cancel(callback: CallbackQuery, state: FSMContext):
     await state.clear()
-    await callback.message.edit_text("Создание заявки отменено.")
-    await _back_to_main_menu(callback.message, telegram_id=callback.from_user.id)
+    await _edit_and_back_to_menu(
+        callback.message,
+        "Создание заявки отменено.",
+        telegram_id=callback.from_user.id,
+    )
     await callback.answer()
+
+
+# Префиксы callback_data сценария создания заявки. Кнопки с битым payload
+# (или из старого сообщения, когда шаг уже пройден) не подходят ни под один
+# фильтр выше — без ответа клиент видит «часики» до таймаута Telegram.
+_REQ_CREATE_CALLBACK_PREFIXES = (
+    "req_create:",
+    "req_move:",
+    "req_loc:",
+    "req_evacu:",
+    "req_radius:",
+    "req_cat:",
+    "req_descr:",
+    "req_time:",
+    "req_photo:",
+    "req_phone:",
+    "req_car:",
+    "req_work:",
+    "req_sc:",
+)
+
+
+@router.callback_query(F.data.startswith(_REQ_CREATE_CALLBACK_PREFIXES))
+async def req_create_stale_callback(callback: CallbackQuery):
+    # регистрируется последним в роутере, чтобы не перехватывать рабочие кнопки
+    await callback.answer("Кнопка устарела. Начните создание заявки заново.")
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from typing import Any, Dict, List, Optional, Tuple
 
 from aiogram import Router, F
@@ -11,9 +13,13 @@ from aiogram.types import (
 )
 
 from ..api_client import api_client
-from .general import get_main_menu
+from ..background import ack
+from ..safe_edit import safe_edit
+from ..throttling import throttled_send
+from .general import BTN_MAIN_MENU, NOT_REGISTERED_TEXT, get_main_menu
 
 router = Router()
+logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
 # Константы статусов (для человека)
@@ -41,10 +47,9 @@ OFFER_STATUS_LABELS: Dict[str, str] = {
 }
 
 
-# Какие строковые значения мы шлём в backend при выборе отклика
-# (если в OfferStatus другие значения — поменяй эти строки).
+# Какое строковое значение статуса отклика мы шлём в backend при выборе
+# (если в OfferStatus другое значение — поменяй эту строку).
 OFFER_ACCEPT_STATUS = "accepted"          # OfferStatus.ACCEPTED.value
-REQUEST_ACCEPT_STATUS = "accepted_by_service"  # RequestStatus.ACCEPTED_BY_SERVICE.value
 
 
 def _format_request_number(request_id: int | None) -> str:
@@ -64,6 +69,47 @@ def _format_request_number(request_id: int | None) -> str:
 # ---------------------------------------------------------------------------
 
 
+def _kb_request_back(request_id: int) -> InlineKeyboardMarkup:
+    """
+    «⬅️ К заявке» + «⬅️ В меню».
+    """
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="⬅️ К заявке",
+                    callback_data=f"req_view:{request_id}",
+                )
+            ],
+            [BTN_MAIN_MENU],
+        ]
+    )
+
+
+
+def _parse_callback_ids(data: Optional[str], prefix: str, count: int) -> Optional[Tuple[int, ...]]:
+    """
+    Разбор числовых id из callback_data без исключений:
+    ("req_offer:view:12:34", "req_offer:view:", 2) -> (12, 34).
+    Если формат не совпал — None.
+    """
+    if not data or not data.startswith(prefix):
+        return None
+
+    rest = data[len(prefix):]
+    ids: List[int] = []
+    for _ in range(count - 1):
+        head, sep, rest = rest.partition(":")
+        if not sep or not head.isdigit():
+            return None
+        ids.append(int(head))
+
+    if not rest.isdigit():
+        return None
+    ids.append(int(rest))
+    return tuple(ids)
+
+
 def _status_to_text(status: Optional[str]) -> str:
     if not status:
         return "Неизвестен"
@@ -76,6 +122,13 @@ def _offer_status_to_text(status: Optional[str]) -> str:
     return OFFER_STATUS_LABELS.get(status, status)
 
 
+def _shorten(text: str, limit: int) -> str:
+    """
+    Обрезать text до limit символов (с «...» в конце, если обрезали).
+    """
+    return text if len(text) <= limit else f"{text[:limit - 3]}..."
+
+
 async def _back_to_main_menu(message: Message, telegram_id: int):
     user = await api_client.get_user_by_telegram(telegram_id)
     role: Optional[str] = None
@@ -88,10 +141,16 @@ async def _back_to_main_menu(message: Message, telegram_id: int):
     )
 
 
-async def _get_current_user(message_or_cb) -> Optional[Dict[str, Any]]:
+async def _get_current_user(
+    message_or_cb,
+    current_user: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
     """
     Общий helper: найти пользователя по telegram_id.
     Если не найден — показываем подсказку про /start.
+
+    current_user (от CurrentUserMiddleware) — уже найденный пользователь:
+    тогда в backend не ходим, и список заявок стоит один запрос.
     """
     if isinstance(message_or_cb, Message):
         tg_id = message_or_cb.from_user.id
@@ -100,11 +159,10 @@ async def _get_current_user(message_or_cb) -> Optional[Dict[str, Any]]:
         tg_id = message_or_cb.from_user.id
         message = message_or_cb.message
 
-    user = await api_client.get_user_by_telegram(tg_id)
+    user = current_user or await api_client.get_user_by_telegram(tg_id)
     if not user:
         await message.answer(
-            "Похоже, вы ещё не зарегистрированы.\n"
-            "Нажмите /start, чтобы пройти короткую регистрацию.",
+            NOT_REGISTERED_TEXT,
         )
         return None
     return user
@@ -127,18 +185,15 @@ def _build_requests_list_kb(requests: List[Dict[str, Any]]) -> InlineKeyboardMar
                 ]
             )
 
-    rows.append(
-        [
-            InlineKeyboardButton(
-                text="⬅️ В меню",
-                callback_data="main:menu",
-            )
-        ]
-    )
+    rows.append([BTN_MAIN_MENU])
 
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+# Пустой список заявок — только «В меню»
+KB_REQUESTS_EMPTY = _build_requests_list_kb([])
+
+
 def _build_request_detail_kb(request_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура под карточкой заявки.
@@ -158,12 +213,7 @@ def _build_request_detail_kb(request_id: int) -> InlineKeyboardMarkup:
                     callback_data="req_list:back",
                 )
             ],
-            [
-                InlineKeyboardButton(
-                    text="⬅️ В меню",
-                    callback_data="main:menu",
-                )
-            ],
+            [BTN_MAIN_MENU],
         ]
     )
 
@@ -194,14 +244,7 @@ def _build_offers_list_kb(request_id: int, offers: List[Dict[str, Any]]) -> Inli
             )
         ]
     )
-    rows.append(
-        [
-            InlineKeyboardButton(
-                text="⬅️ В меню",
-                callback_data="main:menu",
-            )
-        ]
-    )
+    rows.append([BTN_MAIN_MENU])
 
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
@@ -231,12 +274,7 @@ def _build_offer_detail_kb(
                     callback_data=f"req_offers:list:{request_id}",
                 )
             ],
-            [
-                InlineKeyboardButton(
-                    text="⬅️ В меню",
-                    callback_data="main:menu",
-                )
-            ],
+            [BTN_MAIN_MENU],
         ]
     )
 
@@ -246,6 +284,15 @@ def _build_offer_detail_kb(
 # ---------------------------------------------------------------------------
 
 
+def _format_request_list_entry(req: Dict[str, Any]) -> str:
+    """
+    Строка заявки в списке: номер, статус и начало описания.
+    """
+    desc = _shorten((req.get("description") or "").strip(), 60)
+    head = f"#{req.get('id')} — {_status_to_text(req.get('status'))}\n"
+    return f"{head}  {desc}\n" if desc else head
+
+
 async def _send_requests_list(message: Message, user_id: int):
     try:
         requests = await api_client.list_requests_by_user(user_id)
@@ -260,24 +307,13 @@ async def _send_requests_list(message: Message, user_id: int):
             "<b>📨 Мои заявки</b>\n\n"
             "У вас пока нет заявок.\n"
             "Создайте первую через меню «📝 Новая заявка».",
-            reply_markup=_build_requests_list_kb([]),
+            reply_markup=KB_REQUESTS_EMPTY,
         )
         return
 
-    lines: List[str] = ["<b>📨 Мои заявки</b>", ""]
-    for req in requests:
-        req_id = req.get("id")
-        status = _status_to_text(req.get("status"))
-        desc = (req.get("description") or "").strip()
-        if len(desc) > 60:
-            desc = desc[:57] + "..."
-
-        lines.append(f"#{req_id} — {status}")
-        if desc:
-            lines.append(f"  {desc}")
-        lines.append("")
-
-    text = "\n".join(lines)
+    text = "<b>📨 Мои заявки</b>\n\n" + "\n".join(
+        _format_request_list_entry(req) for req in requests
+    )
 
     await message.answer(
         text,
@@ -285,12 +321,12 @@ async def _send_requests_list(message: Message, user_id: int):
     )
 
 
-@router.message(F.text == "📨 Мои заявки")
-async def my_requests_legacy(message: Message):
+@router.message(F.text == "📨 Мои заявки", flags={"current_user": True})
+async def my_requests_legacy(message: Message, current_user: dict | None = None):
     """
     Вход по старой текстовой кнопке.
     """
-    user = await _get_current_user(message)
+    user = await _get_current_user(message, current_user)
     if not user:
         return
 
@@ -302,12 +338,15 @@ async def my_requests_legacy(message: Message):
     await _send_requests_list(message, user_id)
 
 
-@router.callback_query(F.data.in_(("main:my_requests", "main:requests")))
-async def my_requests_from_menu(callback: CallbackQuery):
+@router.callback_query(
+    F.data.in_(("main:my_requests", "main:requests")),
+    flags={"current_user": True},
+)
+async def my_requests_from_menu(callback: CallbackQuery, current_user: dict | None = None):
     """
     Вход из главного меню по callback.
     """
-    user = await _get_current_user(callback)
+    user = await _get_current_user(callback, current_user)
     if not user:
         await callback.answer()
         return
@@ -324,12 +363,12 @@ async def my_requests_from_menu(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "req_list:back")
-async def back_to_requests_list(callback: CallbackQuery):
+@router.callback_query(F.data == "req_list:back", flags={"current_user": True})
+async def back_to_requests_list(callback: CallbackQuery, current_user: dict | None = None):
     """
     Кнопка «⬅️ К списку заявок» из карточки заявки.
     """
-    user = await _get_current_user(callback)
+    user = await _get_current_user(callback, current_user)
     if not user:
         await callback.answer()
         return
@@ -372,7 +411,8 @@ async def request_detail(callback: CallbackQuery):
 
     request = await _load_request_detail(request_id)
     if not request:
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "Не удалось загрузить заявку. Возможно, она была удалена.",
             reply_markup=_build_request_detail_kb(request_id),
         )
@@ -431,7 +471,8 @@ async def request_detail(callback: CallbackQuery):
         "Ниже можно посмотреть отклики СТО по этой заявке.",
     ]
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "\n".join(text_lines),
         reply_markup=_build_request_detail_kb(request_id),
     )
@@ -445,12 +486,12 @@ async def request_detail(callback: CallbackQuery):
 
 async def _load_offers_with_sc(
     request_id: int,
-) -> Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+) -> Tuple[List[Dict[str, Any]], Dict[int, str]]:
     """
-    Загружаем все отклики по заявке и справочник СТО по id.
+    Загружаем все отклики по заявке и названия СТО по id.
     Возвращаем:
       - список offers,
-      - dict service_center_id -> service_center_dict
+      - dict service_center_id -> название СТО
     """
     try:
         offers = await api_client.list_offers_by_request(request_id)
@@ -461,35 +502,57 @@ async def _load_offers_with_sc(
         return [], {}
 
     sc_ids = {off.get("service_center_id") for off in offers if off.get("service_center_id")}
-    sc_map: Dict[int, Dict[str, Any]] = {}
+    sc_map: Dict[int, str] = {}
 
     for sc_id in sc_ids:
         try:
-            sc_data = await api_client.get_service_center(sc_id)  # type: ignore[arg-type]
+            sc_name = await api_client.get_service_center_name(sc_id)  # type: ignore[arg-type]
         except Exception:
-            sc_data = None
-        if isinstance(sc_data, dict):
-            sc_map[sc_id] = sc_data
+            sc_name = None
+        if sc_name:
+            sc_map[sc_id] = sc_name
 
     return offers, sc_map
 
 
+async def _get_sc_owner_telegram_id(sc: Any) -> Optional[int]:
+    """
+    telegram_id владельца СТО: backend отдаёт его вместе с СТО,
+    отдельный запрос пользователя — только если поля нет.
+    """
+    if not isinstance(sc, dict):
+        return None
+
+    tg_id = sc.get("owner_telegram_id")
+    if tg_id:
+        return tg_id
+
+    owner_id = sc.get("user_id") or sc.get("owner_id")
+    if not owner_id:
+        return None
+
+    manager = await api_client.get_user(int(owner_id))
+    if isinstance(manager, dict):
+        return manager.get("telegram_id")
+    return None
+
+
 @router.callback_query(F.data.startswith("req_offers:list:"))
 async def request_offers_list(callback: CallbackQuery):
     """
     Показ списка откликов по конкретной заявке.
     """
-    try:
-        _, _, raw_id = callback.data.split(":", maxsplit=2)
-        request_id = int(raw_id)
-    except Exception:
+    ids = _parse_callback_ids(callback.data, "req_offers:list:", 1)
+    if ids is None:
         await callback.answer("Некорректный идентификатор заявки.")
         return
+    (request_id,) = ids
 
     offers, sc_map = await _load_offers_with_sc(request_id)
 
     if not offers:
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "<b>📨 Отклики по заявке</b>\n\n"
             "Пока по этой заявке нет откликов.\n"
             "Как только сервисы ответят — вы увидите их здесь.",
@@ -511,9 +574,7 @@ async def request_offers_list(callback: CallbackQuery):
         comment = (off.get("comment") or "").strip()
 
         sc_id = off.get("service_center_id")
-        sc = sc_map.get(sc_id or -1)
-        sc_name = sc.get("name") if isinstance(sc, dict) else None
-        sc_name = sc_name or f"СТО #{sc_id}"
+        sc_name = sc_map.get(sc_id or -1) or f"СТО #{sc_id}"
 
         price_text = f"{price:.0f} ₽" if isinstance(price, (int, float)) else "по договорённости"
         if isinstance(eta, int):
@@ -530,14 +591,11 @@ async def request_offers_list(callback: CallbackQuery):
         lines.append(f"Цена: {price_text}")
         lines.append(f"Срок: {eta_text}")
         if comment:
-            if len(comment) > 80:
-                comment_short = comment[:77] + "..."
-            else:
-                comment_short = comment
-            lines.append(f"Комментарий: {comment_short}")
+            lines.append(f"Комментарий: {_shorten(comment, 80)}")
         lines.append("")
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "\n".join(lines),
         reply_markup=_build_offers_list_kb(request_id, offers),
     )
@@ -550,13 +608,11 @@ async def request_offer_detail(callback: CallbackQuery):
     Детальный просмотр одного отклика + кнопка «Выбрать этот сервис».
     callback_data: req_offer:view:{request_id}:{offer_id}
     """
-    try:
-        _, _, raw_req_id, raw_offer_id = callback.data.split(":", maxsplit=3)
-        request_id = int(raw_req_id)
-        offer_id = int(raw_offer_id)
-    except Exception:
+    ids = _parse_callback_ids(callback.data, "req_offer:view:", 2)
+    if ids is None:
         await callback.answer("Некорректные данные отклика.")
         return
+    request_id, offer_id = ids
 
     offers, sc_map = await _load_offers_with_sc(request_id)
     offer: Optional[Dict[str, Any]] = next(
@@ -565,7 +621,8 @@ async def request_offer_detail(callback: CallbackQuery):
     )
 
     if not offer:
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "Не удалось найти этот отклик. Возможно, он был удалён.",
             reply_markup=_build_offers_list_kb(request_id, offers),
         )
@@ -573,9 +630,7 @@ async def request_offer_detail(callback: CallbackQuery):
         return
 
     sc_id = offer.get("service_center_id")
-    sc = sc_map.get(sc_id or -1)
-    sc_name = sc.get("name") if isinstance(sc, dict) else None
-    sc_name = sc_name or f"СТО #{sc_id}"
+    sc_name = sc_map.get(sc_id or -1) or f"СТО #{sc_id}"
 
     status = _offer_status_to_text(offer.get("status"))
     price = offer.get("price")
@@ -613,7 +668,8 @@ async def request_offer_detail(callback: CallbackQuery):
         service_center_id=sc_id,
     )
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "\n".join(text_lines),
         reply_markup=kb,
     )
@@ -626,17 +682,15 @@ async def request_offer_decline(callback: CallbackQuery):
     Клиент явно отклоняет конкретный отклик.
     callback_data: req_offer:decline:{request_id}:{offer_id}
     """
-    try:
-        _, _, raw_req_id, raw_offer_id = callback.data.split(":", maxsplit=3)
-        request_id = int(raw_req_id)
-        offer_id = int(raw_offer_id)
-    except Exception:
+    ids = _parse_callback_ids(callback.data, "req_offer:decline:", 2)
+    if ids is None:
         await callback.answer("Некорректные данные отклика.")
         return
+    request_id, offer_id = ids
 
-    # Обновляем статус отклика
+    # Обновляем статус отклика (backend возвращает обновлённый отклик)
     try:
-        await api_client.update_offer(
+        offer = await api_client.update_offer(
             offer_id,
             {"status": "rejected"},
         )
@@ -644,58 +698,54 @@ async def request_offer_decline(callback: CallbackQuery):
         await callback.message.answer(
             "Не удалось отклонить это предложение. Попробуйте позже."
         )
-        await callback.answer()
+        ack(callback)
         return
 
-    # Пытаемся уведомить СТО, чьё предложение отклонено
-    try:
-        offers, sc_map = await _load_offers_with_sc(request_id)
-        offer = next((o for o in offers if o.get("id") == offer_id), None)
-        if offer:
-            sc_id = offer.get("service_center_id")
-            sc = sc_map.get(sc_id or -1)
-            owner_id = None
-            if isinstance(sc, dict):
-                owner_id = sc.get("owner_id") or sc.get("user_id")
-
-            if owner_id:
-                manager = await api_client.get_user(int(owner_id))
-                if isinstance(manager, dict):
-                    manager_tg = manager.get("telegram_id")
-                    if manager_tg:
-                        await callback.bot.send_message(
-                            chat_id=manager_tg,
-                            text=(
-                                f"❌ Клиент отклонил ваше предложение "
-                                f"по заявке №{request_id}."
-                            ),
+    async def _notify_declined_sc() -> None:
+        # Пытаемся уведомить СТО, чьё предложение отклонено
+        sc_id = offer.get("service_center_id") if isinstance(offer, dict) else None
+        if not sc_id:
+            return
+        sc = await api_client.get_service_center(int(sc_id))
+        manager_tg = await _get_sc_owner_telegram_id(sc)
+        if manager_tg:
+            await throttled_send(
+                callback.bot,
+                manager_tg,
+                (
+                    f"❌ Клиент отклонил ваше предложение "
+                    f"по заявке №{request_id}."
+                ),
+            )
+
+    # Обновляем сообщение клиенту и параллельно уведомляем СТО —
+    # друг от друга эти запросы не зависят
+    edit_res, notify_res = await asyncio.gather(
+        safe_edit(
+            callback.message,
+            "❌ Вы отклонили это предложение.\n\n"
+            "Вы можете выбрать другой отклик из списка или дождаться новых.",
+            reply_markup=InlineKeyboardMarkup(
+                inline_keyboard=[
+                    [
+                        InlineKeyboardButton(
+                            text="📨 Отклики по заявке",
+                            callback_data=f"req_offers:list:{request_id}",
                         )
-    except Exception:
-        # Не мешаем клиентскому UX, если уведомление не удалось
-        pass
-
-    # Обновляем сообщение клиенту
-    await callback.message.edit_text(
-        "❌ Вы отклонили это предложение.\n\n"
-        "Вы можете выбрать другой отклик из списка или дождаться новых.",
-        reply_markup=InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="📨 Отклики по заявке",
-                        callback_data=f"req_offers:list:{request_id}",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ В меню",
-                        callback_data="main:menu",
-                    )
-                ],
-            ]
+                    ],
+                    [BTN_MAIN_MENU],
+                ]
+            ),
         ),
+        _notify_declined_sc(),
+        return_exceptions=True,
     )
-    await callback.answer()
+    # Не мешаем клиентскому UX, если уведомление не удалось
+    if isinstance(notify_res, BaseException):
+        logger.warning("Не удалось уведомить СТО об отклонении отклика %s: %s", offer_id, notify_res)
+    if isinstance(edit_res, BaseException):
+        raise edit_res
+    ack(callback)
 
 
 @router.callback_query(F.data.startswith("req_offer:choose:"))
@@ -704,17 +754,12 @@ async def request_offer_choose(callback: CallbackQuery):
     Клиент выбирает конкретный отклик (выбирает СТО).
     callback_data: req_offer:choose:{request_id}:{offer_id}:{service_center_id}
     """
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-    import logging
 
-    try:
-        _, _, raw_req_id, raw_offer_id, raw_sc_id = callback.data.split(":", maxsplit=4)
-        request_id = int(raw_req_id)
-        offer_id = int(raw_offer_id)
-        service_center_id = int(raw_sc_id)
-    except Exception:
+    ids = _parse_callback_ids(callback.data, "req_offer:choose:", 3)
+    if ids is None:
         await callback.answer("Некорректные данные отклика.")
         return
+    request_id, offer_id, service_center_id = ids
 
     # 0) Загружаем все отклики по заявке и карту СТО
     try:
@@ -739,26 +784,12 @@ async def request_offer_choose(callback: CallbackQuery):
     # если этот отклик уже принят раньше — просто говорим клиенту
     if this_offer:
         st_raw = str(this_offer.get("status") or "").lower()
-        if st_raw == "accepted":
-            await callback.message.edit_text(
+        if st_raw == OFFER_ACCEPT_STATUS:
+            await safe_edit(
+                callback.message,
                 "✅ Этот сервис уже выбран по данной заявке.\n\n"
                 "При необходимости свяжитесь с сервисом для уточнения деталей.",
-                reply_markup=InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [
-                            InlineKeyboardButton(
-                                text="⬅️ К заявке",
-                                callback_data=f"req_view:{request_id}",
-                            )
-                        ],
-                        [
-                            InlineKeyboardButton(
-                                text="⬅️ В меню",
-                                callback_data="main:menu",
-                            )
-                        ],
-                    ]
-                ),
+                reply_markup=_kb_request_back(request_id),
             )
             await callback.answer()
             return
@@ -772,87 +803,77 @@ async def request_offer_choose(callback: CallbackQuery):
             continue
 
         status_raw = str(o.get("status") or "").lower()
-        if oid != offer_id and status_raw == "accepted":
+        if oid != offer_id and status_raw == OFFER_ACCEPT_STATUS:
             existing_other_accepted = o
             break
 
-    if existing_other_accepted:
-        await callback.message.edit_text(
-            "По этой заявке уже выбран другой автосервис.\n\n"
+    # 1) Атомарно закрепляем заявку за выбранным сервисом: backend делает
+    # условный UPDATE, так что два параллельных выбора не перетрут друг друга
+    claimed: Optional[Dict[str, Any]] = None
+    if existing_other_accepted is None:
+        try:
+            claimed = await api_client.claim_request(request_id, service_center_id)
+        except Exception:
+            await callback.message.answer(
+                "Не удалось сохранить выбор сервиса. Попробуйте позже."
+            )
+            await callback.answer()
+            return
+
+    if not isinstance(claimed, dict):
+        # название выбранного сервиса — из кэша названий, профиль не грузим
+        chosen_name = None
+        other_sc_id = (existing_other_accepted or {}).get("service_center_id")
+        if other_sc_id:
+            try:
+                chosen_name = await api_client.get_service_center_name(int(other_sc_id))
+            except Exception:
+                chosen_name = None
+        chosen_text = f" «{chosen_name}»" if chosen_name else ""
+        await safe_edit(
+            callback.message,
+            f"По этой заявке уже выбран другой автосервис{chosen_text}.\n\n"
             "Вы не можете принять несколько предложений одновременно.\n"
             "Если нужно изменить выбор, свяжитесь с менеджером проекта.",
-            reply_markup=InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [
-                        InlineKeyboardButton(
-                            text="⬅️ К заявке",
-                            callback_data=f"req_view:{request_id}",
-                        )
-                    ],
-                    [
-                        InlineKeyboardButton(
-                            text="⬅️ В меню",
-                            callback_data="main:menu",
-                        )
-                    ],
-                ]
-            ),
+            reply_markup=_kb_request_back(request_id),
         )
         await callback.answer()
         return
 
-    # 1) Обновляем выбранный отклик — помечаем как принятый клиентом
-    try:
-        await api_client.update_offer(
+    # 2) Помечаем отклик принятым и параллельно грузим выбранный сервис
+    # (владельца) — заявку уже вернул claim
+    offer_res, sc = await asyncio.gather(
+        api_client.update_offer(offer_id, {"status": OFFER_ACCEPT_STATUS}),
+        api_client.get_service_center(service_center_id),
+        return_exceptions=True,
+    )
+    if isinstance(offer_res, BaseException):
+        logger.error(
+            "Не удалось пометить отклик %s принятым: %s",
             offer_id,
-            {
-                "status": "accepted",
-            },
-        )
-    except Exception:
-        await callback.message.answer(
-            "Не удалось сохранить выбор сервиса. Попробуйте позже."
-        )
-        await callback.answer()
-        return
-
-    # 2) Обновляем заявку — привязываем выбранный сервис и переводим статус
-    try:
-        await api_client.update_request(
-            request_id,
-            {
-                "service_center_id": service_center_id,
-                "status": "accepted_by_service",
-            },
+            offer_res,
+            exc_info=offer_res,
         )
-    except Exception:
         await callback.message.answer(
-            "Сервис выбран, но не удалось обновить статус заявки.\n"
+            "Сервис выбран, но не удалось обновить статус отклика.\n"
             "Если что-то пойдёт не так — напишите менеджеру.",
         )
 
     # 3) Уведомляем выбранный сервис и отклоняем остальных
-    # 3.1. Находим владельца выбранного сервиса
     manager_tg_id: Optional[int] = None
-    try:
-        sc = await api_client.get_service_center(service_center_id)
-        if isinstance(sc, dict):
-            owner_id = sc.get("user_id") or sc.get("owner_id")
-            if owner_id:
-                manager = await api_client.get_user(int(owner_id))
-                if isinstance(manager, dict):
-                    manager_tg_id = manager.get("telegram_id")
-    except Exception:
-        logging.exception("Не удалось получить данные выбранного сервиса / менеджера")
+    if isinstance(sc, BaseException):
+        logger.error(
+            "Не удалось получить данные выбранного сервиса / менеджера: %s",
+            sc,
+            exc_info=sc,
+        )
+    else:
+        try:
+            manager_tg_id = await _get_sc_owner_telegram_id(sc)
+        except Exception:
+            logger.exception("Не удалось получить данные выбранного сервиса / менеджера")
 
-    # 3.2. Загрузим саму заявку, чтобы показать её целиком СТО
-    request_data: Dict[str, Any] = {}
-    try:
-        req = await api_client.get_request(request_id)
-        if isinstance(req, dict):
-            request_data = req
-    except Exception:
-        request_data = {}
+    request_data: Dict[str, Any] = claimed
 
     desc = (request_data.get("description") or "").strip() or "Описание не указано"
     addr = (request_data.get("address_text") or "").strip() or "Адрес не указан"
@@ -901,24 +922,20 @@ async def request_offer_choose(callback: CallbackQuery):
                     callback_data="sto:req_list",
                 )
             ],
-            [
-                InlineKeyboardButton(
-                    text="⬅️ В меню",
-                    callback_data="main:menu",
-                )
-            ],
+            [BTN_MAIN_MENU],
         ]
     )
 
     if manager_tg_id:
         try:
-            await callback.bot.send_message(
-                chat_id=manager_tg_id,
-                text=sc_text,
+            await throttled_send(
+                callback.bot,
+                manager_tg_id,
+                sc_text,
                 reply_markup=sc_kb,
             )
         except Exception:
-            logging.exception("Не удалось отправить СТО карточку заявки с кнопками статуса")
+            logger.exception("Не удалось отправить СТО карточку заявки с кнопками статуса")
 
     # 3.3. Отказ всем остальным СТО по этой заявке
     for off in offers:
@@ -940,247 +957,25 @@ async def request_offer_choose(callback: CallbackQuery):
         # Уведомляем этот сервис, что клиент выбрал другого
         try:
             sc_other = await api_client.get_service_center(int(other_sc_id))
-            if isinstance(sc_other, dict):
-                owner_id = sc_other.get("user_id") or sc_other.get("owner_id")
-                if owner_id:
-                    manager = await api_client.get_user(int(owner_id))
-                    if isinstance(manager, dict):
-                        manager_tg = manager.get("telegram_id")
-                        if manager_tg:
-                            await callback.bot.send_message(
-                                chat_id=manager_tg,
-                                text=(
-                                    f"❌ Клиент выбрал другой сервис по заявке №{request_id:04d}.\n"
-                                    "Ваше предложение отмечено как отклонённое."
-                                ),
-                            )
+            manager_tg = await _get_sc_owner_telegram_id(sc_other)
+            if manager_tg:
+                await throttled_send(
+                    callback.bot,
+                    manager_tg,
+                    (
+                        f"❌ Клиент выбрал другой сервис по заявке №{request_id:04d}.\n"
+                        "Ваше предложение отмечено как отклонённое."
+                    ),
+                )
         except Exception:
             pass
 
     # 4) Сообщаем клиенту об успехе
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "✅ Вы выбрали сервис по этой заявке.\n\n"
         "Мы уведомили выбранный сервис и отклонили остальные предложения.\n"
         "Сервис сможет отмечать статус заявки (в работе / завершена / отменена).",
-        reply_markup=InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ К заявке",
-                        callback_data=f"req_view:{request_id}",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ В меню",
-                        callback_data="main:menu",
-                    )
-                ],
-            ]
-        ),
-    )
-    await callback.answer()
-
-    # ------------------------------------------------------------------
-    # 0) Загружаем все отклики по заявке и СТО, чтобы понять,
-    #    не выбран ли уже какой-то сервис.
-    # ------------------------------------------------------------------
-    try:
-        offers, sc_map = await _load_offers_with_sc(request_id)
-    except Exception:
-        offers, sc_map = [], {}
-
-    this_offer = None
-    for o in offers:
-        if int(o.get("id", 0)) == offer_id:
-            this_offer = o
-            break
-
-    # если этот отклик уже принят раньше — просто говорим клиенту
-    if this_offer:
-        st_raw = str(this_offer.get("status") or "").lower()
-        if st_raw == OFFER_ACCEPT_STATUS:
-            await callback.message.edit_text(
-                "✅ Этот сервис уже выбран по данной заявке.\n\n"
-                "При необходимости свяжитесь с сервисом для уточнения деталей.",
-                reply_markup=InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [
-                            InlineKeyboardButton(
-                                text="⬅️ К заявке",
-                                callback_data=f"req_view:{request_id}",
-                            )
-                        ],
-                        [
-                            InlineKeyboardButton(
-                                text="⬅️ В меню",
-                                callback_data="main:menu",
-                            )
-                        ],
-                    ]
-                ),
-            )
-            await callback.answer()
-            return
-
-    # проверяем, нет ли уже другого принятого отклика
-    existing_other_accepted = None
-    for o in offers:
-        oid = int(o.get("id", 0))
-        status_raw = str(o.get("status") or "").lower()
-        if oid != offer_id and status_raw == OFFER_ACCEPT_STATUS:
-            existing_other_accepted = o
-            break
-
-    if existing_other_accepted:
-        # уже есть другой выбранный сервис — не даём выбрать ещё один
-        await callback.message.edit_text(
-            "По этой заявке уже выбран другой автосервис.\n\n"
-            "Вы не можете принять несколько предложений одновременно.\n"
-            "Если нужно изменить выбор, свяжитесь с менеджером проекта.",
-            reply_markup=InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [
-                        InlineKeyboardButton(
-                            text="⬅️ К заявке",
-                            callback_data=f"req_view:{request_id}",
-                        )
-                    ],
-                    [
-                        InlineKeyboardButton(
-                            text="⬅️ В меню",
-                            callback_data="main:menu",
-                        )
-                    ],
-                ]
-            ),
-        )
-        await callback.answer()
-        return
-
-    # ------------------------------------------------------------------
-    # 1) Обновляем выбранный отклик — помечаем как принятый клиентом
-    # ------------------------------------------------------------------
-    try:
-        await api_client.update_offer(
-            offer_id,
-            {
-                "status": OFFER_ACCEPT_STATUS,
-            },
-        )
-    except Exception:
-        await callback.message.answer(
-            "Не удалось сохранить выбор сервиса. Попробуйте позже."
-        )
-        await callback.answer()
-        return
-
-    # ------------------------------------------------------------------
-    # 2) Обновляем заявку — привязываем выбранный сервис и переводим статус
-    # ------------------------------------------------------------------
-    try:
-        await api_client.update_request(
-            request_id,
-            {
-                "service_center_id": service_center_id,
-                "status": REQUEST_ACCEPT_STATUS,
-            },
-        )
-    except Exception:
-        # Считаем, что хотя бы выбор отклика сохранился.
-        await callback.message.answer(
-            "Сервис выбран, но не удалось обновить статус заявки.\n"
-            "Если что-то пойдёт не так — напишите менеджеру.",
-        )
-        # продолжаем, чтобы хотя бы уведомить СТО
-        # не делаем return
-
-    # ------------------------------------------------------------------
-    # 3) Уведомляем выбранный сервис и отклоняем остальных
-    # ------------------------------------------------------------------
-
-    # Уведомление выбранного сервиса
-    try:
-        chosen_sc = sc_map.get(service_center_id or -1)
-        if isinstance(chosen_sc, dict):
-            owner_id = chosen_sc.get("owner_id") or chosen_sc.get("user_id")
-            if owner_id:
-                manager = await api_client.get_user(int(owner_id))
-                if isinstance(manager, dict):
-                    manager_tg = manager.get("telegram_id")
-                    if manager_tg:
-                        await callback.bot.send_message(
-                            chat_id=manager_tg,
-                            text=(
-                                f"✅ Клиент выбрал ваше предложение "
-                                f"по заявке №{request_id}.\n\n"
-                                "Свяжитесь с клиентом для уточнения деталей."
-                            ),
-                        )
-    except Exception:
-        # если не получилось уведомить сервис — не мешаем клиенту
-        pass
-
-    # Отказ всем остальным СТО по этой заявке
-    for off in offers:
-        other_offer_id = off.get("id")
-        if not other_offer_id or int(other_offer_id) == offer_id:
-            continue
-
-        other_sc_id = off.get("service_center_id")
-
-        # 3.1. Ставим статус REJECTED в backend
-        try:
-            await api_client.update_offer(
-                int(other_offer_id),
-                {"status": "rejected"},
-            )
-        except Exception:
-            # не критично, идём дальше
-            pass
-
-        # 3.2. Отправляем уведомление этому сервису, что клиент выбрал другого
-        try:
-            sc = sc_map.get(other_sc_id or -1)
-            if isinstance(sc, dict):
-                owner_id = sc.get("owner_id") or sc.get("user_id")
-                if owner_id:
-                    manager = await api_client.get_user(int(owner_id))
-                    if isinstance(manager, dict):
-                        manager_tg = manager.get("telegram_id")
-                        if manager_tg:
-                            await callback.bot.send_message(
-                                chat_id=manager_tg,
-                                text=(
-                                    f"❌ Клиент выбрал другой сервис по заявке №{request_id}.\n"
-                                    "Ваше предложение отмечено как отклонённое."
-                                ),
-                            )
-        except Exception:
-            pass
-
-    # ------------------------------------------------------------------
-    # 4) Сообщаем клиенту об успехе
-    # ------------------------------------------------------------------
-    await callback.message.edit_text(
-        "✅ Вы выбрали сервис по этой заявке.\n\n"
-        "Мы уведомили выбранный сервис и отклонили остальные предложения.\n"
-        "В следующем шаге добавим полноценный чат по заявке.",
-        reply_markup=InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ К заявке",
-                        callback_data=f"req_view:{request_id}",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ В меню",
-                        callback_data="main:menu",
-                    )
-                ],
-            ]
-        ),
+        reply_markup=_kb_request_back(request_id),
     )
     await callback.answer()
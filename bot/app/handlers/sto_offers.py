@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import re
 from typing import Any, Dict, List, Optional, Tuple
 
 from aiogram import Router, F
@@ -13,8 +15,11 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 import logging
 
-from ..api_client import api_client
-from .general import get_main_menu
+from ..api_client import APIError, api_client
+from ..background import ack
+from ..safe_edit import safe_edit
+from ..throttling import throttled_send
+from .general import BTN_MAIN_MENU, NOT_REGISTERED_TEXT, get_main_menu
 
 logger = logging.getLogger(__name__)
 
@@ -46,10 +51,89 @@ OFFER_STATUS_LABELS: Dict[str, str] = {
 }
 
 
-# Какие строковые значения мы шлём в backend при выборе отклика
-# (если в OfferStatus другие значения — поменяй эти строки).
-OFFER_ACCEPT_STATUS = "accepted"          # OfferStatus.ACCEPTED.value
-REQUEST_ACCEPT_STATUS = "accepted_by_service"  # RequestStatus.ACCEPTED_BY_SERVICE.value
+# callback_data с числовым payload — разбираем одним скомпилированным regex
+_STO_REQ_VIEW_RE = re.compile(r"^sto:req_view:(\d+)$")
+_STO_REQ_STATUS_RE = re.compile(r"^sto:req_status:(\w+):(\d+)$")
+_STO_OFFER_START_RE = re.compile(r"^sto:offer_start:(\d+)$")
+_STO_DECLINE_CLIENT_RE = re.compile(r"^sto:decline_client:(\d+)$")
+
+
+# Клавиатуры без параметров собираем один раз при импорте
+KB_STO_MENU_BACK = InlineKeyboardMarkup(
+    inline_keyboard=(
+        (
+            InlineKeyboardButton(
+                text="⬅️ В меню СТО",
+                callback_data="main:sto_menu",
+            ),
+        ),
+        (
+            InlineKeyboardButton(
+                text="⬅️ В главное меню",
+                callback_data="main:menu",
+            ),
+        ),
+    )
+)
+
+KB_STO_REQUESTS_BACK = InlineKeyboardMarkup(
+    inline_keyboard=(
+        (InlineKeyboardButton(text="📥 Заявки клиентов", callback_data="sto:req_list"),),
+        (InlineKeyboardButton(text="⬅️ В меню СТО", callback_data="main:sto_menu"),),
+    )
+)
+
+
+# Уведомление клиенту о новом отклике (sto_offer_text)
+_NEW_OFFER_CLIENT_TEMPLATE = (
+    "📩 <b>Новый отклик по вашей заявке №{request_id:04d}</b>\n\n"
+    "<b>Автосервис:</b> {sc_name}\n\n"
+    "{text}\n\n"
+    "Вы можете принять или отклонить это предложение "
+    "в этом сообщении или в разделе «📄 Мои заявки»."
+)
+
+
+def _build_new_offer_client_kb(
+    request_id: int,
+    offer_id: Optional[int],
+    service_center_id: int,
+    manager_tg_id: int,
+) -> InlineKeyboardMarkup:
+    """
+    Кнопки под уведомлением клиенту о новом отклике.
+    Без offer_id (backend не вернул id) — только связь с менеджером.
+    """
+    buttons: List[List[InlineKeyboardButton]] = []
+
+    if offer_id is not None:
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    text="✅ Принять условия",
+                    callback_data=f"req_offer:choose:{request_id}:{offer_id}:{service_center_id}",
+                )
+            ]
+        )
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    text="❌ Отклонить предложение",
+                    callback_data=f"req_offer:decline:{request_id}:{offer_id}",
+                )
+            ]
+        )
+
+    buttons.append(
+        [
+            InlineKeyboardButton(
+                text="💬 Написать менеджеру",
+                url=f"tg://user?id={manager_tg_id}",
+            )
+        ]
+    )
+
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 class STOOfferFSM(StatesGroup):
@@ -73,6 +157,13 @@ def _offer_status_to_text(status: Optional[str]) -> str:
     return OFFER_STATUS_LABELS.get(status, status)
 
 
+def _shorten(text: str, limit: int) -> str:
+    """
+    Обрезать text до limit символов (с «...» в конце, если обрезали).
+    """
+    return text if len(text) <= limit else f"{text[:limit - 3]}..."
+
+
 async def _back_to_main_menu(message: Message, telegram_id: int):
     user = await api_client.get_user_by_telegram(telegram_id)
     role: Optional[str] = None
@@ -100,8 +191,7 @@ async def _get_current_user(message_or_cb) -> Optional[Dict[str, Any]]:
     user = await api_client.get_user_by_telegram(tg_id)
     if not user:
         await message.answer(
-            "Похоже, вы ещё не зарегистрированы.\n"
-            "Нажмите /start, чтобы пройти короткую регистрацию.",
+            NOT_REGISTERED_TEXT,
         )
         return None
     return user
@@ -124,14 +214,7 @@ def _build_requests_list_kb(requests: List[Dict[str, Any]]) -> InlineKeyboardMar
                 ]
             )
 
-    rows.append(
-        [
-            InlineKeyboardButton(
-                text="⬅️ В меню",
-                callback_data="main:menu",
-            )
-        ]
-    )
+    rows.append([BTN_MAIN_MENU])
 
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
@@ -155,12 +238,7 @@ def _build_request_detail_kb(request_id: int) -> InlineKeyboardMarkup:
                     callback_data="req_list:back",
                 )
             ],
-            [
-                InlineKeyboardButton(
-                    text="⬅️ В меню",
-                    callback_data="main:menu",
-                )
-            ],
+            [BTN_MAIN_MENU],
         ]
     )
 
@@ -191,14 +269,7 @@ def _build_offers_list_kb(request_id: int, offers: List[Dict[str, Any]]) -> Inli
             )
         ]
     )
-    rows.append(
-        [
-            InlineKeyboardButton(
-                text="⬅️ В меню",
-                callback_data="main:menu",
-            )
-        ]
-    )
+    rows.append([BTN_MAIN_MENU])
 
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
@@ -228,12 +299,7 @@ def _build_offer_detail_kb(
                     callback_data=f"req_offers:list:{request_id}",
                 )
             ],
-            [
-                InlineKeyboardButton(
-                    text="⬅️ В меню",
-                    callback_data="main:menu",
-                )
-            ],
+            [BTN_MAIN_MENU],
         ]
     )
 
@@ -246,7 +312,7 @@ def _build_offer_detail_kb(
 async def _send_requests_list(message: Message, user_id: int):
     try:
         requests = await api_client.list_requests_by_user(user_id)
-    except Exception:
+    except APIError:
         await message.answer(
             "Не удалось загрузить список заявок. Попробуйте позже."
         )
@@ -265,9 +331,7 @@ async def _send_requests_list(message: Message, user_id: int):
     for req in requests:
         req_id = req.get("id")
         status = _status_to_text(req.get("status"))
-        desc = (req.get("description") or "").strip()
-        if len(desc) > 60:
-            desc = desc[:57] + "..."
+        desc = _shorten((req.get("description") or "").strip(), 60)
 
         lines.append(f"#{req_id} — {status}")
         if desc:
@@ -306,7 +370,7 @@ async def my_requests_from_menu(callback: CallbackQuery):
     """
     user = await _get_current_user(callback)
     if not user:
-        await callback.answer()
+        ack(callback)
         return
 
     user_id = user["id"] if isinstance(user, dict) else getattr(user, "id", None)
@@ -314,11 +378,11 @@ async def my_requests_from_menu(callback: CallbackQuery):
         await callback.message.answer(
             "Не удалось определить пользователя. Попробуйте позже."
         )
-        await callback.answer()
+        ack(callback)
         return
 
     await _send_requests_list(callback.message, user_id)
-    await callback.answer()
+    ack(callback)
 
 
 @router.callback_query(F.data == "req_list:back")
@@ -328,7 +392,7 @@ async def back_to_requests_list(callback: CallbackQuery):
     """
     user = await _get_current_user(callback)
     if not user:
-        await callback.answer()
+        ack(callback)
         return
 
     user_id = user["id"] if isinstance(user, dict) else getattr(user, "id", None)
@@ -336,11 +400,11 @@ async def back_to_requests_list(callback: CallbackQuery):
         await callback.message.answer(
             "Не удалось определить пользователя. Попробуйте позже."
         )
-        await callback.answer()
+        ack(callback)
         return
 
     await _send_requests_list(callback.message, user_id)
-    await callback.answer()
+    ack(callback)
 
 
 # ---------------------------------------------------------------------------
@@ -351,7 +415,7 @@ async def back_to_requests_list(callback: CallbackQuery):
 async def _load_request_detail(request_id: int) -> Optional[Dict[str, Any]]:
     try:
         return await api_client.get_request(request_id)
-    except Exception:
+    except APIError:
         return None
 
 
@@ -369,11 +433,12 @@ async def request_detail(callback: CallbackQuery):
 
     request = await _load_request_detail(request_id)
     if not request:
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "Не удалось загрузить заявку. Возможно, она была удалена.",
             reply_markup=_build_request_detail_kb(request_id),
         )
-        await callback.answer()
+        ack(callback)
         return
 
     status = _status_to_text(request.get("status"))
@@ -428,11 +493,12 @@ async def request_detail(callback: CallbackQuery):
         "Ниже можно посмотреть отклики СТО по этой заявке.",
     ]
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "\n".join(text_lines),
         reply_markup=_build_request_detail_kb(request_id),
     )
-    await callback.answer()
+    ack(callback)
 
 
 # ---------------------------------------------------------------------------
@@ -451,7 +517,7 @@ async def _load_offers_with_sc(
     """
     try:
         offers = await api_client.list_offers_by_request(request_id)
-    except Exception:
+    except APIError:
         return [], {}
 
     if not offers:
@@ -463,7 +529,7 @@ async def _load_offers_with_sc(
     for sc_id in sc_ids:
         try:
             sc_data = await api_client.get_service_center(sc_id)  # type: ignore[arg-type]
-        except Exception:
+        except APIError:
             sc_data = None
         if isinstance(sc_data, dict):
             sc_map[sc_id] = sc_data
@@ -486,13 +552,14 @@ async def request_offers_list(callback: CallbackQuery):
     offers, sc_map = await _load_offers_with_sc(request_id)
 
     if not offers:
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "<b>📨 Отклики по заявке</b>\n\n"
             "Пока по этой заявке нет откликов.\n"
             "Как только сервисы ответят — вы увидите их здесь.",
             reply_markup=_build_offers_list_kb(request_id, []),
         )
-        await callback.answer()
+        ack(callback)
         return
 
     lines: List[str] = [
@@ -527,18 +594,15 @@ async def request_offers_list(callback: CallbackQuery):
         lines.append(f"Цена: {price_text}")
         lines.append(f"Срок: {eta_text}")
         if comment:
-            if len(comment) > 80:
-                comment_short = comment[:77] + "..."
-            else:
-                comment_short = comment
-            lines.append(f"Комментарий: {comment_short}")
+            lines.append(f"Комментарий: {_shorten(comment, 80)}")
         lines.append("")
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "\n".join(lines),
         reply_markup=_build_offers_list_kb(request_id, offers),
     )
-    await callback.answer()
+    ack(callback)
 
 
 @router.callback_query(F.data.startswith("req_offer:view:"))
@@ -562,11 +626,12 @@ async def request_offer_detail(callback: CallbackQuery):
     )
 
     if not offer:
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "Не удалось найти этот отклик. Возможно, он был удалён.",
             reply_markup=_build_offers_list_kb(request_id, offers),
         )
-        await callback.answer()
+        ack(callback)
         return
 
     sc_id = offer.get("service_center_id")
@@ -610,83 +675,17 @@ async def request_offer_detail(callback: CallbackQuery):
         service_center_id=sc_id,
     )
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "\n".join(text_lines),
         reply_markup=kb,
     )
-    await callback.answer()
+    ack(callback)
 
 
-@router.callback_query(F.data.startswith("req_offer:choose:"))
-async def request_offer_choose(callback: CallbackQuery):
-    """
-    Клиент выбирает конкретный отклик (выбирает СТО).
-    callback_data: req_offer:choose:{request_id}:{offer_id}:{service_center_id}
-    """
-    try:
-        _, _, raw_req_id, raw_offer_id, raw_sc_id = callback.data.split(":", maxsplit=4)
-        request_id = int(raw_req_id)
-        offer_id = int(raw_offer_id)
-        service_center_id = int(raw_sc_id)
-    except Exception:
-        await callback.answer("Некорректные данные отклика.")
-        return
+# Выбор отклика клиентом (req_offer:choose:...) обрабатывает
+# requests_view.request_offer_choose — атомарно через claim_request.
 
-    # 1) Обновляем отклик — помечаем как принятый клиентом
-    try:
-        await api_client.update_offer(
-            offer_id,
-            {
-                "status": OFFER_ACCEPT_STATUS,
-            },
-        )
-    except Exception:
-        await callback.message.answer(
-            "Не удалось сохранить выбор сервиса. Попробуйте позже."
-        )
-        await callback.answer()
-        return
-
-    # 2) Обновляем заявку — привязываем выбранный сервис и переводим статус
-    try:
-        await api_client.update_request(
-            request_id,
-            {
-                "service_center_id": service_center_id,
-                "status": REQUEST_ACCEPT_STATUS,
-            },
-        )
-    except Exception:
-        # Считаем, что хотя бы выбор отклика сохранился.
-        await callback.message.answer(
-            "Сервис выбран, но не удалось обновить статус заявки.\n"
-            "Если что-то пойдёт не так — напишите менеджеру.",
-        )
-        await callback.answer()
-        return
-
-    await callback.message.edit_text(
-        "✅ Вы выбрали сервис по этой заявке.\n\n"
-        "Мы уведомим сервис о вашем выборе.\n"
-        "В следующем шаге мы добавим полноценный чат по заявке.",
-        reply_markup=InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ К заявке",
-                        callback_data=f"req_view:{request_id}",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ В меню",
-                        callback_data="main:menu",
-                    )
-                ],
-            ]
-        ),
-    )
-    await callback.answer()
 
 # ---------------------------------------------------------------------------
 # БЛОК: Заявки клиентов для СТО
@@ -697,18 +696,15 @@ async def _get_service_center_for_owner(telegram_id: int) -> Optional[Dict[str,
     """
     Внутренний helper: по telegram_id владельца находим его СТО.
     Пока берём первый сервис из списка.
+    Работать с заявками может только пользователь с ролью service_owner,
+    а backend (by-owner-tg) отдаёт только активные, прошедшие модерацию СТО.
     """
     user = await api_client.get_user_by_telegram(telegram_id)
     if not isinstance(user, dict) or user.get("role") != "service_owner":
         return None
 
-    user_id = user["id"]
-    sc_list = await api_client.list_service_centers_by_user(user_id)
-
-    if not isinstance(sc_list, list) or not sc_list:
-        return None
-
-    return sc_list[0]
+    sc = await api_client.get_my_service_center(telegram_id)
+    return sc if isinstance(sc, dict) else None
 
 
 @router.callback_query(F.data == "sto:req_list")
@@ -728,7 +724,7 @@ async def sto_requests_list(callback: CallbackQuery):
             "или ваш профиль не является владельцем СТО.\n\n"
             "Зайдите в раздел «Регистрация СТО» в главном меню.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     sc_id = sc.get("id")
@@ -736,44 +732,29 @@ async def sto_requests_list(callback: CallbackQuery):
         await callback.message.answer(
             "Не удалось определить ваш автосервис. Попробуйте позже.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     # Получаем заявки, которые backend реально разослал этому СТО
     try:
         requests = await api_client.list_requests_for_service_center(int(sc_id))
-    except Exception as e:
+    except APIError as e:
         logger.exception("Не удалось получить заявки для СТО %s: %s", sc_id, e)
         await callback.message.answer(
             "Не удалось получить список заявок. Попробуйте позже.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     if not isinstance(requests, list) or not requests:
-        kb = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ В меню СТО",
-                        callback_data="main:sto_menu",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ В главное меню",
-                        callback_data="main:menu",
-                    )
-                ],
-            ]
-        )
-        await callback.message.edit_text(
+        await safe_edit(
+            callback.message,
             "Пока нет заявок, отправленных в ваш автосервис.\n\n"
             "Как только клиенты будут выбирать ваш профиль или отправлять "
             "заявки по вашему профилю, они появятся здесь.",
-            reply_markup=kb,
+            reply_markup=KB_STO_MENU_BACK,
         )
-        await callback.answer()
+        ack(callback)
         return
 
     # Формируем список заявок
@@ -819,32 +800,27 @@ async def sto_requests_list(callback: CallbackQuery):
 
     kb = InlineKeyboardMarkup(inline_keyboard=buttons)
 
-    await callback.message.edit_text("\n".join(lines), reply_markup=kb)
-    await callback.answer()
+    await safe_edit(callback.message, "\n".join(lines), reply_markup=kb)
+    ack(callback)
 
 
-@router.callback_query(F.data.startswith("sto:req_view:"))
-async def sto_request_view(callback: CallbackQuery):
+@router.callback_query(F.data.regexp(_STO_REQ_VIEW_RE).as_("req_match"))
+async def sto_request_view(callback: CallbackQuery, req_match: re.Match[str]):
     """
     Карточка конкретной заявки для СТО.
     """
-    try:
-        _, _, req_id_str = callback.data.split(":", maxsplit=2)
-        request_id = int(req_id_str)
-    except (ValueError, AttributeError):
-        await callback.answer()
-        return
+    request_id = int(req_match.group(1))
 
     try:
         request = await api_client.get_request(request_id)
-    except Exception:
+    except APIError:
         request = None
 
     if not isinstance(request, dict):
         await callback.message.answer(
             "Не удалось получить данные по заявке. Попробуйте позже.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     status_raw = str(request.get("status") or "").lower()
@@ -891,7 +867,7 @@ async def sto_request_view(callback: CallbackQuery):
     )
 
     await callback.message.answer("\n".join(text_lines), reply_markup=kb)
-    await callback.answer()
+    ack(callback)
 
 
 def _build_sto_request_status_kb(current_status: str, request_id: int) -> InlineKeyboardMarkup:
@@ -955,21 +931,18 @@ def _build_sto_request_status_kb(current_status: str, request_id: int) -> Inline
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-@router.callback_query(F.data.startswith("sto:req_status:"))
-async def sto_request_status_change(callback: CallbackQuery):
+@router.callback_query(F.data.regexp(_STO_REQ_STATUS_RE).as_("status_match"))
+async def sto_request_status_change(
+    callback: CallbackQuery,
+    status_match: re.Match[str],
+):
     """
     Менеджер СТО меняет статус заявки:
     sto:req_status:{status}:{request_id}
       - status: in_work / done / cancelled
     """
-    import logging
-
-    try:
-        _, _, status_key, raw_req_id = callback.data.split(":", maxsplit=3)
-        request_id = int(raw_req_id)
-    except Exception:
-        await callback.answer("Некорректные данные статуса.")
-        return
+    status_key = status_match.group(1)
+    request_id = int(status_match.group(2))
 
     # Определяем новый статус заявки в терминах backend
     status_map = {
@@ -990,7 +963,7 @@ async def sto_request_status_change(callback: CallbackQuery):
         await callback.message.answer(
             "Не удалось определить ваш автосервис. Попробуйте позже.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     sc_id = int(sc["id"])
@@ -998,19 +971,19 @@ async def sto_request_status_change(callback: CallbackQuery):
     # Получаем заявку и проверяем, что именно этот СТО является ответственным
     try:
         request = await api_client.get_request(request_id)
-    except Exception as e:
-        logging.exception("Не удалось получить заявку %s: %s", request_id, e)
+    except APIError as e:
+        logger.exception("Не удалось получить заявку %s: %s", request_id, e)
         await callback.message.answer(
             "Не удалось обновить заявку. Попробуйте позже.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     if not isinstance(request, dict):
         await callback.message.answer(
             "Заявка не найдена.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     req_sc_id = request.get("service_center_id")
@@ -1018,7 +991,7 @@ async def sto_request_status_change(callback: CallbackQuery):
         await callback.message.answer(
             "Вы не являетесь ответственным сервисом по этой заявке.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     # Обновляем статус заявки в backend
@@ -1027,12 +1000,12 @@ async def sto_request_status_change(callback: CallbackQuery):
             request_id,
             {"status": new_status_value},
         )
-    except Exception as e:
-        logging.exception("Не удалось обновить статус заявки %s: %s", request_id, e)
+    except APIError as e:
+        logger.exception("Не удалось обновить статус заявки %s: %s", request_id, e)
         await callback.message.answer(
             "Не удалось обновить статус заявки. Попробуйте позже.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     # Уведомляем клиента о смене статуса
@@ -1043,15 +1016,16 @@ async def sto_request_status_change(callback: CallbackQuery):
             if isinstance(user, dict):
                 client_tg = user.get("telegram_id")
                 if client_tg:
-                    await callback.bot.send_message(
-                        chat_id=client_tg,
-                        text=(
+                    await throttled_send(
+                        callback.bot,
+                        client_tg,
+                        (
                             f"{status_message_for_client}\n\n"
                             f"Заявка №{request_id:04d}."
                         ),
                     )
     except Exception:
-        logging.exception("Не удалось отправить уведомление клиенту о смене статуса.")
+        logger.exception("Не удалось отправить уведомление клиенту о смене статуса.")
 
     # Обновляем сообщение для СТО
     base_text = callback.message.text or ""
@@ -1063,35 +1037,37 @@ async def sto_request_status_change(callback: CallbackQuery):
 
     new_text = base_text.split("\n\nТекущий статус:", 1)[0] + status_suffix
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         new_text,
         reply_markup=_build_sto_request_status_kb(new_status_value, request_id),
     )
     await callback.answer("Статус заявки обновлён.")
 
 
-@router.callback_query(F.data.startswith("sto:offer_start:"))
-async def sto_offer_start(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(F.data.regexp(_STO_OFFER_START_RE).as_("req_match"))
+async def sto_offer_start(
+    callback: CallbackQuery,
+    state: FSMContext,
+    req_match: re.Match[str],
+):
     """
     Менеджер СТО выбрал заявку → предлагаем:
     - отправить условия
     - отказаться от клиента
     - отменить отклик
     """
-    try:
-        _, _, raw_req_id = callback.data.split(":", maxsplit=2)
-        request_id = int(raw_req_id)
-    except:
-        await callback.answer("Некорректные данные заявки.")
-        return
+    request_id = int(req_match.group(1))
 
-    await state.clear()
-    await state.update_data(request_id=request_id)
+    # новый сценарий: старые данные заменяем одним set_data
+    # (clear + update_data — это ещё чтение и лишняя запись в storage)
+    await state.set_data({"request_id": request_id})
 
     # 🟢 ВАЖНО: выставляем состояние для ввода текста!
     await state.set_state(STOOfferFSM.waiting_text)
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         f"Вы выбрали заявку №{request_id}.\n\n"
         "Отправьте <b>одним сообщением</b> условия для клиента: стоимость, сроки, "
         "когда можете принять автомобиль и т.п.\n\n"
@@ -1113,41 +1089,37 @@ async def sto_offer_start(callback: CallbackQuery, state: FSMContext):
             ]
         ),
     )
-    await callback.answer()
+    ack(callback)
 
 
 @router.callback_query(F.data.startswith("sto:offer_cancel:"))
 async def sto_offer_cancel(callback: CallbackQuery, state: FSMContext):
     await state.clear()
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         "Отклик отменён.",
-        reply_markup=InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text="📥 Заявки клиентов", callback_data="sto:req_list")],
-                [InlineKeyboardButton(text="⬅️ В меню СТО", callback_data="main:sto_menu")],
-            ]
-        ),
+        reply_markup=KB_STO_REQUESTS_BACK,
     )
-    await callback.answer()
+    ack(callback)
 
 
-@router.callback_query(F.data.startswith("sto:decline_client:"))
-async def sto_offer_decline_start(callback: CallbackQuery, state: FSMContext):
-    try:
-        _, _, req_id = callback.data.split(":", maxsplit=2)
-        request_id = int(req_id)
-    except:
-        await callback.answer("Некорректные данные заявки.")
-        return
+@router.callback_query(F.data.regexp(_STO_DECLINE_CLIENT_RE).as_("req_match"))
+async def sto_offer_decline_start(
+    callback: CallbackQuery,
+    state: FSMContext,
+    req_match: re.Match[str],
+):
+    request_id = int(req_match.group(1))
 
-    await state.update_data(request_id=request_id)
+    await state.set_data({"request_id": request_id})
     await state.set_state(STOOfferFSM.waiting_decline_reason)
 
-    await callback.message.edit_text(
+    await safe_edit(
+        callback.message,
         f"Укажите причину отказа по заявке №{request_id} одним сообщением.\n\n"
         "<i>Например: нет нужных запчастей</i>",
     )
-    await callback.answer()
+    ack(callback)
 
 
 @router.message(STOOfferFSM.waiting_text)
@@ -1175,12 +1147,19 @@ async def sto_offer_text(message: Message, state: FSMContext):
         )
         return
 
-    # 2. Находим СТО, от имени которого пишет менеджер
-    try:
-        sc = await api_client.get_my_service_center(message.from_user.id)
-    except Exception as e:
-        logger.exception("Не удалось получить сервис по telegram_id менеджера: %s", e)
+    # 2. Параллельно: СТО, от имени которого пишет менеджер,
+    #    и заявка (в ней уже есть client_telegram_id для уведомления клиента)
+    sc, req = await asyncio.gather(
+        _get_service_center_for_owner(message.from_user.id),
+        api_client.get_request(int(request_id)),
+        return_exceptions=True,
+    )
+    if isinstance(sc, BaseException):
+        logger.error("Не удалось получить сервис по telegram_id менеджера: %s", sc, exc_info=sc)
         sc = None
+    if isinstance(req, BaseException):
+        logger.error("Не удалось получить заявку %s: %s", request_id, req, exc_info=req)
+        req = None
 
     if not isinstance(sc, dict) or not sc.get("id"):
         await state.clear()
@@ -1204,7 +1183,7 @@ async def sto_offer_text(message: Message, state: FSMContext):
     # 4. Создаём Offer в backend
     try:
         offer = await api_client.create_offer(payload)
-    except Exception as e:
+    except APIError as e:
         logger.exception("Не удалось создать отклик СТО: %s", e)
         await state.clear()
         await message.answer(
@@ -1220,96 +1199,65 @@ async def sto_offer_text(message: Message, state: FSMContext):
         except Exception:
             offer_id = None
 
-    # 5. Ищем клиента по заявке, чтобы отправить ему уведомление
+    # 5. Клиент по заявке: telegram_id backend отдаёт вместе с заявкой,
+    #    отдельный запрос пользователя — только если поля нет
     client_tg_id: Optional[int] = None
-    try:
-        req = await api_client.get_request(int(request_id))
-    except Exception as e:
-        logger.exception("Не удалось получить заявку %s: %s", request_id, e)
-        req = None
-
     if isinstance(req, dict):
+        client_tg_id = req.get("client_telegram_id")
         user_id = req.get("user_id")
-        if user_id:
+        if not client_tg_id and user_id:
             try:
                 client = await api_client.get_user(int(user_id))
-            except Exception as e:
+            except APIError as e:
                 logger.exception("Не удалось получить пользователя %s: %s", user_id, e)
                 client = None
 
             if isinstance(client, dict):
                 client_tg_id = client.get("telegram_id")
 
-    # 6. Отправляем клиенту сообщение о новом отклике
+    # 6. Готовим сообщение клиенту о новом отклике
+    #    (отправим вместе с ответом менеджеру, см. п. 7)
+    notify_client = None
     if client_tg_id:
-        # Кнопки для клиента
-        buttons: List[List[InlineKeyboardButton]] = []
-
-        if offer_id is not None:
-            buttons.append(
-                [
-                    InlineKeyboardButton(
-                        text="✅ Принять условия",
-                        callback_data=f"req_offer:choose:{int(request_id)}:{offer_id}:{service_center_id}",
-                    )
-                ]
-            )
-            buttons.append(
-                [
-                    InlineKeyboardButton(
-                        text="❌ Отклонить предложение",
-                        callback_data=f"req_offer:decline:{int(request_id)}:{offer_id}",
-                    )
-                ]
-            )
-
-        buttons.append(
-            [
-                InlineKeyboardButton(
-                    text="💬 Написать менеджеру",
-                    url=f"tg://user?id={message.from_user.id}",
-                )
-            ]
+        notify_client = throttled_send(
+            message.bot,
+            client_tg_id,
+            _NEW_OFFER_CLIENT_TEMPLATE.format(
+                request_id=int(request_id),
+                sc_name=sc_name,
+                text=text,
+            ),
+            reply_markup=_build_new_offer_client_kb(
+                int(request_id),
+                offer_id,
+                service_center_id,
+                message.from_user.id,
+            ),
         )
 
-        kb_client = InlineKeyboardMarkup(inline_keyboard=buttons)
-
-        try:
-            await message.bot.send_message(
-                chat_id=client_tg_id,
-                text=(
-                    f"📩 <b>Новый отклик по вашей заявке №{int(request_id):04d}</b>\n\n"
-                    f"<b>Автосервис:</b> {sc_name}\n\n"
-                    f"{text}\n\n"
-                    "Вы можете принять или отклонить это предложение "
-                    "в этом сообщении или в разделе «📄 Мои заявки»."
-                ),
-                reply_markup=kb_client,
-            )
-        except Exception as e:
-            logger.exception(
-                "Не удалось отправить клиенту уведомление об отклике: %s", e
-            )
-
-    # 7. Очищаем FSM и отвечаем менеджеру
+    # 7. Очищаем FSM и отвечаем менеджеру — параллельно с уведомлением клиента,
+    #    эти два запроса к Telegram друг от друга не зависят
     await state.clear()
-    await message.answer(
+    reply_manager = message.answer(
         "✅ Ваше предложение отправлено клиенту.\n\n"
         "Клиент получит уведомление и сможет принять или отклонить условия.",
-        reply_markup=InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="📥 Заявки клиентов",
-                        callback_data="sto:req_list",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="⬅️ В меню СТО",
-                        callback_data="main:sto_menu",
-                    )
-                ],
-            ]
-        ),
+        reply_markup=KB_STO_REQUESTS_BACK,
+    )
+
+    if notify_client is None:
+        await reply_manager
+        return
+
+    client_res, manager_res = await asyncio.gather(
+        notify_client,
+        reply_manager,
+        return_exceptions=True,
     )
+    if isinstance(client_res, BaseException):
+        logger.error(
+            "Не удалось отправить клиенту уведомление об отклике: %s",
+            client_res,
+            exc_info=client_res,
+        )
+    if isinstance(manager_res, BaseException):
+        raise manager_res
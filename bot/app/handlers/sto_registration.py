@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import os
+from functools import lru_cache
 
 from aiogram import Router, F
 from aiogram.types import (
@@ -13,13 +15,29 @@ from aiogram.types import (
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import StateFilter
 
-from ..api_client import api_client
+from ..api_client import APIError, api_client
+from ..background import ack, spawn
+from ..text_commands import is_cancel, is_one_of
+from ..throttling import throttled_send
+from ..middlewares import forget_current_user
 from ..states.user_states import STOEdit  # <-- добавили
+from .general import get_main_menu
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+# Ответы, которыми пользователь пропускает/очищает сайт (уже в нижнем регистре).
+_SKIP_WORDS = frozenset({"пропустить", "нет", "-", "no"})
+
+
+def _is_skip(text: str | None) -> bool:
+    """
+    Пользователь хочет пропустить шаг?
+    """
+    return is_one_of(text, _SKIP_WORDS)
+
 
 # ---------------------------------------------------------------------------
 # FSM регистрации СТО
@@ -42,7 +60,7 @@ class STORegister(StatesGroup):
 # код -> подпись
 # ---------------------------------------------------------------------------
 
-SERVICE_SPECIALIZATION_OPTIONS: list[tuple[str, str]] = [
+SERVICE_SPECIALIZATION_OPTIONS: tuple[tuple[str, str], ...] = (
     ("wash", "🧼 Автомойка"),
     ("tire", "🛞 Шиномонтаж"),
     ("electric", "⚡ Автоэлектрик"),
@@ -53,7 +71,9 @@ SERVICE_SPECIALIZATION_OPTIONS: list[tuple[str, str]] = [
     ("agg_starter", "🔋 Стартеры"),
     ("agg_generator", "⚡ Генераторы"),
     ("agg_steering", "🛞 Рулевые рейки"),
-]
+)
+
+_SPEC_CODES = frozenset(code for code, _ in SERVICE_SPECIALIZATION_OPTIONS)
 
 
 # ---------------------------------------------------------------------------
@@ -63,34 +83,44 @@ SERVICE_SPECIALIZATION_OPTIONS: list[tuple[str, str]] = [
 
 def kb_org_type() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="ФЛ / Частный мастер",
                     callback_data="sto_type_ind",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="ЮЛ / Автосервис",
                     callback_data="sto_type_comp",
-                )
-            ],
-            [
+                ),
+            ),
+            (
                 InlineKeyboardButton(
                     text="⬅️ В меню",
                     callback_data="sto_back_menu",
-                )
-            ],
-        ]
+                ),
+            ),
+        )
     )
 
 
-def kb_specs(selected: set[str]) -> InlineKeyboardMarkup:
+# Выбор типа организации — статичный, собираем один раз
+KB_STO_ORG_TYPE = kb_org_type()
+
+# Снятие reply-клавиатуры (после запроса геопозиции)
+KB_REMOVE = ReplyKeyboardRemove()
+
+
+@lru_cache(maxsize=1024)
+def kb_specs(selected: frozenset[str]) -> InlineKeyboardMarkup:
     """
     Клава выбора специализаций (регистрация).
 
     selected — множество кодов из SERVICE_SPECIALIZATION_OPTIONS.
+    Состояний конечное число (2^N), поэтому готовые клавиатуры кэшируем:
+    на каждый тап по специализации — только поиск в кэше.
     """
     rows: list[list[InlineKeyboardButton]] = []
 
@@ -126,9 +156,11 @@ def kb_specs(selected: set[str]) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def kb_specs_edit(selected: set[str]) -> InlineKeyboardMarkup:
+@lru_cache(maxsize=1024)
+def kb_specs_edit(selected: frozenset[str]) -> InlineKeyboardMarkup:
     """
     Клава выбора специализаций при РЕДАКТИРОВАНИИ профиля СТО.
+    Кэшируется так же, как kb_specs.
     """
     rows: list[list[InlineKeyboardButton]] = []
 
@@ -163,6 +195,25 @@ def kb_specs_edit(selected: set[str]) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+# Клавиатуры без состояния собираем один раз при импорте.
+KB_STO_REG_CONFIRM = InlineKeyboardMarkup(
+    inline_keyboard=(
+        (
+            InlineKeyboardButton(
+                text="✅ Подтвердить",
+                callback_data="sto_reg_yes",
+            ),
+        ),
+        (
+            InlineKeyboardButton(
+                text="❌ Отмена",
+                callback_data="sto_reg_no",
+            ),
+        ),
+    )
+)
+
+
 # ---------------------------------------------------------------------------
 # Вспомогалки для меню СТО
 # ---------------------------------------------------------------------------
@@ -199,29 +250,77 @@ def _build_sto_menu_text(sc: dict) -> str:
     return "\n".join(lines)
 
 
+KB_STO_MENU = InlineKeyboardMarkup(
+    inline_keyboard=(
+        (
+            InlineKeyboardButton(
+                text="✏️ Редактировать профиль",
+                callback_data="sto:edit_profile",
+            ),
+        ),
+        (
+            InlineKeyboardButton(
+                text="📥 Заявки клиентов",
+                callback_data="sto:req_list",
+            ),
+        ),
+        (
+            InlineKeyboardButton(
+                text="⬅️ В главное меню",
+                callback_data="main:menu",
+            ),
+        ),
+    )
+)
+
+
 def _build_sto_menu_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="✏️ Редактировать профиль",
-                    callback_data="sto:edit_profile",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="📥 Заявки клиентов",
-                    callback_data="sto:req_list",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="⬅️ В главное меню",
-                    callback_data="main:menu",
-                )
-            ],
-        ]
+    return KB_STO_MENU
+
+
+# Выбор поля при редактировании профиля СТО
+KB_STO_EDIT_FIELDS = InlineKeyboardMarkup(
+    inline_keyboard=(
+        (
+            InlineKeyboardButton(
+                text="📛 Название",
+                callback_data="sto_edit_field:name",
+            ),
+            InlineKeyboardButton(
+                text="📍 Адрес",
+                callback_data="sto_edit_field:address",
+            ),
+        ),
+        (
+            InlineKeyboardButton(
+                text="📌 Геолокация",
+                callback_data="sto_edit_field:geo",
+            ),
+            InlineKeyboardButton(
+                text="📞 Телефон",
+                callback_data="sto_edit_field:phone",
+            ),
+        ),
+        (
+            InlineKeyboardButton(
+                text="🌐 Сайт / соцсети",
+                callback_data="sto_edit_field:website",
+            ),
+        ),
+        (
+            InlineKeyboardButton(
+                text="🔧 Специализации",
+                callback_data="sto_edit_field:specializations",
+            ),
+        ),
+        (
+            InlineKeyboardButton(
+                text="⬅️ В меню СТО",
+                callback_data="main:sto_menu",
+            ),
+        ),
     )
+)
 
 
 # ---------------------------------------------------------------------------
@@ -235,7 +334,7 @@ async def _start_sto_registration(message: Message, state: FSMContext):
     await message.answer(
         "Регистрация автосервиса.\n\n"
         "Выберите тип организации:",
-        reply_markup=kb_org_type(),
+        reply_markup=KB_STO_ORG_TYPE,
     )
 
 
@@ -243,14 +342,14 @@ async def _start_sto_registration(message: Message, state: FSMContext):
 @router.callback_query(F.data == "menu_service")
 async def sto_start_legacy(callback: CallbackQuery, state: FSMContext):
     await _start_sto_registration(callback.message, state)
-    await callback.answer()
+    ack(callback)
 
 
 # Новый вход из главного меню (кнопка «🔧 Зарегистрировать СТО»)
 @router.callback_query(F.data == "main:sto_register")
 async def sto_start_from_main(callback: CallbackQuery, state: FSMContext):
     await _start_sto_registration(callback.message, state)
-    await callback.answer()
+    ack(callback)
 
 
 # ---------------------------------------------------------------------------
@@ -258,8 +357,12 @@ async def sto_start_from_main(callback: CallbackQuery, state: FSMContext):
 # ---------------------------------------------------------------------------
 
 
-@router.callback_query(F.data == "main:sto_menu")
-async def sto_menu_entry(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(F.data == "main:sto_menu", flags={"current_user": True})
+async def sto_menu_entry(
+    callback: CallbackQuery,
+    state: FSMContext,
+    current_user: dict | None = None,
+):
     """
     Вход в меню СТО из главного меню.
     Показываем краткую инфу по сервису и даём кнопки действий.
@@ -268,14 +371,14 @@ async def sto_menu_entry(callback: CallbackQuery, state: FSMContext):
 
     telegram_id = callback.from_user.id
 
-    # 1. Получаем пользователя по Telegram ID
-    user = await api_client.get_user_by_telegram(telegram_id)
+    # 1. Получаем пользователя по Telegram ID (или берём из middleware)
+    user = current_user or await api_client.get_user_by_telegram(telegram_id)
     if not isinstance(user, dict) or user.get("role") != "service_owner":
         await callback.message.answer(
             "Похоже, вы ещё не зарегистрированы как владелец автосервиса.\n"
             "Перейдите в раздел «Регистрация СТО» в главном меню.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     user_id = user["id"]
@@ -287,7 +390,7 @@ async def sto_menu_entry(callback: CallbackQuery, state: FSMContext):
             "У вас пока нет зарегистрированных автосервисов.\n"
             "Зайдите в раздел «Регистрация СТО», чтобы создать профиль.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     sc = service_centers[0]  # пока берём первый сервис
@@ -296,7 +399,65 @@ async def sto_menu_entry(callback: CallbackQuery, state: FSMContext):
     kb = _build_sto_menu_keyboard()
 
     await callback.message.answer(text, reply_markup=kb)
-    await callback.answer()
+    ack(callback)
+
+
+# ---------------------------------------------------------------------------
+# Отмена текстом («отмена») на шагах ввода
+# ---------------------------------------------------------------------------
+
+
+# Регистрируется раньше шаговых хендлеров, чтобы «отмена» не ушла
+# в название/адрес/телефон как обычный ввод.
+@router.message(
+    StateFilter(
+        STORegister.waiting_name,
+        STORegister.waiting_address_text,
+        STORegister.waiting_geo,
+        STORegister.waiting_phone,
+        STORegister.waiting_website,
+        STOEdit.waiting_value,
+        STOEdit.waiting_geo,
+    ),
+    F.text.func(is_cancel),
+    flags={"current_user": True},
+)
+async def sto_cancel_text(
+    message: Message,
+    state: FSMContext,
+    current_user: dict | None = None,
+):
+    current_state = await state.get_state() or ""
+    await state.clear()
+
+    if current_state.startswith(f"{STOEdit.__name__}:"):
+        await message.answer(
+            "Редактирование профиля СТО отменено.",
+            reply_markup=KB_STO_MENU,
+        )
+        return
+
+    role = current_user.get("role") if isinstance(current_user, dict) else None
+    await message.answer(
+        "Регистрация СТО отменена.",
+        reply_markup=get_main_menu(role),
+    )
+
+
+# Кнопки «⬅️ В меню» / «❌ Отмена» на шагах регистрации — один хендлер
+# вместо одинаковых веток в каждом шаге.
+@router.callback_query(
+    StateFilter(
+        STORegister.waiting_org_type,
+        STORegister.waiting_specs,
+        STORegister.waiting_confirm,
+    ),
+    F.data.in_({"sto_back_menu", "sto_spec:cancel", "sto_reg_no"}),
+)
+async def sto_cancel_button(callback: CallbackQuery, state: FSMContext):
+    await state.clear()
+    await callback.message.edit_text("Регистрация СТО отменена.")
+    ack(callback)
 
 
 # ---------------------------------------------------------------------------
@@ -304,21 +465,25 @@ async def sto_menu_entry(callback: CallbackQuery, state: FSMContext):
 # ---------------------------------------------------------------------------
 
 
-@router.callback_query(F.data == "sto:edit_profile")
-async def sto_edit_profile_start(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(F.data == "sto:edit_profile", flags={"current_user": True})
+async def sto_edit_profile_start(
+    callback: CallbackQuery,
+    state: FSMContext,
+    current_user: dict | None = None,
+):
     """
     Старт сценария редактирования профиля СТО.
     """
     telegram_id = callback.from_user.id
 
     # Берём текущий сервис через те же методы, что и в sto_menu_entry
-    user = await api_client.get_user_by_telegram(telegram_id)
+    user = current_user or await api_client.get_user_by_telegram(telegram_id)
     if not isinstance(user, dict) or user.get("role") != "service_owner":
         await callback.message.answer(
             "Вы ещё не зарегистрированы как владелец автосервиса.\n"
             "Сначала зарегистрируйте СТО.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     user_id = user["id"]
@@ -328,7 +493,7 @@ async def sto_edit_profile_start(callback: CallbackQuery, state: FSMContext):
             "У вас пока нет зарегистрированных автосервисов.\n"
             "Сначала создайте профиль СТО.",
         )
-        await callback.answer()
+        ack(callback)
         return
 
     sc = service_centers[0]
@@ -337,67 +502,28 @@ async def sto_edit_profile_start(callback: CallbackQuery, state: FSMContext):
         await callback.message.answer(
             "Не удалось определить ID сервиса. Попробуйте позже."
         )
-        await callback.answer()
+        ack(callback)
         return
 
-    # Сохраняем в состояние ID сервиса и текущие специализации
+    # Сохраняем в состояние ID сервиса и текущие специализации.
+    # Данные FSM уходят в storage как JSON (RedisStorage) — храним список,
+    # не set. set_data сразу заменяет старые данные (без clear + get + set).
     specs_raw = sc.get("specializations") or []
-    selected_specs: set[str] = {str(code) for code in specs_raw}
-
-    await state.clear()
-    await state.update_data(sc_id=int(sc_id), edit_specializations=selected_specs)
+    await state.set_data(
+        {
+            "sc_id": int(sc_id),
+            "edit_specializations": sorted({str(code) for code in specs_raw}),
+        }
+    )
 
     text = (
         "<b>✏️ Редактирование профиля СТО</b>\n\n"
         "Выберите, что хотите изменить:"
     )
 
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="📛 Название",
-                    callback_data="sto_edit_field:name",
-                ),
-                InlineKeyboardButton(
-                    text="📍 Адрес",
-                    callback_data="sto_edit_field:address",
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    text="📌 Геолокация",
-                    callback_data="sto_edit_field:geo",
-                ),
-                InlineKeyboardButton(
-                    text="📞 Телефон",
-                    callback_data="sto_edit_field:phone",
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    text="🌐 Сайт / соцсети",
-                    callback_data="sto_edit_field:website",
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    text="🔧 Специализации",
-                    callback_data="sto_edit_field:specializations",
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    text="⬅️ В меню СТО",
-                    callback_data="main:sto_menu",
-                ),
-            ],
-        ]
-    )
-
-    await callback.message.answer(text, reply_markup=kb)
+    await callback.message.answer(text, reply_markup=KB_STO_EDIT_FIELDS)
     await state.set_state(STOEdit.choosing_field)
-    await callback.answer()
+    ack(callback)
 
 
 @router.callback_query(STOEdit.choosing_field, F.data.startswith("sto_edit_field:"))
@@ -420,7 +546,7 @@ async def sto_edit_choose_field(callback: CallbackQuery, state: FSMContext):
         await state.update_data(edit_field=field)
         await callback.message.answer(prompts[field])
         await state.set_state(STOEdit.waiting_value)
-        await callback.answer()
+        ack(callback)
         return
 
     if field == "geo":
@@ -428,9 +554,9 @@ async def sto_edit_choose_field(callback: CallbackQuery, state: FSMContext):
         await callback.message.answer(
             "Отправьте новую <b>геолокацию сервиса</b>.\n\n"
             "Используйте кнопку 📎 → «Геопозиция».",
-            reply_markup=ReplyKeyboardRemove(),
+            reply_markup=KB_REMOVE,
         )
-        await callback.answer()
+        ack(callback)
         return
 
     if field == "specializations":
@@ -440,13 +566,13 @@ async def sto_edit_choose_field(callback: CallbackQuery, state: FSMContext):
         await callback.message.answer(
             "Выберите актуальные специализации сервиса.\n\n"
             "Можно выбрать несколько пунктов, затем нажать «✅ Готово».",
-            reply_markup=kb_specs_edit(selected_specs),
+            reply_markup=kb_specs_edit(frozenset(selected_specs)),
         )
-        await callback.answer()
+        ack(callback)
         return
 
     # На всякий случай
-    await callback.answer()
+    ack(callback)
 
 
 @router.message(STOEdit.waiting_value)
@@ -466,7 +592,7 @@ async def sto_edit_save_text_value(message: Message, state: FSMContext):
     text = (message.text or "").strip()
 
     # website можно очистить
-    if field == "website" and text.lower() in ("пропустить", "нет", "-", "no"):
+    if field == "website" and _is_skip(text):
         value = None
     else:
         if not text:
@@ -477,23 +603,20 @@ async def sto_edit_save_text_value(message: Message, state: FSMContext):
     payload = {field: value}
 
     try:
-        await api_client.update_service_center(int(sc_id), payload)
-        await message.answer("✔ Профиль СТО обновлён.")
-    except Exception as e:
+        sc = await api_client.update_service_center(int(sc_id), payload)
+    except APIError as e:
         logger.exception("Ошибка обновления профиля СТО (%s): %s", field, e)
         await message.answer("❌ Не удалось сохранить изменения. Попробуйте позже.")
         await state.clear()
         return
+    await message.answer("✔ Профиль СТО обновлён.")
 
-    # Покажем актуальное меню СТО
-    try:
-        sc = await api_client.get_service_center(int(sc_id))
-        if isinstance(sc, dict):
-            text = _build_sto_menu_text(sc)
-            kb = _build_sto_menu_keyboard()
-            await message.answer(text, reply_markup=kb)
-    except Exception as e:
-        logger.exception("Ошибка получения СТО после обновления: %s", e)
+    # Покажем актуальное меню СТО (PATCH уже вернул обновлённый профиль)
+    if isinstance(sc, dict):
+        await message.answer(
+            _build_sto_menu_text(sc),
+            reply_markup=_build_sto_menu_keyboard(),
+        )
 
     await state.clear()
 
@@ -516,23 +639,20 @@ async def sto_edit_save_geo(message: Message, state: FSMContext):
     payload = {"latitude": lat, "longitude": lon}
 
     try:
-        await api_client.update_service_center(int(sc_id), payload)
-        await message.answer("✔ Геолокация сервиса обновлена.")
-    except Exception as e:
+        sc = await api_client.update_service_center(int(sc_id), payload)
+    except APIError as e:
         logger.exception("Ошибка обновления геолокации СТО: %s", e)
         await message.answer("❌ Не удалось сохранить геолокацию. Попробуйте позже.")
         await state.clear()
         return
+    await message.answer("✔ Геолокация сервиса обновлена.")
 
-    # Покажем актуальное меню СТО
-    try:
-        sc = await api_client.get_service_center(int(sc_id))
-        if isinstance(sc, dict):
-            text = _build_sto_menu_text(sc)
-            kb = _build_sto_menu_keyboard()
-            await message.answer(text, reply_markup=kb)
-    except Exception as e:
-        logger.exception("Ошибка получения СТО после обновления гео: %s", e)
+    # Покажем актуальное меню СТО (PATCH уже вернул обновлённый профиль)
+    if isinstance(sc, dict):
+        await message.answer(
+            _build_sto_menu_text(sc),
+            reply_markup=_build_sto_menu_keyboard(),
+        )
 
     await state.clear()
 
@@ -547,13 +667,13 @@ async def sto_edit_specs(callback: CallbackQuery, state: FSMContext):
     if not sc_id:
         await callback.message.answer("Не удалось определить сервис. Попробуйте ещё раз.")
         await state.clear()
-        await callback.answer()
+        ack(callback)
         return
 
     selected: set[str] = set(data.get("edit_specializations") or [])
 
     if not callback.data.startswith("sto_edit_spec:"):
-        await callback.answer()
+        ack(callback)
         return
 
     _, code = callback.data.split(":", maxsplit=1)
@@ -562,35 +682,34 @@ async def sto_edit_specs(callback: CallbackQuery, state: FSMContext):
         # Сохраняем специализации
         payload = {"specializations": list(selected)}
         try:
-            await api_client.update_service_center(int(sc_id), payload)
-            await callback.message.edit_text("✔ Специализации сервиса обновлены.")
-        except Exception as e:
+            sc = await api_client.update_service_center(int(sc_id), payload)
+        except APIError as e:
             logger.exception("Ошибка обновления специализаций СТО: %s", e)
             await callback.message.edit_text(
                 "❌ Не удалось сохранить специализации. Попробуйте позже."
             )
             await state.clear()
-            await callback.answer()
+            ack(callback)
             return
-
-        # Покажем актуальное меню СТО
-        try:
-            sc = await api_client.get_service_center(int(sc_id))
-            if isinstance(sc, dict):
-                text = _build_sto_menu_text(sc)
-                kb = _build_sto_menu_keyboard()
-                await callback.message.answer(text, reply_markup=kb)
-        except Exception as e:
-            logger.exception("Ошибка получения СТО после обновления спецов: %s", e)
+        # Покажем актуальное меню СТО (PATCH уже вернул обновлённый профиль).
+        # Правка старого сообщения и новое меню независимы — параллельно.
+        sends = [callback.message.edit_text("✔ Специализации сервиса обновлены.")]
+        if isinstance(sc, dict):
+            sends.append(
+                callback.message.answer(
+                    _build_sto_menu_text(sc),
+                    reply_markup=_build_sto_menu_keyboard(),
+                )
+            )
+        await asyncio.gather(*sends)
 
         await state.clear()
-        await callback.answer()
+        ack(callback)
         return
 
     # Обычное переключение специализации
-    codes_available = {c for c, _ in SERVICE_SPECIALIZATION_OPTIONS}
-    if code not in codes_available:
-        await callback.answer()
+    if code not in _SPEC_CODES:
+        ack(callback)
         return
 
     if code in selected:
@@ -598,17 +717,18 @@ async def sto_edit_specs(callback: CallbackQuery, state: FSMContext):
     else:
         selected.add(code)
 
-    await state.update_data(edit_specializations=selected)
+    # get_data уже был выше — пишем целиком, без второго чтения в update_data
+    await state.set_data({**data, "edit_specializations": sorted(selected)})
 
     try:
         await callback.message.edit_reply_markup(
-            reply_markup=kb_specs_edit(selected)
+            reply_markup=kb_specs_edit(frozenset(selected))
         )
     except TelegramBadRequest as e:
         if "message is not modified" not in str(e):
             logger.exception("Ошибка обновления клавиатуры спецов (edit): %s", e)
 
-    await callback.answer()
+    ack(callback)
 
 
 # ---------------------------------------------------------------------------
@@ -621,25 +741,23 @@ async def sto_org_type(callback: CallbackQuery, state: FSMContext):
     """
     Выбор типа организации.
     """
-    if callback.data == "sto_back_menu":
-        await state.clear()
-        await callback.message.edit_text("Регистрация СТО отменена.")
-        await callback.answer()
-        return
-
     if callback.data not in ("sto_type_ind", "sto_type_comp"):
-        await callback.answer()
+        ack(callback)
         return
 
     org_type = "individual" if callback.data == "sto_type_ind" else "company"
     await state.update_data(org_type=org_type)
 
+    # sto_finish понадобится пользователь — пока человек заполняет анкету,
+    # подтягиваем его в кэш APIClient в фоне
+    spawn(api_client.get_user_by_telegram(callback.from_user.id))
+
     await state.set_state(STORegister.waiting_name)
     await callback.message.edit_text(
         "Введите название сервиса.\n"
         "Если вы частный мастер — укажите ваше имя.",
     )
-    await callback.answer()
+    ack(callback)
 
 
 @router.message(STORegister.waiting_name, F.text)
@@ -666,7 +784,7 @@ async def sto_address(message: Message, state: FSMContext):
     await message.answer(
         "Теперь отправьте геолокацию сервиса.\n\n"
         "Используйте кнопку 📎 → «Геопозиция».",
-        reply_markup=ReplyKeyboardRemove(),
+        reply_markup=KB_REMOVE,
     )
 
 
@@ -698,16 +816,15 @@ async def sto_phone(message: Message, state: FSMContext):
 @router.message(STORegister.waiting_website, F.text)
 async def sto_website(message: Message, state: FSMContext):
     txt = (message.text or "").strip()
-    website = None if txt.lower() in ("пропустить", "нет", "-", "no") else txt
+    website = None if _is_skip(txt) else txt
 
-    await state.update_data(website=website)
-    await state.update_data(specializations=set())
+    await state.update_data(website=website, specializations=[])
 
     await state.set_state(STORegister.waiting_specs)
     await message.answer(
         "Выберите специализации сервиса:\n\n"
         "Можно выбрать несколько пунктов, потом нажать «✅ Готово».",
-        reply_markup=kb_specs(set()),
+        reply_markup=kb_specs(frozenset()),
     )
 
 
@@ -722,31 +839,20 @@ async def sto_specs(callback: CallbackQuery, state: FSMContext):
     if callback.data.startswith("sto_spec:"):
         _, code = callback.data.split(":", maxsplit=1)
 
-        # Отмена
-        if code == "cancel":
-            await state.clear()
-            await callback.message.edit_text("Регистрация СТО отменена.")
-            await callback.answer()
-            return
-
         # Готово -> переход к подтверждению
         if code == "done":
-            await state.set_state(STORegister.waiting_confirm)
-            profile = await state.get_data()
-            specs_codes: set[str] = set(profile.get("specializations") or [])
+            profile = data
+            specs_codes = selected
 
             # ✅ НОВОЕ: нельзя подтверждать без выбранных специализаций
             if not specs_codes:
-                await callback.answer("Выберите хотя бы одну специализацию", show_alert=True)
-                # возвращаем пользователя к выбору, не переводим в confirm реально
-                await state.set_state(STORegister.waiting_specs)
-                await callback.answer()
+                # остаёмся на выборе специализаций
+                ack(callback, "Выберите хотя бы одну специализацию", show_alert=True)
                 return
 
-            labels = []
-            for c, lbl in SERVICE_SPECIALIZATION_OPTIONS:
-                if c in specs_codes:
-                    labels.append(lbl)
+            await state.set_state(STORegister.waiting_confirm)
+
+            labels = [lbl for c, lbl in SERVICE_SPECIALIZATION_OPTIONS if c in specs_codes]
             specs_text = ", ".join(labels) if labels else "—"
 
             text = (
@@ -760,31 +866,13 @@ async def sto_specs(callback: CallbackQuery, state: FSMContext):
                 "Подтвердить регистрацию?"
             )
 
-            kb = InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [
-                        InlineKeyboardButton(
-                            text="✅ Подтвердить",
-                            callback_data="sto_reg_yes",
-                        )
-                    ],
-                    [
-                        InlineKeyboardButton(
-                            text="❌ Отмена",
-                            callback_data="sto_reg_no",
-                        )
-                    ],
-                ]
-            )
-
-            await callback.message.edit_text(text, reply_markup=kb)
-            await callback.answer()
+            await callback.message.edit_text(text, reply_markup=KB_STO_REG_CONFIRM)
+            ack(callback)
             return
 
         # Обычное переключение специализации
-        codes_available = {c for c, _ in SERVICE_SPECIALIZATION_OPTIONS}
-        if code not in codes_available:
-            await callback.answer()
+        if code not in _SPEC_CODES:
+            ack(callback)
             return
 
         if code in selected:
@@ -792,50 +880,48 @@ async def sto_specs(callback: CallbackQuery, state: FSMContext):
         else:
             selected.add(code)
 
-        await state.update_data(specializations=selected)
+        await state.set_data({**data, "specializations": sorted(selected)})
 
         try:
             await callback.message.edit_reply_markup(
-                reply_markup=kb_specs(selected)
+                reply_markup=kb_specs(frozenset(selected))
             )
         except TelegramBadRequest as e:
             if "message is not modified" not in str(e):
                 logger.exception("Ошибка обновления клавиатуры спецов: %s", e)
 
-        await callback.answer()
+        ack(callback)
         return
 
-    await callback.answer()
+    ack(callback)
 
 
-@router.callback_query(STORegister.waiting_confirm)
-async def sto_finish(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(STORegister.waiting_confirm, flags={"current_user": True})
+async def sto_finish(
+    callback: CallbackQuery,
+    state: FSMContext,
+    current_user: dict | None = None,
+):
     """
     Финальный шаг: создаём СТО как НЕактивную (на модерацию),
     уведомляем админов, роль пользователю НЕ повышаем до решения админа.
     """
-    if callback.data == "sto_reg_no":
-        await state.clear()
-        await callback.message.edit_text("Регистрация СТО отменена.")
-        await callback.answer()
-        return
-
     if callback.data != "sto_reg_yes":
-        await callback.answer()
+        ack(callback)
         return
 
     data = await state.get_data()
     tg_id = callback.from_user.id
 
     try:
-        user = await api_client.get_user_by_telegram(tg_id)
-    except Exception as e:
+        user = current_user or await api_client.get_user_by_telegram(tg_id)
+    except APIError as e:
         logger.exception("Ошибка запроса пользователя при регистрации СТО: %s", e)
         await callback.message.edit_text(
             "Не удалось получить данные пользователя 😔\n"
             "Попробуйте ещё раз с команды /start."
         )
-        await callback.answer()
+        ack(callback)
         return
 
     if not user:
@@ -843,7 +929,7 @@ async def sto_finish(callback: CallbackQuery, state: FSMContext):
             "Пользователь не найден в системе.\n"
             "Сначала завершите регистрацию как клиента через /start."
         )
-        await callback.answer()
+        ack(callback)
         return
 
     user_id = user["id"]
@@ -867,28 +953,37 @@ async def sto_finish(callback: CallbackQuery, state: FSMContext):
 
     try:
         created = await api_client.create_service_center(payload)
-    except Exception as e:
+    except APIError as e:
         logger.exception("Ошибка регистрации СТО: %s", e)
         await callback.message.edit_text(
             "Не удалось зарегистрировать СТО 😔 Попробуйте позже."
         )
-        await callback.answer()
+        ack(callback)
         return
 
-    # ✅ Уведомление админам (best-effort, не валим flow)
-    try:
-        await _notify_admins_new_service_center(callback, created)
-    except Exception:
-        pass
+    # данные пользователя на backend могли измениться — сбрасываем кэш.
+    # Привязку «владелец → СТО» не запоминаем: СТО создан неактивным и
+    # до одобрения админом доступа к заявкам не даёт.
+    forget_current_user(tg_id)
 
     await state.clear()
 
-    await callback.message.edit_text(
-        "Заявка на регистрацию СТО отправлена на модерацию ✅\n\n"
-        f"ID: {created.get('id')}\n"
-        "Ожидайте подтверждения администратором.",
+    # Ответ пользователю и уведомление админам (best-effort, не валим flow)
+    # друг от друга не зависят — отправляем параллельно
+    reply_res, notify_res = await asyncio.gather(
+        callback.message.edit_text(
+            "Заявка на регистрацию СТО отправлена на модерацию ✅\n\n"
+            f"ID: {created.get('id')}\n"
+            "Ожидайте подтверждения администратором.",
+        ),
+        _notify_admins_new_service_center(callback, created),
+        return_exceptions=True,
     )
-    await callback.answer()
+    if isinstance(notify_res, BaseException):
+        logger.error("Не удалось уведомить админов о новой СТО: %s", notify_res)
+    if isinstance(reply_res, BaseException):
+        raise reply_res
+    ack(callback)
 
 
 def _parse_admin_ids_from_env() -> list[int]:
@@ -967,8 +1062,12 @@ async def _notify_admins_new_service_center(
             ]
         )
 
-    for admin_id in admin_ids:
-        try:
-            await callback.bot.send_message(admin_id, text, reply_markup=kb)
-        except Exception:
-            continue
+    # каждому админу — своим запросом, параллельно; ошибки отдельных
+    # отправок глушит return_exceptions
+    await asyncio.gather(
+        *(
+            throttled_send(callback.bot, admin_id, text, reply_markup=kb)
+            for admin_id in admin_ids
+        ),
+        return_exceptions=True,
+    )
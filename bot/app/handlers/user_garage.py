@@ -1,3 +1,6 @@
+import re
+from functools import lru_cache
+
 from aiogram import Router, F
 from aiogram.types import (
     Message,
@@ -9,35 +12,70 @@ from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
 
 from ..api_client import api_client
+from ..text_commands import is_cancel, is_one_of
 from ..states.user_states import CarCreate, CarEdit
+from .general import BTN_MAIN_MENU, NOT_REGISTERED_TEXT
 
 router = Router()
 
+# Слова, которыми пользователь пропускает необязательный шаг.
+# Храним уже в нижнем регистре, проверяем через _is_skip().
+_SKIP_WORDS = frozenset({"пропустить", "пропуск", "skip", "-"})
+
+
+def _is_skip(text: str | None) -> bool:
+    """
+    Пользователь хочет пропустить шаг?
+    """
+    return is_one_of(text, _SKIP_WORDS)
+
+
+# callback_data кнопок под машиной: garage_edit:<id> / garage_delete:<id>
+_GARAGE_EDIT_RE = re.compile(r"^garage_edit:(\d+)$")
+_GARAGE_DELETE_RE = re.compile(r"^garage_delete:(\d+)$")
+
+# Допустимый год выпуска — как в схеме backend-а (CarBase.year)
+_YEAR_MIN, _YEAR_MAX = 1900, 2100
+
+
+def _parse_year(text: str) -> int | None:
+    """
+    Год из 4 цифр в допустимом диапазоне, иначе None — без try/except.
+    isdecimal, а не isdigit: «²» — digit, но int() на нём падает.
+    """
+    if len(text) != 4 or not text.isdecimal():
+        return None
+    year = int(text)
+    return year if _YEAR_MIN <= year <= _YEAR_MAX else None
+
 
 # ---------- Вспомогательные клавиатуры ----------
 
 
+# Общие действия под гаражом — одинаковые для пустого и непустого
+_GARAGE_ACTION_ROWS: list[list[InlineKeyboardButton]] = [
+    [
+        InlineKeyboardButton(
+            text="➕ Добавить авто",
+            callback_data="garage:add",
+        ),
+    ],
+    [BTN_MAIN_MENU],
+]
+
+
 def get_garage_keyboard_for_empty() -> InlineKeyboardMarkup:
     """
     Клавиатура, когда в гараже нет машин.
     """
-    buttons: list[list[InlineKeyboardButton]] = [
-        [
-            InlineKeyboardButton(
-                text="➕ Добавить авто",
-                callback_data="garage:add",
-            ),
-        ],
-        [
-            InlineKeyboardButton(
-                text="⬅️ В меню",
-                callback_data="main:menu",
-            ),
-        ],
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return InlineKeyboardMarkup(inline_keyboard=_GARAGE_ACTION_ROWS)
 
 
+# Статичная — собираем один раз
+KB_GARAGE_EMPTY = get_garage_keyboard_for_empty()
+
+
+@lru_cache(maxsize=None)
 def get_confirm_keyboard(prefix: str) -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения для шага создания авто.
@@ -73,20 +111,74 @@ def get_confirm_keyboard(prefix: str) -> InlineKeyboardMarkup:
     )
 
 
+# Выбор поля при редактировании авто
+KB_CAR_EDIT_FIELDS = InlineKeyboardMarkup(
+    inline_keyboard=(
+        (
+            InlineKeyboardButton(text="Марка", callback_data="edit_field:brand"),
+            InlineKeyboardButton(text="Модель", callback_data="edit_field:model"),
+        ),
+        (
+            InlineKeyboardButton(text="Год", callback_data="edit_field:year"),
+            InlineKeyboardButton(
+                text="Гос. номер", callback_data="edit_field:license_plate"
+            ),
+        ),
+        (
+            InlineKeyboardButton(text="VIN", callback_data="edit_field:vin"),
+        ),
+        (
+            InlineKeyboardButton(text="⬅️ Отмена", callback_data="garage_cancel"),
+        ),
+    )
+)
+
+# Подтверждение удаления авто
+KB_CAR_DELETE_CONFIRM = InlineKeyboardMarkup(
+    inline_keyboard=(
+        (
+            InlineKeyboardButton(
+                text="🗑 Удалить", callback_data="garage_delete_confirmed"
+            ),
+        ),
+        (
+            InlineKeyboardButton(text="⬅️ Отмена", callback_data="garage_cancel"),
+        ),
+    )
+)
+
+
 # ---------- Показ гаража ----------
 
 
-async def _send_garage(message: Message, telegram_id: int):
+def _format_garage_car(idx: int, car: dict) -> str:
+    """
+    Блок одной машины в списке гаража (с пустой строкой в конце).
+    """
+    return (
+        f"<b>#{idx}</b> {car.get('brand') or '—'} {car.get('model') or '—'}\n"
+        f"  Год: {car.get('year') or '—'}\n"
+        f"  Госномер: {car.get('license_plate') or '—'}\n"
+        f"  VIN: {car.get('vin') or '—'}\n"
+    )
+
+
+async def _send_garage(
+    message: Message,
+    telegram_id: int,
+    current_user: dict | None = None,
+):
     """
     Показ списка машин пользователя.
 
     ВАЖНО: telegram_id передаём явно, т.к. для callback message.from_user = бот.
+    current_user (от CurrentUserMiddleware) избавляет от повторного поиска
+    пользователя — остаётся один запрос за списком машин.
     """
-    user = await api_client.get_user_by_telegram(telegram_id)
+    user = current_user or await api_client.get_user_by_telegram(telegram_id)
     if not user:
         await message.answer(
-            "Похоже, вы ещё не зарегистрированы.\n"
-            "Нажмите /start, чтобы пройти короткую регистрацию.",
+            NOT_REGISTERED_TEXT,
         )
         return
 
@@ -109,61 +201,31 @@ async def _send_garage(message: Message, telegram_id: int):
         )
         await message.answer(
             text,
-            reply_markup=get_garage_keyboard_for_empty(),
+            reply_markup=KB_GARAGE_EMPTY,
         )
         return
 
     # Есть машины
-    lines = ["<b>🚗 Мой гараж</b>", ""]
-    keyboard_rows: list[list[InlineKeyboardButton]] = []
-
-    for idx, car in enumerate(cars, start=1):
-        car_id = car.get("id")
-        brand = car.get("brand") or "—"
-        model = car.get("model") or "—"
-        year = car.get("year") or "—"
-        plate = car.get("license_plate") or "—"
-        vin = car.get("vin") or "—"
-
-        lines.append(f"<b>#{idx}</b> {brand} {model}".strip())
-        lines.append(f"  Год: {year}")
-        lines.append(f"  Госномер: {plate}")
-        lines.append(f"  VIN: {vin}")
-        lines.append("")
-
-        if car_id is not None:
-            keyboard_rows.append(
-                [
-                    InlineKeyboardButton(
-                        text=f"✏️ Изменить #{idx}",
-                        callback_data=f"garage_edit:{car_id}",
-                    ),
-                    InlineKeyboardButton(
-                        text=f"🗑 Удалить #{idx}",
-                        callback_data=f"garage_delete:{car_id}",
-                    ),
-                ]
-            )
-
-    # Внизу — общие действия
-    keyboard_rows.append(
+    text = "<b>🚗 Мой гараж</b>\n\n" + "\n".join(
+        _format_garage_car(idx, car) for idx, car in enumerate(cars, start=1)
+    )
+    keyboard_rows: list[list[InlineKeyboardButton]] = [
         [
             InlineKeyboardButton(
-                text="➕ Добавить авто",
-                callback_data="garage:add",
+                text=f"✏️ Изменить #{idx}",
+                callback_data=f"garage_edit:{car['id']}",
             ),
-        ]
-    )
-    keyboard_rows.append(
-        [
             InlineKeyboardButton(
-                text="⬅️ В меню",
-                callback_data="main:menu",
+                text=f"🗑 Удалить #{idx}",
+                callback_data=f"garage_delete:{car['id']}",
             ),
         ]
-    )
+        for idx, car in enumerate(cars, start=1)
+        if car.get("id") is not None
+    ]
 
-    text = "\n".join(lines)
+    # Внизу — общие действия
+    keyboard_rows.extend(_GARAGE_ACTION_ROWS)
 
     await message.answer(
         text,
@@ -171,14 +233,22 @@ async def _send_garage(message: Message, telegram_id: int):
     )
 
 
-@router.message(F.text == "🚗 Мой гараж")
-async def garage_show_legacy(message: Message):
-    await _send_garage(message, telegram_id=message.from_user.id)
+@router.message(F.text == "🚗 Мой гараж", flags={"current_user": True})
+async def garage_show_legacy(message: Message, current_user: dict | None = None):
+    await _send_garage(
+        message,
+        telegram_id=message.from_user.id,
+        current_user=current_user,
+    )
 
 
-@router.callback_query(F.data == "main:garage")
-async def garage_show_from_menu(callback: CallbackQuery):
-    await _send_garage(callback.message, telegram_id=callback.from_user.id)
+@router.callback_query(F.data == "main:garage", flags={"current_user": True})
+async def garage_show_from_menu(callback: CallbackQuery, current_user: dict | None = None):
+    await _send_garage(
+        callback.message,
+        telegram_id=callback.from_user.id,
+        current_user=current_user,
+    )
     await callback.answer()
 
 
@@ -200,6 +270,43 @@ async def garage_add_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
+# ---------- Отмена текстом («отмена») на шагах ввода ----------
+
+
+# Регистрируется раньше шаговых хендлеров, чтобы «отмена» не ушла
+# в марку/модель/номер как обычный ввод.
+@router.message(
+    StateFilter(
+        CarCreate.choosing_brand,
+        CarCreate.choosing_model,
+        CarCreate.choosing_year,
+        CarCreate.choosing_license_plate,
+        CarCreate.choosing_vin,
+        CarEdit.waiting_for_value,
+    ),
+    F.text.func(is_cancel),
+    flags={"current_user": True},
+)
+async def car_cancel_text(
+    message: Message,
+    state: FSMContext,
+    current_user: dict | None = None,
+):
+    current_state = await state.get_state() or ""
+    await state.clear()
+
+    await message.answer(
+        "Редактирование машины отменено."
+        if current_state.startswith(f"{CarEdit.__name__}:")
+        else "Добавление машины отменено."
+    )
+    await _send_garage(
+        message,
+        telegram_id=message.from_user.id,
+        current_user=current_user,
+    )
+
+
 # ---------- Марка ----------
 
 
@@ -285,14 +392,14 @@ async def car_create_year(message: Message, state: FSMContext):
     year: int | None = None
     description: str
 
-    if text.lower() != "пропустить":
-        if not text.isdigit() or len(text) != 4:
+    if not _is_skip(text):
+        year = _parse_year(text)
+        if year is None:
             await message.answer(
                 "Пожалуйста, введите год в формате 4 цифр (например, 2015) "
                 "или напишите «пропустить».",
             )
             return
-        year = int(text)
         description = f"год выпуска: <b>{year}</b>"
     else:
         description = "что хотите <b>пропустить год выпуска</b>"
@@ -329,7 +436,7 @@ async def car_year_ok(callback: CallbackQuery, state: FSMContext):
 @router.message(CarCreate.choosing_license_plate, F.text)
 async def car_create_plate(message: Message, state: FSMContext):
     text = (message.text or "").strip()
-    if text.lower() == "пропустить":
+    if _is_skip(text):
         plate = None
         description = "что хотите <b>пропустить госномер</b>"
     else:
@@ -377,7 +484,7 @@ async def car_plate_ok(callback: CallbackQuery, state: FSMContext):
 @router.message(CarCreate.choosing_vin, F.text)
 async def car_create_vin(message: Message, state: FSMContext):
     text = (message.text or "").strip()
-    if text.lower() == "пропустить":
+    if _is_skip(text):
         vin = None
         description = "что хотите <b>пропустить VIN</b>"
     else:
@@ -405,14 +512,22 @@ async def car_vin_edit(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(StateFilter(CarCreate.choosing_vin), F.data == "car_vin:ok")
-async def car_vin_ok(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(
+    StateFilter(CarCreate.choosing_vin),
+    F.data == "car_vin:ok",
+    flags={"current_user": True},
+)
+async def car_vin_ok(
+    callback: CallbackQuery,
+    state: FSMContext,
+    current_user: dict | None = None,
+):
     """
     Финальное сохранение машины.
     """
     telegram_id = callback.from_user.id
 
-    user = await api_client.get_user_by_telegram(telegram_id)
+    user = current_user or await api_client.get_user_by_telegram(telegram_id)
     if not user:
         await callback.message.answer(
             "Не удалось определить пользователя. Попробуйте ещё раз через /start.",
@@ -461,42 +576,26 @@ async def car_vin_ok(callback: CallbackQuery, state: FSMContext):
 # ---------- Редактирование авто ----------
 
 
-@router.callback_query(F.data.startswith("garage_edit:"))
-async def garage_edit_start(callback: CallbackQuery, state: FSMContext):
-    car_id = int(callback.data.split(":")[1])
+@router.callback_query(F.data.regexp(_GARAGE_EDIT_RE).as_("edit_match"))
+async def garage_edit_start(
+    callback: CallbackQuery,
+    state: FSMContext,
+    edit_match: re.Match[str],
+):
+    car_id = int(edit_match.group(1))
     car = await api_client.get_car(car_id)
 
     if not car:
         await callback.answer("Машина не найдена.")
         return
 
-    await state.update_data(car_id=car_id)
-
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="Марка", callback_data="edit_field:brand"),
-                InlineKeyboardButton(text="Модель", callback_data="edit_field:model"),
-            ],
-            [
-                InlineKeyboardButton(text="Год", callback_data="edit_field:year"),
-                InlineKeyboardButton(
-                    text="Гос. номер", callback_data="edit_field:license_plate"
-                ),
-            ],
-            [
-                InlineKeyboardButton(text="VIN", callback_data="edit_field:vin"),
-            ],
-            [
-                InlineKeyboardButton(text="⬅️ Отмена", callback_data="garage_cancel"),
-            ],
-        ]
-    )
+    # начало сценария правки: пишем данные целиком, без чтения старых
+    await state.set_data({"car_id": car_id})
 
     await callback.message.answer(
         f"Что хотите изменить в машине?\n\n🚘 <b>{car.get('brand') or ''} "
         f"{car.get('model') or ''} ({car.get('year') or '—'})</b>",
-        reply_markup=kb,
+        reply_markup=KB_CAR_EDIT_FIELDS,
     )
 
     await state.set_state(CarEdit.waiting_for_field)
@@ -526,12 +625,13 @@ async def garage_edit_value(message: Message, state: FSMContext):
 
     # Простейшая обработка года
     if field == "year":
-        if not value_raw.isdigit() or len(value_raw) != 4:
+        year = _parse_year(value_raw)
+        if year is None:
             await message.answer(
                 "Пожалуйста, введите год в формате 4 цифр (например, 2015)."
             )
             return
-        value: int | str = int(value_raw)
+        value: int | str = year
     else:
         value = value_raw
 
@@ -551,27 +651,18 @@ async def garage_edit_value(message: Message, state: FSMContext):
 # ---------- Удаление авто ----------
 
 
-@router.callback_query(F.data.startswith("garage_delete:"))
-async def garage_delete_confirm(callback: CallbackQuery, state: FSMContext):
-    car_id = int(callback.data.split(":")[1])
-    await state.update_data(car_id=car_id)
-
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="🗑 Удалить", callback_data="garage_delete_confirmed"
-                ),
-            ],
-            [
-                InlineKeyboardButton(text="⬅️ Отмена", callback_data="garage_cancel"),
-            ],
-        ]
-    )
+@router.callback_query(F.data.regexp(_GARAGE_DELETE_RE).as_("delete_match"))
+async def garage_delete_confirm(
+    callback: CallbackQuery,
+    state: FSMContext,
+    delete_match: re.Match[str],
+):
+    car_id = int(delete_match.group(1))
+    await state.set_data({"car_id": car_id})
 
     await callback.message.answer(
         "❗ Вы уверены, что хотите удалить автомобиль?",
-        reply_markup=kb,
+        reply_markup=KB_CAR_DELETE_CONFIRM,
     )
 
     await state.set_state(CarEdit.confirm_delete)
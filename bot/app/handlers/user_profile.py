@@ -1,3 +1,5 @@
+from typing import Any
+
 from aiogram import Router, F
 from aiogram.types import (
     Message,
@@ -7,6 +9,8 @@ from aiogram.types import (
 )
 
 from ..api_client import api_client
+from ..safe_edit import edit_or_answer
+from .general import BTN_MAIN_MENU, NOT_REGISTERED_TEXT
 
 router = Router()
 
@@ -18,98 +22,114 @@ def get_profile_keyboard() -> InlineKeyboardMarkup:
     - В главное меню
     """
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
+        inline_keyboard=(
+            (
                 InlineKeyboardButton(
                     text="✏️ Редактировать профиль",
                     callback_data="profile:edit",
                 ),
-            ],
-            [
-                InlineKeyboardButton(
-                    text="⬅️ В меню",
-                    callback_data="main:menu",
-                ),
-            ],
-        ]
+            ),
+            (BTN_MAIN_MENU,),
+        )
     )
 
 
-async def _send_profile(message: Message, telegram_id: int) -> None:
-    """
-    Общая логика показа профиля.
+# Клавиатура статичная — собираем один раз
+KB_PROFILE = get_profile_keyboard()
 
-    ВАЖНО: сюда явно передаём telegram_id пользователя,
-    потому что для callback message.from_user = бот.
-    """
-    user = await api_client.get_user_by_telegram(telegram_id)
 
-    if not user:
-        await message.answer(
-            "Похоже, вы ещё не зарегистрированы.\n"
-            "Нажмите /start, чтобы пройти короткую регистрацию.",
-        )
-        return
+ROLE_NAMES = {
+    "client": "Клиент",
+    "service_owner": "Владелец СТО",
+    "admin": "Администратор",
+}
 
-    # user может прийти как dict (из backend) или как объект (на будущее)
+
+def _format_profile(user: Any) -> str:
+    """
+    Текст карточки профиля.
+    user может прийти как dict (из backend) или как объект (на будущее).
+    """
     if isinstance(user, dict):
-        full_name = user.get("full_name") or "—"
-        phone = user.get("phone") or "—"
-        city = user.get("city") or "—"
-        role = user.get("role") or "client"
-        bonus = user.get("bonus_balance")
+        get = user.get
     else:
-        full_name = getattr(user, "full_name", None) or "—"
-        phone = getattr(user, "phone", None) or "—"
-        city = getattr(user, "city", None) or "—"
-        role = getattr(user, "role", None) or "client"
-        bonus = getattr(user, "bonus_balance", None)
-
-    role_names = {
-        "client": "Клиент",
-        "service_owner": "Владелец СТО",
-        "admin": "Администратор",
-    }
-    role_text = role_names.get(str(role), "Клиент")
+        def get(key: str) -> Any:
+            return getattr(user, key, None)
 
     lines = [
         "<b>👤 Профиль</b>",
         "",
-        f"<b>Имя:</b> {full_name}",
-        f"<b>Телефон:</b> {phone}",
-        f"<b>Город:</b> {city}",
-        f"<b>Роль:</b> {role_text}",
+        f"<b>Имя:</b> {get('full_name') or '—'}",
+        f"<b>Телефон:</b> {get('phone') or '—'}",
+        f"<b>Город:</b> {get('city') or '—'}",
+        f"<b>Роль:</b> {ROLE_NAMES.get(str(get('role') or 'client'), 'Клиент')}",
     ]
 
+    bonus = get("bonus_balance")
     if bonus is not None:
         lines.append(f"<b>Бонусы:</b> {bonus}")
 
-    text = "\n".join(lines)
+    return "\n".join(lines)
+
+
+async def _send_profile(
+    message: Message,
+    telegram_id: int,
+    current_user: dict | None = None,
+    edit: bool = False,
+) -> None:
+    """
+    Общая логика показа профиля.
+
+    ВАЖНО: сюда явно передаём telegram_id пользователя,
+    потому что для callback message.from_user = бот.
+    current_user (из CurrentUserMiddleware) избавляет от похода в backend.
+    edit=True — показываем профиль в том же сообщении (вход из меню).
+    """
+    user = current_user or await api_client.get_user_by_telegram(telegram_id)
+
+    if not user:
+        await message.answer(
+            NOT_REGISTERED_TEXT,
+        )
+        return
+
+    text = _format_profile(user)
+
+    if edit:
+        # повторный тап по «Профиль» ничего не отправляет
+        await edit_or_answer(message, text, reply_markup=KB_PROFILE)
+        return
 
     await message.answer(
         text,
-        reply_markup=get_profile_keyboard(),
+        reply_markup=KB_PROFILE,
     )
 
 
 # -------- входы в профиль --------
 
 
-@router.message(F.text == "👤 Профиль")
-async def profile_show_legacy(message: Message):
+@router.message(F.text == "👤 Профиль", flags={"current_user": True})
+async def profile_show_legacy(message: Message, current_user: dict | None = None):
     """
     Старый вариант входа по текстовой кнопке.
     """
-    await _send_profile(message, telegram_id=message.from_user.id)
+    await _send_profile(message, telegram_id=message.from_user.id, current_user=current_user)
 
 
-@router.callback_query(F.data == "main:profile")
-async def profile_show_from_menu(callback: CallbackQuery):
+@router.callback_query(F.data == "main:profile", flags={"current_user": True})
+async def profile_show_from_menu(callback: CallbackQuery, current_user: dict | None = None):
     """
     Вход из главного инлайн-меню.
     ВАЖНО: брать id из callback.from_user, а не callback.message.from_user.
     """
-    await _send_profile(callback.message, telegram_id=callback.from_user.id)
+    await _send_profile(
+        callback.message,
+        telegram_id=callback.from_user.id,
+        current_user=current_user,
+        edit=True,
+    )
     await callback.answer()
 
 
@@ -3,6 +3,7 @@ from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 
 from ..api_client import api_client
+from ..middlewares import forget_current_user
 from .general import get_main_menu
 from ..states.user_states import UserRegistration
 
@@ -19,7 +20,9 @@ async def reg_full_name(message: Message, state: FSMContext):
         await message.answer("Пожалуйста, введите ваше имя текстом.")
         return
 
-    await state.update_data(full_name=full_name)
+    # Первый шаг сценария: данных в FSM ещё нет, поэтому пишем их одним
+    # set_data без предварительного чтения (update_data = get + set).
+    await state.set_data({"full_name": full_name})
     await state.set_state(UserRegistration.waiting_phone)
 
     await message.answer("Введите номер телефона:")
@@ -45,7 +48,7 @@ async def reg_phone(message: Message, state: FSMContext):
 @router.message(UserRegistration.waiting_city, F.text)
 async def reg_city(message: Message, state: FSMContext):
     """
-    Шаг 3: город → создаём пользователя в backend.
+    Шаг 3: город → создаём (или обновляем) пользователя в backend.
     """
     city = (message.text or "").strip()
     if not city:
@@ -55,29 +58,27 @@ async def reg_city(message: Message, state: FSMContext):
     data = await state.get_data()
 
     payload = {
-        "telegram_id": message.from_user.id,
         "full_name": data.get("full_name") or message.from_user.full_name,
         "phone": data.get("phone"),
         "city": city,
     }
 
-    try:
-        await api_client.create_user(payload)
-    except Exception:
-        # Логируем в api_client, пользователю — аккуратное сообщение
-        await message.answer(
-            "Произошла ошибка при регистрации. Попробуйте позже."
-        )
-        await state.clear()
-        return
+    # пользователь сейчас появится в backend — сбрасываем кэш middleware
+    # (до запроса: свежий ответ upsert-а APIClient кладёт в кэш сам)
+    forget_current_user(message.from_user.id)
+
+    # Один PUT вместо «найти + создать/обновить»: повторная регистрация
+    # просто обновляет анкету.
+    # APIError отсюда обрабатывает общий on_api_error (сообщение + сброс FSM)
+    user = await api_client.upsert_user_by_telegram(message.from_user.id, payload)
 
     await message.answer("Регистрация успешно завершена! 🎉")
 
     # Показываем главное меню отдельным сообщением
-    # Пока считаем, что новая регистрация — это обычный клиент.
+    role = user.get("role") if isinstance(user, dict) else None
     await message.answer(
         "Выберите действие из меню ниже 👇",
-        reply_markup=get_main_menu(role="client"),
+        reply_markup=get_main_menu(role=role or "client"),
     )
 
     await state.clear()
@@ -0,0 +1,22 @@
+"""
+JSON для бота через orjson.
+
+Через JSON проходит каждый апдейт Telegram, каждая клавиатура в ответе,
+каждый запрос к backend-у и данные FSM в Redis — orjson заметно быстрее
+stdlib json. aiogram / aiohttp ждут dumps, возвращающий str.
+
+Готовую JSON-строку статичных клавиатур (KB_*) не кешируем: aiogram сам
+делает model_dump() всего метода перед отправкой и строку в reply_markup
+не принимает — пришлось бы патчить его сессию. Сами клавиатуры собраны
+один раз на модуль, а кодирование их в JSON идёт через orjson.
+"""
+
+from typing import Any
+
+import orjson
+
+loads = orjson.loads
+
+
+def dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
@@ -5,25 +5,44 @@ import logging.config
 from pathlib import Path
 
 import uvicorn
+from aiohttp import web
 from fastapi import FastAPI
 
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.filters import ExceptionTypeFilter
+from aiogram.fsm.storage.memory import DisabledEventIsolation, MemoryStorage
+from aiogram.fsm.strategy import FSMStrategy
 from aiogram.types import MenuButtonWebApp, WebAppInfo
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
 try:
-    from aiogram.fsm.storage.redis import RedisStorage, Redis  # type: ignore
+    from aiogram.fsm.storage.redis import (  # type: ignore
+        DefaultKeyBuilder,
+        Redis,
+        RedisStorage,
+    )
 
     HAS_REDIS = True
 except ImportError:
     RedisStorage = None  # type: ignore
     Redis = None  # type: ignore
+    DefaultKeyBuilder = None  # type: ignore
     HAS_REDIS = False
 
+try:
+    import uvloop  # type: ignore
+except ImportError:  # Windows / локальный запуск без uvloop
+    uvloop = None  # type: ignore
+
+from . import json_utils
+from .api_client import APIError, api_client
 from .config import config
 from .handlers.chat import router as chat_router
+from .handlers.errors import on_api_error
 from .handlers.general import router as general_router
+from .middlewares import setup_user_context
 from .notify_api import build_notify_app  # ✅ ВАЖНО
 
 
@@ -95,17 +114,55 @@ LOG_CONFIG = setup_logging("bot")
 app: FastAPI = FastAPI()
 
 
-async def main():
-    bot = Bot(token=config.BOT_TOKEN, parse_mode=ParseMode.HTML)
+async def main() -> None:
+    # Общий keep-alive пул соединений к Telegram, с запасом под рассылки
+    session = AiohttpSession(
+        limit=config.TG_CONNECTION_LIMIT,
+        json_loads=json_utils.loads,
+        json_dumps=json_utils.dumps,
+    )
+    bot = Bot(token=config.BOT_TOKEN, session=session, parse_mode=ParseMode.HTML)
 
-    # FSM storage
+    # FSM storage: Redis переживает рестарт и общий для нескольких воркеров
     if HAS_REDIS and config.REDIS_URL:
         redis = Redis.from_url(config.REDIS_URL)
-        storage = RedisStorage(redis=redis)
+        fsm_ttl = config.FSM_TTL or None
+        storage = RedisStorage(
+            redis=redis,
+            key_builder=DefaultKeyBuilder(with_destiny=True),
+            state_ttl=fsm_ttl,
+            data_ttl=fsm_ttl,
+            json_loads=json_utils.loads,
+            json_dumps=json_utils.dumps,
+        )
     else:
+        if config.REDIS_URL:
+            logging.getLogger(__name__).warning(
+                "REDIS_URL задан, но пакет redis не установлен — FSM хранится в памяти"
+            )
         storage = MemoryStorage()
 
-    dp = Dispatcher(storage=storage)
+    # Изоляцию событий оставляем выключенной (DisabledEventIsolation):
+    # апдейты одного пользователя не ждут per-key asyncio.Lock, а гонок
+    # в сценариях нет — пользователь не может нажать следующий шаг раньше,
+    # чем бот показал его. Бот работает только в личке (chat_id == user_id),
+    # так что ключ USER_IN_CHAT по сути и есть ключ по пользователю.
+    dp = Dispatcher(
+        storage=storage,
+        fsm_strategy=FSMStrategy.USER_IN_CHAT,
+        events_isolation=DisabledEventIsolation(),
+    )
+
+    # Пользователь из backend — только для хендлеров с flags={"current_user": True}
+    user_context = setup_user_context(api_client)
+    dp.message.middleware(user_context)
+    dp.callback_query.middleware(user_context)
+
+    # HTTP-сессию к backend-у закрываем вместе с диспетчером
+    dp.shutdown.register(api_client.close)
+
+    # Ошибки backend-а, которые хендлеры не обработали сами
+    dp.errors.register(on_api_error, ExceptionTypeFilter(APIError))
 
     # ✅ ВАЖНО: deep-link /start chat_r._s. должен отрабатывать ПЕРВЫМ
     dp.include_router(chat_router)
@@ -127,13 +184,52 @@ async def main():
     except Exception:
         logging.getLogger(__name__).exception("Failed to set chat menu button")
 
-    await asyncio.gather(
-        dp.start_polling(bot),
-        _run_api(),
+    if config.WEBHOOK_URL:
+        await asyncio.gather(
+            _run_webhook(dp, bot),
+            _run_api(),
+        )
+    else:
+        # после webhook-режима getUpdates вернёт 409, пока webhook не снят
+        await bot.delete_webhook()
+        await asyncio.gather(
+            dp.start_polling(bot),
+            _run_api(),
+        )
+
+
+async def _run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """
+    Приём апдейтов через webhook.
+    handle_in_background=False: если хендлер вернул метод API
+    (например, `return callback.answer()`), aiogram отдаёт его прямо
+    в ответе на webhook — без отдельного запроса к api.telegram.org.
+    """
+    await bot.set_webhook(
+        url=f"{config.WEBHOOK_URL}{config.WEBHOOK_PATH}",
+        secret_token=config.WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
     )
 
+    web_app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=config.WEBHOOK_SECRET,
+        handle_in_background=False,
+    ).register(web_app, path=config.WEBHOOK_PATH)
+    setup_application(web_app, dp, bot=bot)
+
+    runner = web.AppRunner(web_app)
+    await runner.setup()
+    site = web.TCPSite(runner, host="0.0.0.0", port=config.WEBHOOK_PORT)
+    await site.start()
 
-async def _run_api():
+    # держим задачу живой, пока работает процесс
+    await asyncio.Event().wait()
+
+
+async def _run_api() -> None:
     uv_config = uvicorn.Config(
         app,
         host="0.0.0.0",
@@ -146,4 +242,8 @@ async def _run_api():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        # более быстрый event loop (libuv): дешевле планирование задач и сокеты
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
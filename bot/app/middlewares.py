@@ -0,0 +1,76 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+
+from .api_client import APIClient
+
+logger = logging.getLogger(__name__)
+
+
+class CurrentUserMiddleware(BaseMiddleware):
+    """
+    Достаём пользователя по telegram_id и кладём его в data["current_user"] —
+    хендлер получает его аргументом и не ходит в backend повторно.
+
+    Только для хендлеров с флагом current_user:
+
+        @router.callback_query(F.data == "main:menu", flags={"current_user": True})
+
+    Остальные апдейты (/start, deep-link, пересылка в чате) идут мимо —
+    лишний запрос к backend-у им не нужен, а при его недоступности
+    они не ждут таймаута клиента.
+
+    Между апдейтами пользователь живёт в TTL-кэше APIClient — отдельного
+    кэша у middleware нет, чтобы сброс и срок жизни были в одном месте.
+    """
+
+    def __init__(self, api: APIClient) -> None:
+        self.api = api
+
+    def forget(self, telegram_id: int) -> None:
+        """
+        Сбрасываем кэш пользователя (после регистрации / смены роли).
+        """
+        self.api.forget_user(telegram_id)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not get_flag(data, "current_user"):
+            return await handler(event, data)
+
+        from_user = getattr(event, "from_user", None)
+        current_user: Optional[Dict[str, Any]] = None
+
+        if from_user is not None:
+            try:
+                current_user = await self.api.get_user_by_telegram(from_user.id)
+            except Exception:
+                # backend недоступен — хендлер сам решит, что делать
+                logger.debug("Не удалось получить пользователя %s", from_user.id, exc_info=True)
+                current_user = None
+
+        data["current_user"] = current_user
+        return await handler(event, data)
+
+
+# Общий экземпляр: регистрируется в main.py, а хендлеры могут
+# сбросить кэш через user_context.forget(telegram_id).
+user_context: Optional[CurrentUserMiddleware] = None
+
+
+def setup_user_context(api: APIClient) -> CurrentUserMiddleware:
+    global user_context
+    user_context = CurrentUserMiddleware(api)
+    return user_context
+
+
+def forget_current_user(telegram_id: int) -> None:
+    if user_context is not None:
+        user_context.forget(telegram_id)
@@ -1,12 +1,15 @@
 import os
 from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI, Header, HTTPException
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Request
 from pydantic import BaseModel
 
 from aiogram import Bot
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 
+from .background import spawn
+from .throttling import throttled_send
+
 
 class NotifyPayload(BaseModel):
     recipient_type: str
@@ -16,47 +19,73 @@ class NotifyPayload(BaseModel):
     extra: Optional[Dict[str, Any]] = None
 
 
-def build_notify_app(bot: Bot) -> FastAPI:
-    app = FastAPI(title="CarBot Notify API")
+router = APIRouter()
+
+
+def _build_keyboard(buttons: Optional[List[Dict[str, str]]]) -> Optional[InlineKeyboardMarkup]:
+    if not buttons:
+        return None
+    rows: List[List[InlineKeyboardButton]] = []
+    for b in buttons:
+        text = b.get("text")
+        btn_type = (b.get("type") or "url").lower()
+        url = b.get("url")
+        if text and url:
+            if btn_type in ("web_app", "webapp", "miniapp"):
+                rows.append([InlineKeyboardButton(text=text, web_app=WebAppInfo(url=url))])
+            else:
+                rows.append([InlineKeyboardButton(text=text, url=url)])
+    return InlineKeyboardMarkup(inline_keyboard=rows) if rows else None
+
+
+@router.get("/health")
+async def health() -> Dict[str, Any]:
+    return {"ok": True}
 
-    token = os.getenv("BOT_API_TOKEN", "")
-
-    @app.get("/health")
-    async def health() -> Dict[str, Any]:
-        return {"ok": True}
-
-    @app.post("/api/v1/notify")
-    async def notify(
-        payload: NotifyPayload,
-        authorization: str | None = Header(default=None),
-    ) -> Dict[str, Any]:
-        # Авторизация (если задана)
-        if token:
-            if not authorization or not authorization.startswith("Bearer "):
-                raise HTTPException(status_code=401, detail="Unauthorized")
-            if authorization.removeprefix("Bearer ").strip() != token:
-                raise HTTPException(status_code=401, detail="Unauthorized")
-
-        kb = None
-        if payload.buttons:
-            rows: List[List[InlineKeyboardButton]] = []
-            for b in payload.buttons:
-                text = b.get("text")
-                btn_type = (b.get("type") or "url").lower()
-                url = b.get("url")
-                if text and url:
-                    if btn_type in ("web_app", "webapp", "miniapp"):
-                        rows.append([InlineKeyboardButton(text=text, web_app=WebAppInfo(url=url))])
-                    else:
-                        rows.append([InlineKeyboardButton(text=text, url=url)])
-            if rows:
-                kb = InlineKeyboardMarkup(inline_keyboard=rows)
-
-        await bot.send_message(
-            chat_id=payload.telegram_id,
-            text=payload.message,
-            reply_markup=kb,
+
+@router.post("/api/v1/notify", status_code=202)
+async def notify(
+    payload: NotifyPayload,
+    request: Request,
+    authorization: str | None = Header(default=None),
+) -> Dict[str, Any]:
+    # bot и токен лежат в app.state (см. build_notify_app)
+    state = request.app.state
+
+    # Авторизация (если задана)
+    token = state.token
+    if token:
+        if not authorization or not authorization.startswith("Bearer "):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+        if authorization.removeprefix("Bearer ").strip() != token:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+
+    if payload.telegram_id <= 0 or not payload.message.strip():
+        raise HTTPException(status_code=422, detail="telegram_id and message are required")
+    reply_markup = _build_keyboard(payload.buttons)
+
+    # Отправка идёт через те же лимиты, что и рассылки бота (слот чата,
+    # повторы после 429) и может занять секунды — дольше таймаутов
+    # backend-а. Поэтому принимаем уведомление (202) и шлём в фоне:
+    # иначе backend сочтёт его неотправленным и может прислать дубль.
+    spawn(
+        throttled_send(
+            state.bot,
+            payload.telegram_id,
+            payload.message,
+            reply_markup=reply_markup,
         )
-        return {"ok": True}
+    )
+    return {"ok": True, "queued": True}
 
+
+def build_notify_app(bot: Bot) -> FastAPI:
+    """
+    Хендлеры объявлены на уровне модуля (router), а зависимости
+    (bot, токен) кладём в app.state — без замыканий на каждый вызов сборки.
+    """
+    app = FastAPI(title="CarBot Notify API")
+    app.state.bot = bot
+    app.state.token = os.getenv("BOT_API_TOKEN", "")
+    app.include_router(router)
     return app
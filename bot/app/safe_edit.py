@@ -0,0 +1,50 @@
+"""
+Правка сообщений без лишних запросов к Telegram.
+
+Повторный тап по той же кнопке даёт тот же текст и клавиатуру —
+Telegram отвечает «message is not modified», а мы тратим round-trip
+и разбор исключения. Такие правки отсекаем сравнением до запроса.
+"""
+
+from typing import Optional
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, Message
+
+
+def _not_modified(e: TelegramBadRequest) -> bool:
+    return "message is not modified" in str(e)
+
+
+async def safe_edit(
+    message: Message,
+    text: str,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+) -> None:
+    """
+    edit_text без лишнего запроса к Telegram:
+    если текст и клавиатура не изменились (двойной тап по кнопке) —
+    ничего не отправляем; «message is not modified» тоже не считаем ошибкой.
+    """
+    if message.html_text == text and message.reply_markup == reply_markup:
+        return
+    try:
+        await message.edit_text(text, reply_markup=reply_markup)
+    except TelegramBadRequest as e:
+        if not _not_modified(e):
+            raise
+
+
+async def edit_or_answer(
+    message: Message,
+    text: str,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+) -> None:
+    """
+    Как safe_edit, но если сообщение нельзя отредактировать
+    (старое, с фото и т.п.) — отправляем новое.
+    """
+    try:
+        await safe_edit(message, text, reply_markup=reply_markup)
+    except TelegramBadRequest:
+        await message.answer(text, reply_markup=reply_markup)
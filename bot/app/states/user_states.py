@@ -15,22 +15,6 @@ class CarCreate(StatesGroup):
     choosing_vin = State()
 
 
-class RequestCreateFSM(StatesGroup):
-    choosing_location = State()
-    choosing_car_movable = State()
-    choosing_radius = State()
-    choosing_category = State()
-    choosing_description = State()
-    choosing_photos = State()
-    choosing_hide_phone = State()
-
-    # НОВОЕ:
-    choosing_day = State()
-    choosing_time_range = State()
-
-    confirm = State()
-
-
 class CarEdit(StatesGroup):
     waiting_for_field = State()
     waiting_for_value = State()
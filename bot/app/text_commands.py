@@ -0,0 +1,32 @@
+"""
+Короткие текстовые команды на шагах FSM: «отмена», «пропустить» и т.п.
+
+Проверки идут на каждое текстовое сообщение в сценарии, а почти всё, что
+пишет пользователь, — обычный ввод (адрес, описание, название). Поэтому
+длинный текст отсекаем по длине, не вызывая strip()/casefold().
+"""
+
+# Все команды короче этого — длиннее уже точно обычный ввод.
+_MAX_COMMAND_LEN = 16
+
+# Слова отмены сценария (уже в нижнем регистре).
+CANCEL_WORDS = frozenset({"отмена", "отменить", "cancel", "/cancel"})
+
+
+def is_one_of(text: str | None, words: frozenset[str]) -> bool:
+    """
+    Текст — одно из слов words (без учёта регистра и пробелов по краям)?
+    words должны быть уже в нижнем регистре.
+    """
+    return (
+        text is not None
+        and len(text) <= _MAX_COMMAND_LEN
+        and text.strip().casefold() in words
+    )
+
+
+def is_cancel(text: str | None) -> bool:
+    """
+    Пользователь написал «отмена»?
+    """
+    return is_one_of(text, CANCEL_WORDS)
@@ -0,0 +1,121 @@
+"""
+Ограничение исходящих уведомлений в Telegram.
+
+Bot API режет бота при ~30 сообщениях в секунду суммарно и ~1 сообщении
+в секунду в один чат (дальше — 429 Too Many Requests с retry_after).
+Все уведомления «от системы» (рассылка заявки, отклики, смена статусов,
+запросы backend-а в notify API)
+отправляем через throttled_call / throttled_send, чтобы не ловить 429
+и не получать всплески задержек под нагрузкой.
+
+Лимиты — на процесс. При нескольких воркерах бота понадобится общий
+счётчик (например, в Redis).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Минимальный интервал между сообщениями в один чат, сек.
+PER_CHAT_INTERVAL = 1.0
+
+# Сколько раз повторяем отправку после 429
+_MAX_RETRIES = 2
+
+# Не даём словарю «последних отправок» расти бесконечно
+_PER_CHAT_MAXSIZE = 10_000
+
+
+class RateLimiter:
+    """
+    Не больше max_rate вызовов за period секунд (скользящее окно).
+    """
+
+    def __init__(self, max_rate: int, period: float = 1.0) -> None:
+        self.max_rate = max_rate
+        self.period = period
+        self._stamps: deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._stamps and now - self._stamps[0] >= self.period:
+                    self._stamps.popleft()
+                if len(self._stamps) < self.max_rate:
+                    self._stamps.append(now)
+                    return
+                await asyncio.sleep(self.period - (now - self._stamps[0]))
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+# Глобальный лимит Bot API — ~30 сообщений в секунду, держим запас
+SEND_RATE = RateLimiter(29, 1.0)
+
+# chat_id -> момент (monotonic), раньше которого в чат писать нельзя
+_next_slot: Dict[int, float] = {}
+
+
+def _reserve_chat_slot(chat_id: int) -> float:
+    """
+    Бронируем слот для чата, возвращаем, сколько ждать до него.
+    """
+    now = time.monotonic()
+    if len(_next_slot) >= _PER_CHAT_MAXSIZE:
+        for key in [k for k, ts in _next_slot.items() if ts <= now]:
+            del _next_slot[key]
+    slot = max(now, _next_slot.get(chat_id, 0.0))
+    _next_slot[chat_id] = slot + PER_CHAT_INTERVAL
+    return slot - now
+
+
+async def throttled_call(chat_id: int, call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Выполнить отправку call() в чат chat_id с учётом лимитов.
+
+    call — фабрика корутины (lambda: bot.send_photo(...)): при 429
+    запрос нужно создать заново.
+    """
+    attempt = 0
+    while True:
+        delay = _reserve_chat_slot(chat_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with SEND_RATE:
+            try:
+                return await call()
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > _MAX_RETRIES:
+                    raise
+                logger.warning(
+                    "Telegram 429 для чата %s, повтор через %s с",
+                    chat_id,
+                    e.retry_after,
+                )
+                retry_after = e.retry_after
+        # ждём вне лимитера, чтобы не держать его слот
+        await asyncio.sleep(retry_after)
+
+
+async def throttled_send(bot: Bot, chat_id: int, text: str, **kwargs: Any) -> Message:
+    """
+    bot.send_message с учётом лимитов Telegram.
+    """
+    return await throttled_call(
+        chat_id,
+        lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs),
+    )